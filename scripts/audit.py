@@ -4,14 +4,18 @@ OpenOnco Data Quality Audit Script
 Analyzes data.js for quality issues, missing citations, and data staleness.
 
 Usage:
-    python3 scripts/audit.py [path/to/data.js]
+    python3 scripts/audit.py [path/to/data.js] [--prom-file path/to/openonco_audit.prom]
     
 If no path provided, uses default: /Users/adickinson/Documents/GitHub/V0/src/data.js
+With --prom-file (or OO_AUDIT_PROM_TEXTFILE), metrics are written for the
+Prometheus node_exporter textfile collector.
 """
 
 import re
 import json
+import os
 import sys
+import time
 from datetime import datetime, timedelta
 from collections import defaultdict
 from pathlib import Path
@@ -535,14 +539,109 @@ def run_audit(data_path):
     return all_findings, tests_by_category
 
 
+SEVERITIES = ['critical', 'high', 'medium', 'low']
+DURATION_BUCKETS = [0.1, 0.5, 1, 2, 5, 10, 30, 60]
+
+
+def write_prom_textfile(path, findings, tests_by_category, duration_s):
+    """
+    Write audit metrics in the Prometheus text format.
+
+    Finding and test counts are gauges (current state of data.js). The run
+    counter and duration histogram are cumulative; their totals are kept in
+    <path>.state.json between runs. The file is replaced atomically.
+    """
+    path = Path(path)
+    state_path = path.with_name(path.name + '.state.json')
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        state = {'runs': 0, 'buckets': [0] * len(DURATION_BUCKETS), 'sum': 0.0, 'count': 0}
+    state['runs'] += 1
+    state['buckets'] = [n + (duration_s <= le) for n, le in zip(state['buckets'], DURATION_BUCKETS)]
+    state['sum'] += duration_s
+    state['count'] += 1
+
+    by_severity = defaultdict(int)
+    by_category = defaultdict(int)
+    for finding in findings:
+        by_severity[finding.severity] += 1
+        by_category[(finding.severity, finding.category)] += 1
+
+    lines = [
+        '# HELP openonco_audit_runs_total Audit runs.',
+        '# TYPE openonco_audit_runs_total counter',
+        f'openonco_audit_runs_total {state["runs"]}',
+        '# HELP openonco_audit_duration_seconds Audit wall time.',
+        '# TYPE openonco_audit_duration_seconds histogram',
+    ]
+    for le, count in zip(DURATION_BUCKETS, state['buckets']):
+        lines.append(f'openonco_audit_duration_seconds_bucket{{le="{le:g}"}} {count}')
+    lines += [
+        f'openonco_audit_duration_seconds_bucket{{le="+Inf"}} {state["count"]}',
+        f'openonco_audit_duration_seconds_sum {state["sum"]!r}',
+        f'openonco_audit_duration_seconds_count {state["count"]}',
+        '# HELP openonco_audit_last_run_timestamp_seconds Unix time of the last audit.',
+        '# TYPE openonco_audit_last_run_timestamp_seconds gauge',
+        f'openonco_audit_last_run_timestamp_seconds {int(time.time())}',
+        '# HELP openonco_audit_findings Findings in the last audit by severity.',
+        '# TYPE openonco_audit_findings gauge',
+    ]
+    for severity in SEVERITIES:
+        lines.append(f'openonco_audit_findings{{severity="{severity}"}} {by_severity[severity]}')
+    lines += [
+        '# HELP openonco_audit_category_findings Findings in the last audit by severity and test category.',
+        '# TYPE openonco_audit_category_findings gauge',
+    ]
+    for severity in SEVERITIES:
+        for category in tests_by_category:
+            lines.append(
+                f'openonco_audit_category_findings{{category="{category}",severity="{severity}"}} '
+                f'{by_category[(severity, category)]}'
+            )
+    lines += [
+        '# HELP openonco_audit_tests Tests in data.js by category.',
+        '# TYPE openonco_audit_tests gauge',
+    ]
+    for category, tests in tests_by_category.items():
+        lines.append(f'openonco_audit_tests{{category="{category}"}} {len(tests)}')
+    lines += [
+        '# HELP openonco_audit_tests_needing_attention Tests with at least one finding.',
+        '# TYPE openonco_audit_tests_needing_attention gauge',
+        f'openonco_audit_tests_needing_attention {len(set(f.test_id for f in findings))}',
+    ]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(state_path, 'w') as f:
+        json.dump(state, f)
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    tmp.write_text('\n'.join(lines) + '\n')
+    tmp.replace(path)
+
+
 if __name__ == '__main__':
+    args = sys.argv[1:]
+    prom_file = os.environ.get('OO_AUDIT_PROM_TEXTFILE')
+    if '--prom-file' in args:
+        idx = args.index('--prom-file')
+        if idx + 1 >= len(args):
+            print("Usage: python3 scripts/audit.py [path/to/data.js] [--prom-file FILE]")
+            sys.exit(2)
+        prom_file = args[idx + 1]
+        del args[idx:idx + 2]
+
     # Get path from command line or use default
-    if len(sys.argv) > 1:
-        data_path = sys.argv[1]
+    if args:
+        data_path = args[0]
     else:
         data_path = DEFAULT_DATA_PATH
     
+    started = time.perf_counter()
     findings, tests = run_audit(data_path)
+    if prom_file:
+        write_prom_textfile(prom_file, findings, tests, time.perf_counter() - started)
+        print(f"\n📈 Metrics written to {prom_file}")
     
     # Exit with error code if critical issues found
     critical_count = len([f for f in findings if f.severity == 'critical'])
@@ -0,0 +1,172 @@
+"""
+Append-only candidate archive, partitioned by day.
+
+    data/archive/
+        2026-01-15/
+            manifest.json               # runs in the partition: records, bytes, sources
+            2026-01-15_060001.jsonl     # one candidate per line, in the order they finished
+
+Each run appends to its own file and only rewrites its partition's small
+manifest, so a run's write cost depends on what it found, not on history.
+Records keep raw_data as the pipeline left it: large payloads are a raw_ref
+into the blob store (blobstore.py), shared with every other run that saw the
+same payload. Files written before the blob store have a <run>.raw.gz next to
+them, with one gzip member per payload; read_run reads both.
+"""
+
+import gzip
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+from blobstore import BLOBS, BlobStore
+
+
+def _write_json(path: Path, data: dict):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    tmp.replace(path)
+
+
+def _valid_lines(path: Path) -> tuple[list[dict], int]:
+    """Records in a run file and the byte length of its complete lines (a crash can cut the last one)."""
+    records, length = [], 0
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+                length += len(line)
+    except FileNotFoundError:
+        pass
+    return records, length
+
+
+class ArchiveWriter:
+    """
+    Streams one run's finished candidates into its partition.
+
+    Reopening a run (a resumed run, or the draft step run again) appends to
+    its file; candidates already archived for the run are skipped.
+    """
+
+    def __init__(self, partition_dir: Path, run_id: str, blobs: BlobStore = BLOBS):
+        self.partition_dir = Path(partition_dir)
+        self.partition_dir.mkdir(parents=True, exist_ok=True)
+        self.run_id = run_id
+        self.path = self.partition_dir / f"{run_id}.jsonl"
+        self.blobs = blobs
+
+        existing, length = _valid_lines(self.path)
+        self._ids = {record["id"] for record in existing}
+        self._sources: dict[str, int] = {}
+        for record in existing:
+            source = record.get("source", "unknown")
+            self._sources[source] = self._sources.get(source, 0) + 1
+        self._raw_refs = sum(1 for record in existing if "raw_ref" in record)
+        self._raw_bytes = sum(record["raw_ref"]["bytes"] for record in existing if "raw_ref" in record)
+
+        self._file = open(self.path, "ab")
+        self._file.truncate(length)
+
+    def __len__(self) -> int:
+        """Candidates archived for the run, including any from before it was resumed."""
+        return len(self._ids)
+
+    def add(self, candidate: dict):
+        if candidate["id"] in self._ids:
+            return
+        self._ids.add(candidate["id"])
+        # Payloads the pipeline did not stash (e.g. carried over from an older version)
+        record = self.blobs.stash(dict(candidate))
+        if "raw_ref" in record:
+            self._raw_refs += 1
+            self._raw_bytes += record["raw_ref"]["bytes"]
+        self._file.write(json.dumps(record, default=str).encode("utf-8") + b"\n")
+        self._file.flush()
+        source = record.get("source", "unknown")
+        self._sources[source] = self._sources.get(source, 0) + 1
+
+    def close(self) -> Path:
+        """Close the run's files and record it in the partition manifest."""
+        self._file.close()
+        manifest_path = self.partition_dir / "manifest.json"
+        try:
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = {"partition": self.partition_dir.name, "runs": {}}
+        manifest["runs"][self.run_id] = {
+            "file": self.path.name,
+            "records": len(self._ids),
+            "bytes": self.path.stat().st_size,
+            "raw_refs": self._raw_refs,
+            "raw_bytes": self._raw_bytes,
+            "sources": dict(sorted(self._sources.items())),
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        _write_json(manifest_path, manifest)
+        return self.path
+
+
+class CandidateArchive:
+    """Reads and writes the day-partitioned archive under `root`."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def writer(self, run_id: str, partition: str | None = None) -> ArchiveWriter:
+        """Writer for a run; partition is a YYYY-MM-DD day (default: today)."""
+        partition = partition or datetime.now().strftime("%Y-%m-%d")
+        return ArchiveWriter(self.root / partition, run_id)
+
+    def partitions(self) -> list[str]:
+        return sorted(p.name for p in self.root.glob("*") if (p / "manifest.json").exists())
+
+    def manifest(self, partition: str) -> dict:
+        with open(self.root / partition / "manifest.json", "r") as f:
+            return json.load(f)
+
+    def iter_candidates(self, partition: str | None = None, with_raw: bool = False) -> Iterator[dict]:
+        """Archived candidates, oldest partition first (one partition if given)."""
+        for name in [partition] if partition else self.partitions():
+            for run in self.manifest(name)["runs"].values():
+                yield from read_run(self.root / name / run["file"], with_raw=with_raw)
+
+
+def read_raw(run_path: Path, raw_ref: dict) -> dict:
+    """One raw_data payload; a blob, or a gzip member of a pre-blob-store <run>.raw.gz."""
+    if "sha256" in raw_ref:
+        return BLOBS.get(raw_ref["sha256"])
+    with open(Path(run_path).with_suffix(".raw.gz"), "rb") as f:
+        f.seek(raw_ref["offset"])
+        return json.loads(gzip.decompress(f.read(raw_ref["length"])))
+
+
+def read_run(run_path: Path, with_raw: bool = False) -> Iterator[dict]:
+    """A run file's candidates; with_raw restores raw_data from the blob store."""
+    records, _ = _valid_lines(Path(run_path))
+    for record in records:
+        if with_raw and "raw_ref" in record:
+            record["raw_data"] = read_raw(run_path, record.pop("raw_ref"))
+        yield record
+
+
+def load_candidates(path: Path) -> list[dict]:
+    """
+    Candidates with raw_data from a partition directory, one run's .jsonl file,
+    or a candidates_<date>.json written before the archive existed.
+    """
+    path = Path(path)
+    if path.is_dir():
+        return list(CandidateArchive(path.parent).iter_candidates(path.name, with_raw=True))
+    if path.suffix == ".jsonl":
+        return list(read_run(path, with_raw=True))
+    with open(path, "r") as f:
+        return json.load(f)
@@ -0,0 +1,118 @@
+"""
+Historical backfill (python main.py backfill --from 2026-01-01 --to 2026-03-31).
+
+The range is split into windows of CONFIG["backfill"]["window_days"]. Every
+source that can be queried by date collects each window completely, paging
+past the per-query caps of a daily run, and several windows run at once; the
+per-API rate limits (CONFIG["rate_limits"]) are shared by all of them. Each
+finished window is checkpointed like a collector of its own
+("pubmed@2026-01-08"), so an interrupted backfill resumed with --run ID only
+collects the windows it has not finished. When every window is in, all of
+them go through one dedup pass; enrich and draft then run as for any other
+run (steps.py).
+
+News is skipped: newsrooms and their feeds only show what is current.
+"""
+
+import asyncio
+from datetime import date, timedelta
+
+import httpx
+
+from config import CONFIG
+from steps import dedup, open_run
+from tracing import trace_event_hooks
+
+
+def windows(start: date, end: date, days: int) -> list[tuple[date, date]]:
+    """[start, end] in consecutive windows of `days` days, both ends inclusive; the last may be shorter."""
+    spans = []
+    while start <= end:
+        last = min(start + timedelta(days=days - 1), end)
+        spans.append((start, last))
+        start = last + timedelta(days=1)
+    return spans
+
+
+def window_key(source: str, window: tuple[date, date]) -> str:
+    """Checkpoint collector name for one source's window."""
+    return f"{source}@{window[0].isoformat()}"
+
+
+async def backfill(
+    start: date | None = None,
+    end: date | None = None,
+    sources: list[str] | None = None,
+    run_id: str | None = None,
+    window_days: int | None = None,
+):
+    """Collect [start, end] window by window into a new run (or finish run_id's backfill), then dedup it."""
+    from blobstore import BLOBS
+    from collectors import default_collectors
+
+    checkpoint = open_run(run_id, new=True)
+    if checkpoint is None:
+        return
+    spec = checkpoint.state.get("backfill")
+    if spec is None:
+        if start is None or end is None:
+            print(f"Run {checkpoint.run_id} is not a backfill; give --from and --to to start one")
+            return
+        if end < start:
+            print(f"--to {end} is before --from {start}")
+            return
+        available = [c.name for c in default_collectors() if c.windowed]
+        spec = {
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "window_days": window_days or CONFIG["backfill"]["window_days"],
+            "sources": [name for name in available if sources is None or name in sources],
+        }
+        checkpoint.record_backfill(spec)
+    elif start or end or sources or window_days:
+        print(f"Resuming backfill {checkpoint.run_id} with its own range and sources; other options are ignored")
+
+    spans = windows(date.fromisoformat(spec["from"]), date.fromisoformat(spec["to"]), spec["window_days"])
+    jobs = [(source, span) for span in spans for source in spec["sources"]]
+    pending = [(source, span) for source, span in jobs if not checkpoint.collector_done(window_key(source, span))]
+    print(f"Backfill {spec['from']}..{spec['to']} for run {checkpoint.run_id}: {', '.join(spec['sources'])}, "
+          f"{len(spans)} windows of {spec['window_days']} days, {len(jobs) - len(pending)} of {len(jobs)} already collected")
+
+    semaphore = asyncio.Semaphore(CONFIG["backfill"]["max_concurrency"])
+    failed = []
+
+    async def run(client: httpx.AsyncClient, source: str, span: tuple[date, date]):
+        key = window_key(source, span)
+        async with semaphore:
+            # A fresh collector per window: each keeps its own window and request counts
+            collector = next(c for c in default_collectors() if c.name == source)
+            collector.client = client
+            collector.window = span
+            collector.max_arms = None
+            collector.start_run(None)
+            try:
+                candidates = [BLOBS.stash(c) for c in await collector.collect()]
+            except Exception as e:
+                failed.append(key)
+                message = next(iter(str(e).splitlines()), "")  # httpx adds a line of advice
+                print(f"  → {key}: error: {type(e).__name__}: {message}")
+                return
+        # Request counts are left out: backfill volumes say nothing about a query's daily yield
+        checkpoint.record_collected(key, candidates)
+        print(f"  → {key}..{span[1].isoformat()}: {len(candidates)} raw candidates")
+
+    limits = httpx.Limits(max_connections=CONFIG["daemon"]["max_connections"])
+    try:
+        async with httpx.AsyncClient(
+            timeout=30, follow_redirects=True, limits=limits, event_hooks=trace_event_hooks()
+        ) as client:
+            await asyncio.gather(*(run(client, source, span) for source, span in pending))
+    finally:
+        checkpoint.close()
+
+    if failed:
+        print(f"\n{len(failed)} windows failed; collect them with: python main.py backfill --run {checkpoint.run_id}")
+        return
+    print()
+    dedup(checkpoint.run_id)
+    print(f"\nNext: python main.py enrich --run {checkpoint.run_id}, then draft and notify")
@@ -0,0 +1,135 @@
+"""
+Benchmark fixtures: synthetic data at multiples of a typical day's volume.
+
+    pytest benchmarks --bench-scales=1,10       # subset of scales
+    pytest benchmarks --benchmark-save=baseline # record a baseline
+    pytest benchmarks -m slow                   # only the 1000x scale (minutes, >1 GB)
+
+Scales in SLOW_SCALES carry the `slow` marker, which pytest.ini deselects
+unless -m is given on the command line.
+
+Comparison against a baseline is opt-in, since timings on shared machines
+drift by more than the limit between runs:
+
+    OO_BENCH_COMPARE=1 pytest benchmarks        # newest baseline for this machine
+    pytest benchmarks --benchmark-compare=0001  # a given one
+
+Either fails the run if a benchmark's fastest round is more than
+REGRESSION_LIMIT slower (unless --benchmark-compare-fail says otherwise).
+The storage, sort and column options live here rather than in pytest.ini,
+so the unit tests run without pytest-benchmark installed.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from pytest_benchmark.utils import get_machine_id
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import synthetic  # noqa: E402
+
+
+SCALES = (1, 10, 100, 1000)
+
+# Opt-in scales: the 1000x run takes over ten minutes and about 1.4 GB
+SLOW_SCALES = {1000}
+
+# Timed rounds per scale; large scales run once so the suite finishes in minutes
+ROUNDS = {1: 20, 10: 10, 100: 3, 1000: 1}
+
+BASELINES_DIR = Path(__file__).resolve().parent / "baselines"
+REGRESSION_LIMIT = "min:25%"
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--bench-scales",
+        default=",".join(str(s) for s in SCALES),
+        help="Comma-separated volume multipliers to run (default: 1,10,100,1000)",
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    """Set the suite's pytest-benchmark options (before pytest-benchmark reads them)."""
+    from pytest_benchmark.utils import parse_columns, parse_compare_fail
+
+    option = config.option
+    # Options still at pytest-benchmark's defaults
+    if option.benchmark_storage == "file://./.benchmarks":
+        option.benchmark_storage = str(BASELINES_DIR)
+    if option.benchmark_sort == "min":
+        option.benchmark_sort = "name"
+    if option.benchmark_columns is None:
+        option.benchmark_columns = parse_columns("min,median,max,rounds")
+
+    if option.benchmark_save:
+        return
+    if not option.benchmark_compare and os.environ.get("OO_BENCH_COMPARE"):
+        if any((BASELINES_DIR / get_machine_id()).glob("*.json")):
+            option.benchmark_compare = True
+        else:
+            print(f"OO_BENCH_COMPARE is set but there is no baseline in {BASELINES_DIR / get_machine_id()}")
+    if option.benchmark_compare and not option.benchmark_compare_fail:
+        option.benchmark_compare_fail = [parse_compare_fail(REGRESSION_LIMIT)]
+
+
+def pytest_generate_tests(metafunc):
+    if "scale" in metafunc.fixturenames:
+        scales = [int(s) for s in metafunc.config.getoption("--bench-scales").split(",")]
+        metafunc.parametrize("scale", [
+            pytest.param(s, id=f"{s}x", marks=[pytest.mark.slow] if s in SLOW_SCALES else [])
+            for s in scales
+        ])
+
+
+@pytest.fixture
+def rounds(scale) -> int:
+    return ROUNDS.get(scale, 1)
+
+
+@pytest.fixture(scope="session")
+def raw_candidates():
+    """Raw candidates for the largest scale; tests slice what they need."""
+    cache = {}
+
+    def get(scale: int) -> list[dict]:
+        if scale not in cache:
+            cache[scale] = synthetic.make_candidates(synthetic.TODAY_VOLUME * scale, seed=scale)
+        return cache[scale]
+
+    return get
+
+
+@pytest.fixture(scope="session")
+def enriched_candidates(raw_candidates):
+    cache = {}
+
+    def get(scale: int) -> list[dict]:
+        if scale not in cache:
+            cache[scale] = synthetic.enrich([dict(c) for c in raw_candidates(scale)], seed=scale)
+        return cache[scale]
+
+    return get
+
+
+@pytest.fixture(scope="session")
+def data_js(tmp_path_factory) -> Path:
+    return synthetic.write_data_js(tmp_path_factory.mktemp("src") / "data.js")
+
+
+@pytest.fixture(scope="session")
+def tests_dir(tmp_path_factory) -> Path:
+    return synthetic.write_tests_dir(tmp_path_factory.mktemp("tests"))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def blob_dir(tmp_path_factory) -> Path:
+    """Payloads stashed by the benchmarks go to a temporary store, not data/blobs."""
+    from blobstore import BLOBS
+
+    BLOBS.root = tmp_path_factory.mktemp("blobs")
+    return BLOBS.root
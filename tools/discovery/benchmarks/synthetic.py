@@ -0,0 +1,178 @@
+"""
+Synthetic discovery data for benchmarks: raw and enriched candidates, a data.js
+and a tests directory, all generated offline from a fixed seed.
+"""
+
+import json
+import random
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from collectors import BaseCollector
+
+
+# Raw candidates in a typical daily run (all collectors, before dedup); scales multiply this
+TODAY_VOLUME = 250
+
+# Share of each source in a typical run
+SOURCE_MIX = {"pubmed": 0.6, "clinicaltrials": 0.2, "fda": 0.12, "news": 0.08}
+
+VENDORS = [
+    "Guardant Health", "Natera", "Exact Sciences", "Grail", "Foundation Medicine", "Tempus",
+    "Caris Life Sciences", "Myriad Genetics", "NeoGenomics", "Biodesix", "Freenome",
+    "Personalis", "Adaptive Biotechnologies", "Burning Rock", "Delfi Diagnostics", "Inivata",
+]
+WORDS = [
+    "ctDNA", "methylation", "fragmentomics", "whole-genome", "tumor-informed", "panel",
+    "liquid", "biopsy", "MRD", "detection", "surveillance", "colorectal", "lung", "breast",
+    "pancreatic", "ovarian", "sequencing", "multi-cancer", "screening", "recurrence",
+    "validation", "cohort", "prospective", "sensitivity", "specificity", "assay",
+]
+CATEGORIES = ["MRD", "ECD", "TRM", "TDS"]
+
+
+class _Ids(BaseCollector):
+    """make_candidate_id without a real collector."""
+
+    async def collect(self) -> list[dict]:
+        return []
+
+
+def _phrase(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def make_candidates(count: int, seed: int = 0, duplicate_rate: float = 0.1) -> list[dict]:
+    """
+    Raw candidates shaped like collector output. About duplicate_rate of them
+    repeat an earlier candidate (same source URL and title), as overlapping
+    searches do.
+    """
+    rng = random.Random(seed)
+    ids = _Ids()
+    sources = list(SOURCE_MIX)
+    weights = list(SOURCE_MIX.values())
+    candidates = []
+    for i in range(count):
+        if candidates and rng.random() < duplicate_rate:
+            candidates.append(dict(rng.choice(candidates)))
+            continue
+        source = rng.choices(sources, weights)[0]
+        vendor = rng.choice(VENDORS)
+        title = f"{vendor.split()[0]} {_phrase(rng, rng.randint(4, 10))} {i}"
+        url = f"https://example.org/{source}/{i}"
+        raw_data = {
+            "abstract": _phrase(rng, rng.randint(60, 180)),
+            "journal": _phrase(rng, 3),
+            "authors": [f"Author {j}" for j in range(rng.randint(2, 8))],
+            "date": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        }
+        candidates.append({
+            "id": ids.make_candidate_id(source, url, title),
+            "source": source,
+            "source_url": url,
+            "discovered_at": "2026-06-01T06:00:00",
+            "title": f"  {title}  " if i % 7 == 0 else title,  # some need canonicalizing
+            "company": vendor,
+            "date": raw_data["date"],
+            "raw_data": raw_data,
+        })
+    return candidates
+
+
+def enrich(candidates: list[dict], seed: int = 0) -> list[dict]:
+    """Attach extraction results the way ClaudeEnricher does, for digest/email benchmarks."""
+    rng = random.Random(seed)
+    for candidate in candidates:
+        new_test = rng.random() < 0.3
+        relevant = new_test or rng.random() < 0.6
+        candidate.update({
+            "is_relevant": relevant,
+            "is_new_test": new_test,
+            "is_new_indication": relevant and not new_test,
+            "confidence": round(rng.uniform(0.3, 0.99), 2),
+            "enrichment_path": "full",
+            "extracted": {
+                "test_name": candidate["title"].split()[0] + " " + _phrase(rng, 2),
+                "company": candidate["company"],
+                "category": rng.choice(CATEGORIES),
+                "is_new_test": new_test,
+                "is_new_indication": relevant and not new_test,
+                "is_relevant": relevant,
+                "confidence": candidate.get("confidence", 0.8),
+                "cancer_types": [rng.choice(WORDS[11:16])],
+                "sensitivity": rng.choice([None, rng.randint(70, 99)]),
+                "specificity": rng.choice([None, rng.randint(80, 99)]),
+                "fda_status": rng.choice(["510(k)", "PMA", "LDT", None]),
+                "summary": _phrase(rng, 25),
+                "indication": _phrase(rng, 4),
+            },
+        })
+    return candidates
+
+
+def write_data_js(path: Path, tests: int = 150, seed: int = 0) -> Path:
+    """A data.js with `tests` test records (name/vendor pairs), for the normalizer."""
+    rng = random.Random(seed)
+    records = [
+        f'  {{ "id": "mrd-{i}", "name": "{_phrase(rng, 2).title()} {i}", "vendor": "{rng.choice(VENDORS)}" }}'
+        for i in range(tests)
+    ]
+    Path(path).write_text("export const mrdTestData = [\n" + ",\n".join(records) + "\n];\n")
+    return Path(path)
+
+
+def write_tests_dir(path: Path, tests: int = 150, seed: int = 0) -> Path:
+    """A src/data/tests-style directory of JSON test records, for the known-test index."""
+    rng = random.Random(seed)
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    by_category = {}
+    for i in range(tests):
+        category = rng.choice(CATEGORIES).lower()
+        by_category.setdefault(category, []).append({
+            "id": f"{category}-{i}",
+            "name": f"{_phrase(rng, 2).title()} {i}",
+            "vendor": rng.choice(VENDORS),
+            "method": _phrase(rng, 8),
+        })
+    for category, records in by_category.items():
+        with open(path / f"{category}.json", "w") as f:
+            json.dump(records, f)
+    return path
+
+
+def efetch_xml(pmids: list[str], seed: int = 0) -> bytes:
+    """A PubMed efetch (retmode=xml) response for the PMIDs: structured abstract, MeSH terms, affiliations."""
+    rng = random.Random(seed)
+    articles = []
+    for pmid in pmids:
+        sections = "".join(
+            f'<AbstractText Label="{label}" NlmCategory="{label}">{escape(_phrase(rng, 40))} '
+            f"<i>{rng.choice(WORDS)}</i> {escape(_phrase(rng, 20))}</AbstractText>"
+            for label in ("BACKGROUND", "METHODS", "RESULTS", "CONCLUSIONS")
+        )
+        authors = "".join(
+            f"<Author><LastName>Author{j}</LastName><ForeName>A</ForeName><AffiliationInfo>"
+            f"<Affiliation>{rng.choice(VENDORS)}, Department {j % 3}, City, Country.</Affiliation>"
+            f"</AffiliationInfo></Author>"
+            for j in range(rng.randint(2, 12))
+        )
+        mesh = "".join(
+            f'<MeshHeading><DescriptorName UI="D{rng.randint(0, 999999):06d}">{rng.choice(WORDS).title()}'
+            f'</DescriptorName><QualifierName UI="Q000000">diagnosis</QualifierName></MeshHeading>'
+            for _ in range(rng.randint(5, 15))
+        )
+        articles.append(
+            f'<PubmedArticle><MedlineCitation Status="MEDLINE"><PMID Version="1">{pmid}</PMID>'
+            f"<Article><ArticleTitle>{escape(_phrase(rng, 12))}</ArticleTitle>"
+            f"<Abstract>{sections}</Abstract><AuthorList>{authors}</AuthorList></Article>"
+            f"<MeshHeadingList>{mesh}</MeshHeadingList></MedlineCitation>"
+            f'<PubmedData><ArticleIdList><ArticleId IdType="pubmed">{pmid}</ArticleId></ArticleIdList>'
+            f"</PubmedData></PubmedArticle>"
+        )
+    return (
+        '<?xml version="1.0" ?>\n<!DOCTYPE PubmedArticleSet PUBLIC "-//NLM//DTD PubMedArticle, 1st January 2025//EN" '
+        '"https://dtd.nlm.nih.gov/ncbi/pubmed/out/pubmed_250101.dtd">\n'
+        f"<PubmedArticleSet>{''.join(articles)}</PubmedArticleSet>"
+    ).encode()
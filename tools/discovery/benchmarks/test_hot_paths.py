@@ -0,0 +1,169 @@
+"""
+Benchmarks for the discovery hot paths that run without network access.
+
+Each benchmark runs at every scale from conftest.SCALES (multiples of
+synthetic.TODAY_VOLUME); conftest.SLOW_SCALES only with -m slow. See the
+README for recording and checking baselines.
+"""
+
+import asyncio
+import random
+from urllib.parse import parse_qs
+
+import httpx
+
+import synthetic
+from blobstore import BlobStore
+from collectors import BaseCollector, PubMedCollector
+from companies import CompanyIndex
+from config import CONFIG
+from enricher import ClaudeEnricher
+from history import CandidateHistory
+from normalizer import Normalizer
+from notifications import format_candidates_email
+from output import OutputHandler
+from known_tests import KnownTestIndex
+
+
+class OfflineClient:
+    """Stands in for the Anthropic client; payload construction never calls it."""
+
+
+# History queries: broad text, text with filters, a phrase, filters only
+SEARCHES = [
+    ("methylation colorectal", {}),
+    ("guardant", {"category": "MRD", "min_confidence": 0.7}),
+    ('"liquid biopsy"', {"source": "fda"}),
+    (None, {"source": "pubmed"}),
+]
+
+
+def test_make_candidate_id(benchmark, scale, rounds, raw_candidates):
+    parts = [(c["source"], c["source_url"], c["title"]) for c in raw_candidates(scale)]
+    make_id = BaseCollector.make_candidate_id
+
+    def run():
+        return [make_id(None, *p) for p in parts]
+
+    ids = benchmark.pedantic(run, rounds=rounds, iterations=1)
+    assert len(ids) == len(parts)
+
+
+def test_normalizer_process(benchmark, scale, rounds, raw_candidates, data_js, tests_dir, tmp_path):
+    candidates = raw_candidates(scale)
+    vendors = [test["vendor"] for test in KnownTestIndex(tests_dir).tests]
+    companies = CompanyIndex(CONFIG["watchlist"]["companies"], vendors)
+    normalizer = Normalizer(data_js, tmp_path / "seen_candidates.json", companies=companies)
+    # A fifth of today's candidates were already seen in earlier runs
+    rng = random.Random(scale)
+    normalizer.seen_candidates = {c["id"]: {} for c in candidates if rng.random() < 0.2}
+
+    def setup():
+        return ([dict(c) for c in candidates],), {}
+
+    new = benchmark.pedantic(normalizer.process, setup=setup, rounds=rounds)
+    assert 0 < len(new) < len(candidates)
+
+
+def test_stash_raw(benchmark, scale, rounds, raw_candidates, tmp_path):
+    """Moving raw_data into an empty blob store, then loading every payload back."""
+    candidates = raw_candidates(scale)
+    stores = iter(range(rounds + 1))
+
+    def setup():
+        return (BlobStore(tmp_path / str(next(stores))), [dict(c) for c in candidates]), {}
+
+    def run(store, copies):
+        for candidate in copies:
+            store.stash(candidate)
+        return [store.raw_data(c) for c in copies]
+
+    payloads = benchmark.pedantic(run, setup=setup, rounds=rounds)
+    assert payloads[0] == candidates[0]["raw_data"]
+
+
+def test_save_candidates(benchmark, scale, rounds, enriched_candidates, tmp_path):
+    candidates = enriched_candidates(scale)
+    output = OutputHandler(tmp_path)
+    runs = iter(range(rounds + 1))
+
+    def setup():
+        # A new run each round; a run's archive skips candidates it already has
+        return (candidates,), {"run_id": f"bench-{next(runs)}"}
+
+    path = benchmark.pedantic(output.save_candidates, setup=setup, rounds=rounds)
+    assert path.stat().st_size > 0
+
+
+def test_generate_digest(benchmark, scale, rounds, enriched_candidates, tmp_path):
+    candidates = enriched_candidates(scale)
+    output = OutputHandler(tmp_path)
+    digest = benchmark.pedantic(output.generate_digest, args=(candidates,), rounds=rounds)
+    assert digest.startswith(f"Found {len(candidates)} candidates")
+
+
+def test_format_candidates_email(benchmark, scale, rounds, enriched_candidates):
+    candidates = enriched_candidates(scale)
+    subject, html = benchmark.pedantic(format_candidates_email, args=(candidates,), rounds=rounds)
+    assert subject and html
+
+
+def test_enricher_payloads(benchmark, scale, rounds, raw_candidates, tests_dir):
+    """Batch planning and prompt rendering for full extraction, with cold caches each round."""
+    candidates = raw_candidates(scale)
+    enricher = ClaudeEnricher(KnownTestIndex(tests_dir), use_triage=False, client=OfflineClient())
+
+    def setup():
+        enricher._payload_cache.clear()
+        enricher._known_tests_cache.clear()
+        return (), {}
+
+    def run():
+        return [enricher._batch_prompt(group)[0] for group in enricher.plan_batches(candidates)]
+
+    prompts = benchmark.pedantic(run, setup=setup, rounds=rounds)
+    assert sum(p.count("### CANDIDATE") for p in prompts) == len(candidates)
+
+
+def test_history_search(benchmark, scale, rounds, enriched_candidates, tmp_path):
+    """Search-history queries over every candidate at the scale (indexing is not timed)."""
+    with CandidateHistory(tmp_path / "history.sqlite3") as history:
+        history.add(enriched_candidates(scale), run_id="bench")
+
+        def run():
+            return [history.search(text, **filters) for text, filters in SEARCHES]
+
+        results = benchmark.pedantic(run, rounds=rounds)
+    assert results[0] and results[-1]
+
+
+def test_pubmed_efetch_details(benchmark, scale, rounds, raw_candidates):
+    """Abstracts for the day's PubMed candidates: efetch batches streamed from a local transport and parsed."""
+    pubmed = [c for c in raw_candidates(scale) if c["source"] == "pubmed"]
+    pmids = [str(30000000 + i) for i in range(len(pubmed))]
+
+    async def chunks(body: bytes):
+        for start in range(0, len(body), 65536):
+            yield body[start:start + 65536]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        ids = parse_qs(request.content.decode())["id"][0].split(",")
+        return httpx.Response(200, content=chunks(synthetic.efetch_xml(ids, seed=len(ids))))
+
+    collector = PubMedCollector([])
+    collector.EFETCH_URL = "http://efetch.local/efetch.fcgi"  # a host without a rate limit: times the parsing
+
+    def setup():
+        copies = [{**c, "raw_data": {"uid": pmid, **c["raw_data"]}} for c, pmid in zip(pubmed, pmids)]
+        return (copies,), {}
+
+    async def fetch(copies):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await collector._add_details(client, copies)
+        return copies
+
+    def run(copies):
+        return asyncio.run(fetch(copies))
+
+    candidates = benchmark.pedantic(run, setup=setup, rounds=rounds)
+    assert all(c["raw_data"]["abstract"] and c["raw_data"]["mesh_terms"] for c in candidates)
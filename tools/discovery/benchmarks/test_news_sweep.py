@@ -0,0 +1,188 @@
+"""
+Newsroom sweep benchmark: NewsCollector against a local stand-in for 1,000 newsrooms.
+
+The stand-in listens on one port on 500 loopback addresses (127.0.x.y), two
+newsrooms per host, and answers after a fixed delay. Most newsrooms advertise
+an RSS or Atom feed, the rest are plain HTML, and one in ten fails. ETags are
+honoured, so the warm sweep (feeds already discovered) sees 304s where nothing
+changed.
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+
+import pytest
+
+from collectors import NewsCollector
+from config import CONFIG
+
+
+SITES = 1000
+SITES_PER_HOST = 2
+LATENCY_S = 0.02
+ROUNDS = 3
+
+# Spacing per host kept small so the benchmark measures the sweep, not the politeness delay
+NEWS_CONFIG = {**CONFIG["news"], "host_delay_s": 0.05}
+
+ANNOUNCEMENT = "{company} announces launch of a new ctDNA assay for minimal residual disease"
+ROUTINE = "{company} reports quarterly results and schedules investor call #{n}"
+
+
+def _host(site: int) -> str:
+    index = site // SITES_PER_HOST
+    return f"127.0.{index // 250}.{index % 250 + 1}"
+
+
+def _kind(site: int) -> str:
+    if site % 10 == 9:
+        return "broken"
+    return ("rss", "atom", "rss", "atom", "rss", "atom", "html", "html", "html")[site % 10]
+
+
+def _rss(site: int) -> str:
+    now = datetime.now().astimezone()
+    items = "".join(
+        f"<item><title>{(ANNOUNCEMENT if n < 2 else ROUTINE).format(company=f'Vendor {site}', n=n)}</title>"
+        f"<link>https://vendor{site}.example/news/{n}</link>"
+        f"<pubDate>{format_datetime(now - timedelta(days=n * 3))}</pubDate>"
+        f"<description>&lt;p&gt;Press release {n} from Vendor {site}.&lt;/p&gt;</description></item>"
+        for n in range(20)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Vendor {site}</title>{items}</channel></rss>'
+
+
+def _atom(site: int) -> str:
+    now = datetime.now().astimezone()
+    entries = "".join(
+        f"<entry><title>{(ANNOUNCEMENT if n < 2 else ROUTINE).format(company=f'Vendor {site}', n=n)}</title>"
+        f'<link rel="alternate" href="https://vendor{site}.example/news/{n}"/>'
+        f"<updated>{(now - timedelta(days=n * 3)).isoformat()}</updated>"
+        f"<summary>Press release {n} from Vendor {site}.</summary></entry>"
+        for n in range(20)
+    )
+    return f'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><title>Vendor {site}</title>{entries}</feed>'
+
+
+def _page(site: int) -> str:
+    feed = ""
+    if _kind(site) in ("rss", "atom"):
+        feed = f'<link rel="alternate" type="application/{_kind(site)}+xml" href="/site{site}/feed.xml">'
+    news = ANNOUNCEMENT if site % 3 == 0 else ROUTINE
+    body = "".join(f"<li><a href='/site{site}/news/{n}'>{news.format(company=f'Vendor {site}', n=n)}</a></li>"
+                   for n in range(200))
+    return f"<html><head><title>Vendor {site} news</title>{feed}</head><body><ul>{body}</ul></body></html>"
+
+
+class NewsroomStandIn:
+    """HTTP/1.1 keep-alive server for the stand-in newsrooms, on its own thread and event loop."""
+
+    def __init__(self, sites: int):
+        self.sites = sites
+        self.documents = {}
+        for site in range(sites):
+            self.documents[f"/site{site}/news"] = ("text/html", _page(site).encode())
+            if _kind(site) == "rss":
+                self.documents[f"/site{site}/feed.xml"] = ("application/rss+xml", _rss(site).encode())
+            elif _kind(site) == "atom":
+                self.documents[f"/site{site}/feed.xml"] = ("application/atom+xml", _atom(site).encode())
+        self.requests = 0
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *exc):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+    def url(self, site: int) -> str:
+        return f"http://{_host(site)}:{self.port}/site{site}/news"
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        hosts = sorted({_host(site) for site in range(self.sites)})
+        probe = self.loop.run_until_complete(asyncio.start_server(self._handle, hosts[0], 0))
+        self.port = probe.sockets[0].getsockname()[1]
+        probe.close()
+        self.loop.run_until_complete(asyncio.start_server(self._handle, hosts, self.port))
+        self._ready.set()
+        self.loop.run_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while request_line := await reader.readline():
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                path = request_line.split()[1].decode()
+                self.requests += 1
+                await asyncio.sleep(LATENCY_S)
+
+                site = int(path.split("/")[1].removeprefix("site"))
+                document = self.documents.get(path)
+                etag = f'"{site}"'
+                if _kind(site) == "broken":
+                    status, content_type, body = "503 Service Unavailable", "text/plain", b"unavailable"
+                elif document is None:
+                    status, content_type, body = "404 Not Found", "text/plain", b"not found"
+                elif headers.get("if-none-match") == etag:
+                    status, content_type, body = "304 Not Modified", document[0], b""
+                else:
+                    status, (content_type, body) = "200 OK", document
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nETag: {etag}\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture(scope="module")
+def newsrooms():
+    with NewsroomStandIn(SITES) as server:
+        yield server
+
+
+def _collector(server: NewsroomStandIn, state_path) -> NewsCollector:
+    companies = [{"name": f"Vendor {site}", "newsroom": server.url(site)} for site in range(server.sites)]
+    return NewsCollector(companies, config=NEWS_CONFIG, state_path=state_path)
+
+
+def test_news_sweep_cold(benchmark, newsrooms, tmp_path):
+    """First sweep: every newsroom page fetched, feeds discovered and read."""
+    state_path = tmp_path / "news_feeds.json"
+
+    def setup():
+        state_path.unlink(missing_ok=True)
+        return (_collector(newsrooms, state_path),), {}
+
+    def run(collector):
+        return asyncio.run(collector.collect())
+
+    candidates = benchmark.pedantic(run, setup=setup, rounds=ROUNDS)
+    assert len({c["company"] for c in candidates}) > SITES // 2
+
+
+def test_news_sweep_warm(benchmark, newsrooms, tmp_path):
+    """Later sweeps: known feeds read directly, unchanged pages answered with 304."""
+    state_path = tmp_path / "news_feeds.json"
+    asyncio.run(_collector(newsrooms, state_path).collect())
+
+    def run(collector):
+        return asyncio.run(collector.collect())
+
+    collector = _collector(newsrooms, state_path)
+    candidates = benchmark.pedantic(run, setup=lambda: ((collector,), {}), rounds=ROUNDS)
+    assert collector.stats["unchanged"] and candidates
@@ -0,0 +1,213 @@
+"""
+Content-addressed store for raw source payloads.
+
+    data/blobs/
+        3f/3f9a...e1.json.gz        # one gzip'd JSON payload, named by its SHA-256
+
+Collected candidates keep only a reference and a small projection of their
+raw_data; stages that need the whole payload (prompt rendering, the linker)
+load it through BLOBS.raw_data(candidate), which reads the blob on first use
+and keeps a few recent ones in memory. A payload collected again the next day
+hashes to the same blob, so run checkpoints, carryover and the archive share
+one stored copy.
+
+    candidate["raw_ref"]     = {"sha256": "3f9a...e1", "bytes": 24310}
+    candidate["raw_summary"] = {"nctId": "NCT0...", "briefTitle": "...", ...}
+
+Payloads under CONFIG["blobs"]["inline_bytes"] stay inline as raw_data.
+
+Blobs are not deleted when the runs that wrote them are pruned. After a prune,
+collect_garbage() marks every blob referenced by the archive, the remaining
+run checkpoints and the carryover file, and deletes the rest that are older
+than CONFIG["blobs"]["gc_grace_hours"] (a run in progress may have stored a
+payload it has not checkpointed yet).
+"""
+
+import gzip
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from pathlib import Path
+
+from config import CONFIG
+
+
+# Fields projected into raw_summary, per source (dotted paths into raw_data)
+SUMMARY_FIELDS = {
+    "fda": [
+        "k_number", "pma_number", "device_name", "trade_name", "generic_name", "applicant",
+        "decision_date", "product_code", "advisory_committee_description",
+    ],
+    "pubmed": ["uid", "title", "fulljournalname", "pubdate", "sortfirstauthor", "lastauthor", "mesh_terms", "abstract"],
+    "clinicaltrials": [
+        "protocolSection.identificationModule.nctId",
+        "protocolSection.identificationModule.briefTitle",
+        "protocolSection.sponsorCollaboratorsModule.leadSponsor.name",
+        "protocolSection.statusModule.overallStatus",
+        "protocolSection.designModule.phases",
+        "protocolSection.conditionsModule.conditions",
+        "protocolSection.descriptionModule.briefSummary",
+    ],
+    "news": ["title", "link", "published", "summary", "html_preview"],
+}
+
+
+# A raw_ref's digest, wherever it is in a JSON or JSONL file
+REF_RE = re.compile(rb'"sha256":\s*"([0-9a-f]{64})"')
+
+
+def _encode(payload) -> bytes:
+    # Key order is kept: prompts show the start of a payload as the source ordered it
+    return json.dumps(payload, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def summarize(source: str, raw_data: dict, max_chars: int = 300) -> dict:
+    """
+    The fields of raw_data listed in SUMMARY_FIELDS for the source (top-level
+    scalars for other sources), keyed by their last path component, with
+    strings cut to max_chars.
+    """
+    if source in SUMMARY_FIELDS:
+        items = []
+        for path in SUMMARY_FIELDS[source]:
+            value = raw_data
+            for key in path.split("."):
+                value = value.get(key) if isinstance(value, dict) else None
+            items.append((path.rsplit(".", 1)[-1], value))
+    else:
+        items = raw_data.items()
+
+    summary = {}
+    for key, value in items:
+        if isinstance(value, list) and all(isinstance(v, (str, int, float)) for v in value):
+            value = ", ".join(str(v) for v in value)
+        if isinstance(value, str):
+            value = value[:max_chars]
+        if value not in (None, "") and isinstance(value, (str, int, float, bool)):
+            summary[key] = value
+    return summary
+
+
+class BlobStore:
+    """Gzip'd JSON payloads under `root`, named by content hash."""
+
+    def __init__(self, root: Path, config: dict | None = None):
+        self.root = Path(root)
+        self.config = config or CONFIG["blobs"]
+        self._cache: OrderedDict[str, dict] = OrderedDict()
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.json.gz"
+
+    def put(self, payload) -> dict:
+        """Store a payload (once per distinct content). Returns its reference."""
+        return self._put(_encode(payload))
+
+    def _put(self, data: bytes) -> dict:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if path.exists():
+            # A fresh mtime keeps the blob from garbage collection until it is checkpointed
+            path.touch()
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(gzip.compress(data, compresslevel=self.config["compress_level"], mtime=0))
+            tmp.replace(path)
+        return {"sha256": digest, "bytes": len(data)}
+
+    def get(self, digest: str) -> dict:
+        """A stored payload; recently read ones are served from memory."""
+        payload = self._cache.get(digest)
+        if payload is not None:
+            self._cache.move_to_end(digest)
+            return payload
+        with open(self.path(digest), "rb") as f:
+            payload = json.loads(gzip.decompress(f.read()))
+        self._cache[digest] = payload
+        if len(self._cache) > self.config["cache_entries"]:
+            self._cache.popitem(last=False)
+        return payload
+
+    def stash(self, candidate: dict) -> dict:
+        """Move a candidate's raw_data into the store, leaving raw_ref and raw_summary. Returns the candidate."""
+        raw_data = candidate.get("raw_data")
+        if raw_data is None:
+            return candidate
+        data = _encode(raw_data)
+        if len(data) <= self.config["inline_bytes"]:
+            return candidate
+        candidate["raw_ref"] = self._put(data)
+        candidate["raw_summary"] = summarize(candidate.get("source", ""), raw_data, self.config["summary_chars"])
+        del candidate["raw_data"]
+        return candidate
+
+    def raw_data(self, candidate: dict) -> dict:
+        """
+        A candidate's full raw_data, loaded from the store if it was stashed.
+
+        Falls back to raw_summary if the blob is gone (e.g. data/blobs was cleared).
+        """
+        if "raw_data" in candidate:
+            return candidate["raw_data"]
+        ref = candidate.get("raw_ref")
+        if ref is None:
+            return {}
+        try:
+            return self.get(ref["sha256"])
+        except FileNotFoundError:
+            return candidate.get("raw_summary", {})
+
+    def sweep(self, referenced: set[str], min_age_seconds: float = 0) -> tuple[int, int]:
+        """Delete blobs not in `referenced` and unchanged for min_age_seconds. Returns (blobs, bytes) deleted."""
+        cutoff = time.time() - min_age_seconds
+        deleted = freed = 0
+        for path in self.root.glob("*/*.json.gz"):
+            digest = path.name.removesuffix(".json.gz")
+            if digest in referenced:
+                continue
+            try:
+                stat = path.stat()
+                if stat.st_mtime > cutoff:
+                    continue
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            self._cache.pop(digest, None)
+            deleted += 1
+            freed += stat.st_size
+        return deleted, freed
+
+
+def referenced_digests(paths: Iterable[Path]) -> set[str]:
+    """Digests of the blobs referenced from the given files (missing files are skipped)."""
+    digests = set()
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                for line in f:
+                    digests.update(digest.decode() for digest in REF_RE.findall(line))
+        except FileNotFoundError:
+            continue
+    return digests
+
+
+def collect_garbage(blobs: "BlobStore | None" = None) -> tuple[int, int]:
+    """Delete blobs nothing references any more. Returns (blobs, bytes) deleted."""
+    blobs = blobs or BLOBS
+    paths = CONFIG["paths"]
+    files = [
+        *Path(paths["archive_dir"]).glob("*/*.jsonl"),
+        *Path(paths["runs_dir"]).glob("*/*.jsonl"),
+        paths["carryover"],
+    ]
+    deleted, freed = blobs.sweep(referenced_digests(files), blobs.config["gc_grace_hours"] * 3600)
+    if deleted:
+        print(f"  Deleted {deleted} unreferenced blobs ({freed / 1e6:.1f} MB)")
+    return deleted, freed
+
+
+BLOBS = BlobStore(CONFIG["paths"]["blob_dir"])
@@ -0,0 +1,115 @@
+"""
+Cascade evaluation: compares cascade enrichment with single-model enrichment on a recorded corpus.
+
+The corpus is an archive partition or run file (or an older candidates_<date>.json).
+Enrichment fields are stripped so both runs start from the same raw candidates.
+"""
+
+import copy
+import json
+from datetime import datetime
+from pathlib import Path
+
+from archive import load_candidates
+from config import CONFIG
+from enricher import ClaudeEnricher
+from linker import KnownTestLinker
+from known_tests import KnownTestIndex
+
+
+# Keys added by enrichment/drafting that must not leak into the replayed corpus
+ENRICHMENT_KEYS = (
+    "extracted", "confidence", "is_relevant", "is_new_test", "is_new_indication",
+    "enrichment_error", "enrichment_path", "triage_relevance", "draft_submission",
+    "linked_tests", "linked_vendors",
+)
+
+
+def load_corpus(path: Path) -> list[dict]:
+    """Load recorded candidates and strip previous enrichment results."""
+    candidates = load_candidates(path)
+    return [{k: v for k, v in c.items() if k not in ENRICHMENT_KEYS} for c in candidates]
+
+
+def outcome_label(candidate: dict) -> str:
+    """Collapse an enrichment result into the decision the digest acts on."""
+    if not candidate.get("extracted"):
+        return "error"
+    if not candidate.get("is_relevant", True):
+        return "not_relevant"
+    if candidate.get("is_new_test"):
+        return "new_test"
+    if candidate.get("is_new_indication"):
+        return "new_indication"
+    return "relevant_other"
+
+
+async def evaluate_cascade(corpus_path: Path, output_dir: Path) -> dict:
+    """Run both configurations over the corpus and report agreement, cost and latency."""
+    corpus = load_corpus(corpus_path)
+    print(f"Loaded {len(corpus)} recorded candidates from {corpus_path}")
+
+    test_index = KnownTestIndex(CONFIG["paths"]["tests_dir"])
+    KnownTestLinker(test_index).tag(corpus, max_chars=CONFIG["linker"]["text_chars"])
+
+    print("\nSingle-model run...")
+    single = ClaudeEnricher(test_index, use_triage=False, route_linked=False)
+    single_results = await single.enrich_batch(copy.deepcopy(corpus))
+
+    print("\nCascade run...")
+    cascade = ClaudeEnricher(test_index, use_triage=True, route_linked=True)
+    cascade_results = await cascade.enrich_batch(copy.deepcopy(corpus))
+
+    confusion: dict[str, dict[str, int]] = {}
+    disagreements = []
+    missed_relevant = 0
+    for base, test in zip(single_results, cascade_results):
+        base_label, test_label = outcome_label(base), outcome_label(test)
+        row = confusion.setdefault(base_label, {})
+        row[test_label] = row.get(test_label, 0) + 1
+        if base_label != test_label:
+            if base_label in ("new_test", "new_indication") and test_label == "not_relevant":
+                missed_relevant += 1
+            disagreements.append({
+                "id": base["id"],
+                "title": base.get("title", ""),
+                "single": base_label,
+                "cascade": test_label,
+                "cascade_path": test.get("enrichment_path"),
+            })
+
+    total = len(corpus)
+    single_cost, cascade_cost = single.usage.total_cost, cascade.usage.total_cost
+    report = {
+        "corpus": str(corpus_path),
+        "evaluated_at": datetime.now().isoformat(),
+        "candidates": total,
+        "agreement_rate": (total - len(disagreements)) / total if total else 1.0,
+        "missed_relevant": missed_relevant,
+        "confusion": confusion,
+        "single": single.usage.report(),
+        "cascade": cascade.usage.report(),
+        "single_cost_usd": single_cost,
+        "cascade_cost_usd": cascade_cost,
+        "cost_savings": 1 - cascade_cost / single_cost if single_cost else 0.0,
+        "disagreements": disagreements,
+    }
+
+    output_path = Path(output_dir) / f"cascade_eval_{datetime.now().strftime('%Y-%m-%d')}.json"
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'='*60}")
+    print("CASCADE EVALUATION")
+    print(f"{'='*60}")
+    print(f"  Agreement: {report['agreement_rate']:.1%} ({len(disagreements)} disagreements)")
+    print(f"  New tests/indications the cascade marked not relevant: {missed_relevant}")
+    print(f"  Cost: single ${single_cost:.4f} vs cascade ${cascade_cost:.4f} ({report['cost_savings']:.0%} saved)")
+    print("  Single-model tiers:")
+    for line in single.usage.summary_lines():
+        print(f"    {line}")
+    print("  Cascade tiers:")
+    for line in cascade.usage.summary_lines():
+        print(f"    {line}")
+    print(f"  Report: {output_path}")
+    return report
@@ -0,0 +1,194 @@
+"""
+Run checkpoints: each stage's output is appended to a per-run directory as it is produced.
+
+    data/runs/<run-id>/
+        state.json        # collectors finished, notification sent, run completed
+        collected.jsonl   # raw candidates, per collector
+        deduped.jsonl     # new candidates, pre-classified (step-by-step runs only)
+        enriched.jsonl    # candidates with their extraction
+        finished.jsonl    # candidates after drafting, as persisted
+
+A resumed run replays collectors that finished and restores enriched/finished
+candidates, so no collection, Claude request or email is repeated. The
+single-step commands (steps.py) read and write the same files.
+"""
+
+import json
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+class RunCheckpoint:
+    """Checkpoint files for one discovery run."""
+
+    def __init__(self, runs_dir: Path, run_id: str | None = None):
+        self.runs_dir = Path(runs_dir)
+        self.run_id = run_id or datetime.now().strftime("%Y-%m-%d_%H%M%S")
+        self.dir = self.runs_dir / self.run_id
+        self.resumed = self.dir.exists()
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+        self.state = self._load_state()
+        self.collected = self._load_jsonl("collected.jsonl")
+        self.deduped = self._load_jsonl("deduped.jsonl")
+        self.enriched = {c["id"]: c for c in self._load_jsonl("enriched.jsonl")}
+        self.finished = {c["id"]: c for c in self._load_jsonl("finished.jsonl")}
+        self._files = {}
+
+    @staticmethod
+    def latest(runs_dir: Path) -> str | None:
+        """ID of the most recent run, if any."""
+        runs = sorted(p.name for p in Path(runs_dir).glob("*") if (p / "state.json").exists())
+        return runs[-1] if runs else None
+
+    @staticmethod
+    def unfinished(runs_dir: Path, sources: list[str] | None, max_age_hours: float) -> str | None:
+        """
+        ID of the most recent full run over the same sources, if it started within
+        max_age_hours and did not complete (a plain retry continues it).
+        """
+        cutoff = datetime.now() - timedelta(hours=max_age_hours)
+        sources = sorted(sources) if sources else None
+        for path in sorted(Path(runs_dir).glob("*/state.json"), reverse=True):
+            try:
+                with open(path, "r") as f:
+                    state = json.load(f)
+                started = datetime.fromisoformat(state["started_at"])
+            except (OSError, ValueError, KeyError):
+                continue
+            if started < cutoff:
+                break
+            # Runs started step by step or by a backfill have no "sources"
+            if "sources" in state and state["sources"] == sources:
+                return None if state.get("completed") else state["run_id"]
+        return None
+
+    @staticmethod
+    def prune(runs_dir: Path, keep: int) -> int:
+        """Delete all but the most recent `keep` run directories. Returns how many were deleted."""
+        runs = sorted(p for p in Path(runs_dir).glob("*") if p.is_dir())
+        pruned = runs[:-keep] if keep else runs
+        for path in pruned:
+            shutil.rmtree(path, ignore_errors=True)
+        return len(pruned)
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.dir / "state.json", "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {
+                "run_id": self.run_id,
+                "started_at": datetime.now().isoformat(),
+                "collectors": [],
+                "notified": False,
+                "completed": False,
+            }
+
+    def _save_state(self):
+        tmp = self.dir / "state.json.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=2)
+        tmp.replace(self.dir / "state.json")
+
+    def _load_jsonl(self, name: str) -> list[dict]:
+        """Records from a checkpoint file; a line cut off by a crash is ignored."""
+        records = []
+        try:
+            with open(self.dir / name, "r") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+        except FileNotFoundError:
+            pass
+        return records
+
+    def _append(self, name: str, record: dict):
+        f = self._files.get(name)
+        if f is None:
+            f = self._files[name] = open(self.dir / name, "a")
+        f.write(json.dumps(record, default=str) + "\n")
+        f.flush()
+
+    # Collection
+
+    def collector_done(self, name: str) -> bool:
+        return name in self.state["collectors"]
+
+    def collected_by(self, name: str) -> list[dict]:
+        """Candidates a finished collector produced, for replay."""
+        return [c["candidate"] for c in self.collected if c["collector"] == name]
+
+    def record_plan(self, plan: dict[str, dict[str, float]]):
+        """The queries the run's collectors were given (scheduler.py), handed out again on resume."""
+        self.state["query_plan"] = plan
+        self._save_state()
+
+    def record_sources(self, sources: list[str] | None):
+        """The collectors a full run was started with (None: all), for resuming a retry."""
+        self.state["sources"] = sorted(sources) if sources else None
+        self._save_state()
+
+    def record_backfill(self, spec: dict):
+        """The range and windows of a backfill run (backfill.py), kept for resuming it."""
+        self.state["backfill"] = spec
+        self._save_state()
+
+    def record_collected(self, name: str, candidates: list[dict], requests: dict[str, int] | None = None):
+        """Write one collector's candidates and request counts per arm, then mark the collector finished."""
+        for candidate in candidates:
+            record = {"collector": name, "candidate": candidate}
+            self._append("collected.jsonl", record)
+            self.collected.append(record)
+        if requests:
+            self.state.setdefault("requests", {})[name] = requests
+        self.state["collectors"].append(name)
+        self._save_state()
+
+    def record_deduped(self, candidates: list[dict]):
+        """Replace the deduplicated candidates (the dedup step can be re-run)."""
+        tmp = self.dir / "deduped.jsonl.tmp"
+        with open(tmp, "w") as f:
+            for candidate in candidates:
+                f.write(json.dumps(candidate, default=str) + "\n")
+        tmp.replace(self.dir / "deduped.jsonl")
+        self.deduped = candidates
+
+    # Enrichment and drafting
+
+    def restore(self, candidate: dict) -> dict:
+        """The furthest-along checkpointed copy of a candidate, or the candidate itself."""
+        restored = self.finished.get(candidate["id"]) or self.enriched.get(candidate["id"])
+        if restored is None:
+            return candidate
+        if restored.pop("draft_deferred", None):
+            # Retried like any other pending draft, and recorded again when finished
+            self.finished.pop(candidate["id"], None)
+        return restored
+
+    def record_enriched(self, candidate: dict):
+        if candidate.get("extracted") and candidate["id"] not in self.enriched:
+            self.enriched[candidate["id"]] = candidate
+            self._append("enriched.jsonl", candidate)
+
+    def record_finished(self, candidate: dict):
+        if candidate["id"] not in self.finished:
+            self.finished[candidate["id"]] = candidate
+            self._append("finished.jsonl", candidate)
+
+    # Run-level steps
+
+    def done(self, step: str) -> bool:
+        return bool(self.state.get(step))
+
+    def mark(self, step: str):
+        self.state[step] = datetime.now().isoformat()
+        self._save_state()
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
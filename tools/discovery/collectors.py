@@ -4,11 +4,53 @@ Source collectors for discovering new tests.
 
 import asyncio
 import hashlib
+import html
+import json
+import re
+import time
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+from xml.etree import ElementTree
 import httpx
 
+from companies import default_index
 from config import CONFIG
+from tracing import trace_event_hooks
+
+
+class RateLimiter:
+    """Spaces out request starts to at most `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next_at = 0.0
+
+    async def wait(self):
+        # Each caller reserves the next free slot, so concurrent callers queue in order
+        now = time.monotonic()
+        at = max(self._next_at, now)
+        self._next_at = at + self.interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+
+# One limiter per API host, shared by every collector instance (daemon runs, backfill windows)
+_RATE_LIMITERS: dict[str, RateLimiter] = {}
+
+
+def rate_limiter(url: str) -> RateLimiter | None:
+    """The shared limiter for the URL's host, if CONFIG["rate_limits"] lists it."""
+    host = urlsplit(url).hostname or ""
+    rate = CONFIG["rate_limits"].get(host)
+    if rate is None:
+        return None
+    if host not in _RATE_LIMITERS:
+        _RATE_LIMITERS[host] = RateLimiter(rate)
+    return _RATE_LIMITERS[host]
 
 
 class BaseCollector(ABC):
@@ -16,6 +58,81 @@ class BaseCollector(ABC):
 
     name: str = "base"
 
+    # Shared connection pool (daemon mode); when None each collect() opens its own
+    client: httpx.AsyncClient | None = None
+
+    # This run's queries, arm -> depth multiplier (see scheduler.py); None runs the first max_arms at depth 1
+    schedule: dict[str, float] | None = None
+    # Most arms queried in one run (None: all)
+    max_arms: int | None = None
+    # Requests made per arm in the current run
+    requests: dict[str, int] = {}
+    # Backfill (see backfill.py): collect this period, every result, instead of the last lookback_days
+    window: tuple[date, date] | None = None
+    # Whether the source can be queried by date; newsrooms only show what is current
+    windowed: bool = True
+
+    def arms(self) -> list[str]:
+        """Queries this collector can make (search terms, newsrooms, endpoints)."""
+        return []
+
+    def start_run(self, schedule: dict[str, float] | None = None):
+        """Set the run's schedule and reset request counts (collectors are reused by the daemon)."""
+        self.schedule = schedule
+        self.requests = {}
+
+    def scheduled(self) -> list[tuple[str, float]]:
+        """(arm, depth) for each arm to query this run, in arms() order."""
+        if self.schedule is None:
+            return [(arm, 1.0) for arm in self.arms()[:self.max_arms]]
+        return [(arm, self.schedule[arm]) for arm in self.arms() if arm in self.schedule]
+
+    def period(self, lookback_days: int) -> tuple[datetime, datetime | None]:
+        """Start and end of the period to collect: the backfill window, or the last lookback_days up to now (None)."""
+        if self.window is not None:
+            start, end = self.window
+            return datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+        return datetime.now() - timedelta(days=lookback_days), None
+
+    def failed(self, what: str, error: Exception):
+        """
+        A query failed. A daily run logs it and carries on with the other
+        queries; a backfill window fails as a whole, so it is collected again
+        when the backfill is resumed.
+        """
+        if self.window is not None:
+            raise error
+        print(f"    {what}: {error}")
+
+    async def api_get(self, client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+        """GET after waiting for the API's shared rate limit (CONFIG["rate_limits"])."""
+        limiter = rate_limiter(url)
+        if limiter is not None:
+            await limiter.wait()
+        return await client.get(url, **kwargs)
+
+    @asynccontextmanager
+    async def api_stream(self, client: httpx.AsyncClient, method: str, url: str, **kwargs):
+        """Like api_get, for any method, with the body left to be read as it arrives (response.aiter_bytes())."""
+        limiter = rate_limiter(url)
+        if limiter is not None:
+            await limiter.wait()
+        async with client.stream(method, url, **kwargs) as response:
+            yield response
+
+    def count_request(self, arm: str):
+        # Replaced rather than updated, so the class-level default is never shared
+        self.requests = {**self.requests, arm: self.requests.get(arm, 0) + 1}
+
+    @asynccontextmanager
+    async def http_client(self, **kwargs):
+        """The shared client if one is set, otherwise a new one closed afterwards."""
+        if self.client is not None:
+            yield self.client
+        else:
+            async with httpx.AsyncClient(event_hooks=trace_event_hooks(), **kwargs) as client:
+                yield client
+
     @abstractmethod
     async def collect(self) -> list[dict]:
         """Collect candidates from the source. Returns list of raw candidates."""
@@ -33,8 +150,9 @@ class BaseCollector(ABC):
         title: str = "",
         company: str = "",
         date: str = "",
+        query: str | None = None,
     ) -> dict:
-        """Create a standardized raw candidate dict."""
+        """Create a standardized raw candidate dict; `query` is the arm that found it."""
         return {
             "id": self.make_candidate_id(self.name, source_url, title),
             "source": self.name,
@@ -43,6 +161,7 @@ class BaseCollector(ABC):
             "title": title,
             "company": company,
             "date": date,
+            "query": query,
             "raw_data": raw_data,
         }
 
@@ -55,29 +174,99 @@ class FDACollector(BaseCollector):
 
     name = "fda"
     BASE_URL = "https://api.fda.gov/device"
+    # Applicant names per query when filtering by applicant, to keep URLs short
+    APPLICANTS_PER_QUERY = 50
+    # openFDA rejects a page whose skip + limit goes past this
+    MAX_RESULTS = 25000
+
+    def __init__(self, applicants: list[str] | None = None):
+        # Applicant names to push down to openFDA (CONFIG["fda"]["applicants"]); None: every applicant
+        self.applicants = applicants
+
+    def arms(self) -> list[str]:
+        return ["510k", "pma"]
 
     async def collect(self) -> list[dict]:
         candidates = []
+        queries = {"510k": self._collect_510k, "pma": self._collect_pma}
 
-        async with httpx.AsyncClient(timeout=30) as client:
-            k_candidates = await self._collect_510k(client)
-            candidates.extend(k_candidates)
-
-            pma_candidates = await self._collect_pma(client)
-            candidates.extend(pma_candidates)
+        async with self.http_client(timeout=30) as client:
+            for arm, depth in self.scheduled():
+                candidates.extend(await queries[arm](client, depth))
 
         return candidates
 
-    async def _collect_510k(self, client: httpx.AsyncClient) -> list[dict]:
+    @staticmethod
+    def _decision_dates(start: datetime, end: datetime | None) -> str:
+        return f'decision_date:[{start.strftime("%Y%m%d")} TO {end.strftime("%Y%m%d") if end else "*"}]'
+
+    def _applicant_filters(self) -> list[str]:
+        """One ' AND (applicant:...)' clause per query to make, or a single empty one when not filtering."""
+        if not self.applicants:
+            return [""]
+        size = self.APPLICANTS_PER_QUERY
+        return [
+            " AND (" + " OR ".join(f'applicant:"{name}"' for name in self.applicants[i:i + size]) + ")"
+            for i in range(0, len(self.applicants), size)
+        ]
+
+    async def _search(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        criteria: str,
+        depth: float,
+        period: tuple[datetime, datetime | None] | None = None,
+    ) -> list[dict]:
+        """
+        Results of an openFDA query over the run's period (or `period`): the first
+        page, or for a backfill window every page. openFDA serves at most 1,000
+        per request and nothing past skip + limit = MAX_RESULTS, so a window with
+        more matches is split in half until each part fits.
+        """
+        start, end = period or self.period(CONFIG["fda"]["lookback_days"])
+        search = f"{self._decision_dates(start, end)} AND {criteria}"
+        limit = 1000 if self.window else min(round(100 * depth), 1000)
+        results = []
+        while True:
+            params = {"search": search, "limit": limit}
+            if results:
+                params["skip"] = len(results)
+            self.count_request(endpoint)
+            response = await self.api_get(client, f"{self.BASE_URL}/{endpoint}.json", params=params)
+            if response.status_code == 404:  # openFDA's answer to "no matches"
+                break
+            if response.status_code != 200:
+                if self.window:
+                    response.raise_for_status()
+                break
+            data = response.json()
+            page = data.get("results", [])
+            results.extend(page)
+            total = data.get("meta", {}).get("results", {}).get("total", 0)
+            if not self.window or not page or len(results) >= total:
+                break
+            days = (end - start).days
+            if total > self.MAX_RESULTS and days > 0:
+                middle = start + timedelta(days=days // 2)
+                print(f"    FDA {endpoint}: {total} results in {start:%Y-%m-%d}..{end:%Y-%m-%d}; splitting the window")
+                return (
+                    await self._search(client, endpoint, criteria, depth, (start, middle))
+                    + await self._search(client, endpoint, criteria, depth, (middle + timedelta(days=1), end))
+                )
+            if len(results) + limit > self.MAX_RESULTS:
+                print(f"    FDA {endpoint}: {total} results on {start:%Y-%m-%d}; "
+                      f"only the first {len(results)} are reachable")
+                break
+        return results
+
+    async def _collect_510k(self, client: httpx.AsyncClient, depth: float = 1.0) -> list[dict]:
         """Collect recent 510(k) clearances."""
         candidates = []
-        lookback = datetime.now() - timedelta(days=CONFIG["fda"]["lookback_days"])
-        date_str = lookback.strftime("%Y%m%d")
 
         # Search for molecular diagnostic / oncology devices
         search_query = (
-            f'decision_date:[{date_str} TO *]'
-            ' AND ('
+            '('
             'statement_or_summary:"cancer"'
             ' OR statement_or_summary:"tumor"'
             ' OR statement_or_summary:"oncology"'
@@ -90,125 +279,180 @@ class FDACollector(BaseCollector):
             ')'
         )
 
-        url = f"{self.BASE_URL}/510k.json"
-        params = {"search": search_query, "limit": 100}
-
         try:
-            response = await client.get(url, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                for result in data.get("results", []):
+            for applicant_filter in self._applicant_filters():
+                for result in await self._search(client, "510k", search_query + applicant_filter, depth):
                     candidate = self.make_raw_candidate(
                         source_url=f"https://www.accessdata.fda.gov/scripts/cdrh/cfdocs/cfpmn/pmn.cfm?ID={result.get('k_number', '')}",
                         raw_data=result,
                         title=result.get("device_name", ""),
                         company=result.get("applicant", ""),
                         date=result.get("decision_date", ""),
+                        query="510k",
                     )
                     candidates.append(candidate)
         except Exception as e:
-            print(f"    FDA 510(k) error: {e}")
+            self.failed("FDA 510(k) error", e)
 
         return candidates
 
-    async def _collect_pma(self, client: httpx.AsyncClient) -> list[dict]:
+    async def _collect_pma(self, client: httpx.AsyncClient, depth: float = 1.0) -> list[dict]:
         """Collect recent PMA approvals."""
         candidates = []
-        lookback = datetime.now() - timedelta(days=CONFIG["fda"]["lookback_days"])
-        date_str = lookback.strftime("%Y%m%d")
-
-        url = f"{self.BASE_URL}/pma.json"
-        params = {
-            "search": f'decision_date:[{date_str} TO *] AND (advisory_committee:"clinical chemistry" OR advisory_committee:"pathology")',
-            "limit": 100,
-        }
+        search_query = '(advisory_committee:"clinical chemistry" OR advisory_committee:"pathology")'
 
         try:
-            response = await client.get(url, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                for result in data.get("results", []):
+            for applicant_filter in self._applicant_filters():
+                for result in await self._search(client, "pma", search_query + applicant_filter, depth):
                     candidate = self.make_raw_candidate(
                         source_url=f"https://www.accessdata.fda.gov/scripts/cdrh/cfdocs/cfpma/pma.cfm?id={result.get('pma_number', '')}",
                         raw_data=result,
                         title=result.get("trade_name", ""),
                         company=result.get("applicant", ""),
                         date=result.get("decision_date", ""),
+                        query="pma",
                     )
                     candidates.append(candidate)
         except Exception as e:
-            print(f"    FDA PMA error: {e}")
+            self.failed("FDA PMA error", e)
 
         return candidates
 
 
+# esummary fields placed ahead of the efetch details in raw_data, so a prompt that
+# cuts raw_data short still shows the abstract; the rest of the summary follows
+PUBMED_HEAD_FIELDS = ("uid", "title", "fulljournalname", "pubdate", "sortfirstauthor")
+MAX_AFFILIATIONS = 10
+
+
+def _element_text(element: ElementTree.Element | None) -> str:
+    """All text inside an element, markup (<i>, <sup>) dropped, whitespace collapsed."""
+    return " ".join("".join(element.itertext()).split()) if element is not None else ""
+
+
+def pubmed_details(article: ElementTree.Element) -> tuple[str, dict]:
+    """PMID and {abstract, mesh_terms, affiliations} of one efetch <PubmedArticle>."""
+    citation = article.find("MedlineCitation")
+    if citation is None:
+        return "", {}
+    sections = []
+    for part in citation.iterfind("Article/Abstract/AbstractText"):
+        text = _element_text(part)
+        label = part.get("Label")
+        if text:
+            sections.append(f"{label}: {text}" if label else text)
+    affiliations = []
+    for affiliation in citation.iterfind("Article/AuthorList/Author/AffiliationInfo/Affiliation"):
+        text = _element_text(affiliation)
+        if text and text not in affiliations:
+            affiliations.append(text)
+    return _element_text(citation.find("PMID")), {
+        "abstract": "\n".join(sections),
+        "mesh_terms": [_element_text(d) for d in citation.iterfind("MeshHeadingList/MeshHeading/DescriptorName")],
+        "affiliations": affiliations[:MAX_AFFILIATIONS],
+    }
+
+
 class PubMedCollector(BaseCollector):
     """
     Collects from PubMed for clinical validation studies.
-    Uses NCBI E-utilities API.
+    Uses NCBI E-utilities API: esearch for PMIDs, esummary for titles and
+    journals, then efetch for abstracts, MeSH terms and affiliations.
     """
 
     name = "pubmed"
     SEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
     FETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+    EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
 
     def __init__(self, search_terms: list[str]):
         self.search_terms = search_terms
 
+    def arms(self) -> list[str]:
+        return list(self.search_terms)
+
     async def collect(self) -> list[dict]:
         candidates = []
-        lookback = datetime.now() - timedelta(days=CONFIG["pubmed"]["lookback_days"])
+        since, until = self.period(CONFIG["pubmed"]["lookback_days"])
 
-        async with httpx.AsyncClient(timeout=30) as client:
-            for term in self.search_terms:
+        async with self.http_client(timeout=30) as client:
+            for term, depth in self.scheduled():
                 try:
-                    articles = await self._search_pubmed(client, term, lookback)
+                    articles = await self._search_pubmed(client, term, since, depth, until)
                     candidates.extend(articles)
-                    await asyncio.sleep(0.4)  # NCBI rate limit
                 except Exception as e:
-                    print(f"    PubMed error for '{term}': {e}")
+                    self.failed(f"PubMed error for '{term}'", e)
+            if CONFIG["pubmed"]["fetch_details"] and candidates:
+                await self._add_details(client, candidates)
 
         return candidates
 
     async def _search_pubmed(
-        self, client: httpx.AsyncClient, term: str, since: datetime
+        self,
+        client: httpx.AsyncClient,
+        term: str,
+        since: datetime,
+        depth: float = 1.0,
+        until: datetime | None = None,
     ) -> list[dict]:
-        """Search PubMed for recent articles."""
+        """Search PubMed for recent articles; a backfill window pages through every match."""
         candidates = []
 
         mindate = since.strftime("%Y/%m/%d")
-        maxdate = datetime.now().strftime("%Y/%m/%d")
+        maxdate = (until or datetime.now()).strftime("%Y/%m/%d")
 
         # Focus on commercial/clinical validation studies
         full_term = f'{term} AND (clinical validation OR commercial OR FDA OR diagnostic accuracy)'
+        page = CONFIG["backfill"]["page_size"] if self.window else max(round(CONFIG["pubmed"]["max_results"] * depth), 1)
+        retstart = 0
+
+        while True:
+            search_params = {
+                "db": "pubmed",
+                "term": f'{full_term} AND ("{mindate}"[Date - Publication] : "{maxdate}"[Date - Publication])',
+                "retmax": page,
+                "retmode": "json",
+                "sort": "date",
+            }
+            if retstart:
+                search_params["retstart"] = retstart
+
+            self.count_request(term)
+            response = await self.api_get(client, self.SEARCH_URL, params=search_params)
+            if response.status_code != 200:
+                if self.window:
+                    response.raise_for_status()
+                return candidates
 
-        search_params = {
-            "db": "pubmed",
-            "term": f'{full_term} AND ("{mindate}"[Date - Publication] : "{maxdate}"[Date - Publication])',
-            "retmax": CONFIG["pubmed"]["max_results"],
-            "retmode": "json",
-            "sort": "date",
-        }
-
-        response = await client.get(self.SEARCH_URL, params=search_params)
-        if response.status_code != 200:
-            return candidates
-
-        search_data = response.json()
-        pmids = search_data.get("esearchresult", {}).get("idlist", [])
+            search_result = response.json().get("esearchresult", {})
+            pmids = search_result.get("idlist", [])
+            if not pmids:
+                return candidates
+            candidates.extend(await self._fetch_summaries(client, term, pmids))
 
-        if not pmids:
-            return candidates
+            retstart += page
+            count = int(search_result.get("count", 0))
+            if not self.window or retstart >= count:
+                return candidates
+            if retstart >= 9999:  # esearch cannot page further
+                print(f"    PubMed '{term}': {count} matches in {self.window[0]}..{self.window[1]}; "
+                      f"only the first {retstart} are reachable, use shorter windows")
+                return candidates
 
-        # Fetch article summaries
+    async def _fetch_summaries(self, client: httpx.AsyncClient, term: str, pmids: list[str]) -> list[dict]:
+        """Article summaries for PMIDs, as candidates."""
+        candidates = []
         fetch_params = {
             "db": "pubmed",
             "id": ",".join(pmids),
             "retmode": "json",
         }
 
-        response = await client.get(self.FETCH_URL, params=fetch_params)
+        self.count_request(term)
+        response = await self.api_get(client, self.FETCH_URL, params=fetch_params)
         if response.status_code != 200:
+            if self.window:
+                response.raise_for_status()
             return candidates
 
         fetch_data = response.json()
@@ -223,82 +467,340 @@ class PubMedCollector(BaseCollector):
                     title=article.get("title", ""),
                     company="",
                     date=article.get("pubdate", ""),
+                    query=term,
                 )
                 candidates.append(candidate)
 
         return candidates
 
+    async def _add_details(self, client: httpx.AsyncClient, candidates: list[dict]):
+        """
+        Add abstract, MeSH terms and affiliations to every candidate's raw_data,
+        from efetch. All terms' PMIDs go in POSTed batches of efetch_batch; the
+        XML is parsed as it arrives and each article dropped once read, so memory
+        stays flat however large the batch. Articles efetch does not return keep
+        their summary only.
+        """
+        by_pmid = {}
+        for candidate in candidates:
+            by_pmid.setdefault(str(candidate["raw_data"].get("uid", "")), []).append(candidate)
+        by_pmid.pop("", None)
+        pmids = list(by_pmid)
+        size = CONFIG["pubmed"]["efetch_batch"]
+        found = 0
+
+        for start in range(0, len(pmids), size):
+            batch = pmids[start:start + size]
+            # Shared by every term, so not counted against any one query's yield
+            try:
+                async with self.api_stream(client, "POST", self.EFETCH_URL, data={
+                    "db": "pubmed",
+                    "id": ",".join(batch),
+                    "retmode": "xml",
+                }) as response:
+                    response.raise_for_status()
+                    parser = ElementTree.XMLPullParser(events=("end",))
+                    async for chunk in response.aiter_bytes():
+                        parser.feed(chunk)
+                        for _, element in parser.read_events():
+                            if element.tag != "PubmedArticle":
+                                continue
+                            pmid, details = pubmed_details(element)
+                            element.clear()
+                            for candidate in by_pmid.get(pmid, ()):
+                                article = candidate["raw_data"]
+                                head = {k: article[k] for k in PUBMED_HEAD_FIELDS if k in article}
+                                candidate["raw_data"] = {**head, **details, **article}
+                                found += 1
+                    parser.close()
+            except Exception as e:
+                self.failed(f"PubMed efetch error for {len(batch)} PMIDs", e)
+        print(f"    pubmed: efetch details for {found} of {len(candidates)} articles")
+
+
+# Newsroom text that suggests a product announcement: one of each list must appear
+LAUNCH_KEYWORDS = [
+    "launch", "introduce", "announce", "now available",
+    "fda clear", "fda approv", "510(k)", "pma approv",
+    "new test", "new assay", "commercial availability",
+]
+TEST_KEYWORDS = [
+    "liquid biopsy", "ctdna", "circulating tumor",
+    "mrd", "minimal residual", "early detection",
+    "cancer screening", "tumor profiling",
+]
+
+FEED_TYPES = ("application/rss+xml", "application/atom+xml", "application/rdf+xml")
+
+_LINK_TAG = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+_ATTRIBUTE = re.compile(r"""([\w-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""")
+_TAG = re.compile(r"<[^>]+>")
+
+
+def _is_announcement(text: str) -> bool:
+    text = text.lower()
+    return any(kw in text for kw in LAUNCH_KEYWORDS) and any(kw in text for kw in TEST_KEYWORDS)
+
+
+def _plain_text(markup: str) -> str:
+    return " ".join(html.unescape(_TAG.sub(" ", markup)).split())
+
+
+def find_feed(page: str, base_url: str) -> str | None:
+    """URL of the first RSS/Atom feed a page advertises (<link rel="alternate" type="application/rss+xml">)."""
+    for tag in _LINK_TAG.findall(page):
+        attributes = {name.lower(): a or b or c for name, a, b, c in _ATTRIBUTE.findall(tag)}
+        if (
+            "alternate" in attributes.get("rel", "").lower().split()
+            and attributes.get("type", "").lower() in FEED_TYPES
+            and attributes.get("href")
+        ):
+            return urljoin(base_url, html.unescape(attributes["href"]))
+    return None
+
+
+def _feed_date(value: str | None) -> datetime | None:
+    """An RSS (RFC 822) or Atom (ISO 8601) date as naive local time."""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+def parse_feed(content: bytes) -> list[dict]:
+    """Items of an RSS 2.0, RSS 1.0 or Atom feed: title, link, published (datetime or None), summary."""
+    items = []
+    for element in ElementTree.fromstring(content).iter():
+        if element.tag.rsplit("}", 1)[-1] not in ("item", "entry"):
+            continue
+        fields = {}
+        for child in element:
+            name = child.tag.rsplit("}", 1)[-1]
+            if name == "link":
+                href = child.get("href")
+                if href is None:
+                    fields.setdefault("link", (child.text or "").strip())
+                elif child.get("rel", "alternate") == "alternate":
+                    fields["link"] = href
+                else:
+                    fields.setdefault("link", href)
+            else:
+                fields.setdefault(name, child.text or "")
+        items.append({
+            "title": _plain_text(fields.get("title", "")),
+            "link": fields.get("link", ""),
+            "published": _feed_date(
+                fields.get("pubDate") or fields.get("published") or fields.get("updated") or fields.get("date")
+            ),
+            "summary": _plain_text(
+                fields.get("description") or fields.get("summary") or fields.get("encoded") or fields.get("content") or ""
+            ),
+        })
+    return items
+
+
+class HostLimiter:
+    """Caps requests in flight overall and per host, and spaces out requests to the same host."""
+
+    def __init__(self, max_concurrency: int, per_host: int, host_delay_s: float):
+        self.total = asyncio.Semaphore(max_concurrency)
+        self.per_host = per_host
+        self.host_delay_s = host_delay_s
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        self._next_at: dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host = urlsplit(url).hostname or ""
+        loop = asyncio.get_running_loop()
+        async with self._hosts.setdefault(host, asyncio.Semaphore(self.per_host)):
+            # Waiting for a host does not hold one of the overall slots
+            delay = self._next_at.get(host, 0) - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with self.total:
+                try:
+                    yield
+                finally:
+                    self._next_at[host] = loop.time() + self.host_delay_s
+
 
 class NewsCollector(BaseCollector):
     """
-    Collects from company newsrooms.
-    Basic scraping - looks for product launch keywords.
+    Collects from company newsrooms (watchlist.csv).
+
+    A newsroom that advertises an RSS/Atom feed is read through the feed, one
+    candidate per announcement; others are scraped as HTML for product launch
+    keywords. Discovered feeds and HTTP validators are kept in
+    data/news_feeds.json, so an unchanged page costs one 304. Newsrooms are
+    fetched concurrently, politely per host (CONFIG["news"]).
     """
 
     name = "news"
+    windowed = False
+    HEADERS = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"}
 
-    def __init__(self, companies: list[dict]):
-        self.companies = [c for c in companies if c.get("newsroom")]
-
-    async def collect(self) -> list[dict]:
-        candidates = []
-
-        async with httpx.AsyncClient(timeout=20, follow_redirects=True) as client:
-            for company in self.companies:
-                try:
-                    news = await self._check_newsroom(client, company)
-                    if news:
-                        candidates.append(news)
-                except Exception as e:
-                    print(f"    News error for {company['name']}: {e}")
+    def __init__(self, companies: list[dict], config: dict | None = None, state_path: Path | None = None):
+        self.companies = [c for c in companies if c.get("newsroom") or c.get("feed")]
+        self.config = config or CONFIG["news"]
+        self.state_path = Path(state_path or CONFIG["paths"]["news_feeds"])
+        self.stats: dict[str, int] = {}
 
-        return candidates
+    def arms(self) -> list[str]:
+        return [company["name"] for company in self.companies]
 
-    async def _check_newsroom(
-        self, client: httpx.AsyncClient, company: dict
-    ) -> dict | None:
-        """Check company newsroom for potential product announcements."""
+    def _load_state(self) -> dict:
         try:
-            response = await client.get(
-                company["newsroom"],
-                headers={"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"},
-            )
-
-            if response.status_code != 200:
-                return None
-
-            text = response.text.lower()
-
-            # Look for product launch indicators
-            launch_keywords = [
-                "launch", "introduce", "announce", "now available",
-                "fda clear", "fda approv", "510(k)", "pma approv",
-                "new test", "new assay", "commercial availability",
-            ]
-
-            # Look for relevant test types
-            test_keywords = [
-                "liquid biopsy", "ctdna", "circulating tumor",
-                "mrd", "minimal residual", "early detection",
-                "cancer screening", "tumor profiling",
-            ]
-
-            has_launch = any(kw in text for kw in launch_keywords)
-            has_test = any(kw in text for kw in test_keywords)
-
-            if has_launch and has_test:
-                return self.make_raw_candidate(
-                    source_url=company["newsroom"],
-                    raw_data={"html_preview": response.text[:3000]},
-                    title=f"Potential announcement - {company['name']}",
-                    company=company["name"],
-                    date=datetime.now().strftime("%Y-%m-%d"),
-                )
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_state(self, state: dict):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2)
+        tmp.replace(self.state_path)
 
+    async def collect(self) -> list[dict]:
+        cfg = self.config
+        scheduled = {arm for arm, _ in self.scheduled()}
+        companies = [c for c in self.companies if c["name"] in scheduled]
+        state = self._load_state()
+        limiter = HostLimiter(cfg["max_concurrency"], cfg["per_host"], cfg["host_delay_s"])
+        self.stats = {"feed": 0, "html": 0, "unchanged": 0, "failed": 0}
+
+        async with self.http_client(
+            timeout=cfg["timeout_s"],
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=cfg["max_concurrency"]),
+        ) as client:
+            found = await asyncio.gather(*(
+                self._check_company(client, limiter, company, state.setdefault(company["name"], {}))
+                for company in companies
+            ))
+        self._save_state(state)
+
+        stats = self.stats
+        print(f"    news: {len(companies)} newsrooms, {stats['feed']} feeds, {stats['html']} pages, "
+              f"{stats['unchanged']} unchanged, {stats['failed']} failed")
+        return [candidate for candidates in found for candidate in candidates]
+
+    async def _get(self, client: httpx.AsyncClient, limiter: HostLimiter, url: str, company: dict, entry: dict):
+        """GET through the host limiter, conditional on the last fetch's validators. None if unchanged."""
+        headers = dict(self.HEADERS)
+        validators = entry.get("validators", {}).get(url, {})
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        self.count_request(company["name"])
+        async with limiter.slot(url):
+            response = await client.get(url, headers=headers)
+        if response.status_code == 304:
+            self.stats["unchanged"] += 1
             return None
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _remember(entry: dict, url: str, response: httpx.Response, found: list[dict]):
+        """
+        Keep a page's validators for the next conditional GET, only when it
+        produced nothing: a page with candidates is fetched in full again, so
+        a run that fails before they are saved does not lose them.
+        """
+        validators = entry.setdefault("validators", {})
+        kept = {
+            key: response.headers[header]
+            for key, header in (("etag", "etag"), ("last_modified", "last-modified"))
+            if header in response.headers
+        }
+        if kept and not found:
+            validators[url] = kept
+        else:
+            validators.pop(url, None)
 
-        except Exception:
-            return None
+    async def _check_company(self, client: httpx.AsyncClient, limiter: HostLimiter, company: dict, entry: dict) -> list[dict]:
+        """A company's announcements: from its feed if it has one, otherwise from its newsroom page."""
+        try:
+            feed = company.get("feed") or entry.get("feed")
+            if feed is None:
+                response = await self._get(client, limiter, company["newsroom"], company, entry)
+                if response is None:
+                    return []
+                checked = entry.get("feed_checked")
+                if not checked or datetime.fromisoformat(checked) < datetime.now() - timedelta(
+                    days=self.config["feed_recheck_days"]
+                ):
+                    feed = entry["feed"] = find_feed(response.text, str(response.url))
+                    entry["feed_checked"] = datetime.now().isoformat(timespec="seconds")
+                if feed is None:
+                    self.stats["html"] += 1
+                    found = self._scan_page(company, response)
+                    self._remember(entry, company["newsroom"], response, found)
+                    return found
+
+            response = await self._get(client, limiter, feed, company, entry)
+            if response is None:
+                return []
+            self.stats["feed"] += 1
+            found = self._read_feed(company, feed, response.content)
+            self._remember(entry, feed, response, found)
+            return found
+        except Exception as e:
+            self.stats["failed"] += 1
+            entry["last_error"] = f"{type(e).__name__}: {e}"
+            # A discovered feed that broke is looked for again on the next run
+            entry.pop("feed", None)
+            entry.pop("feed_checked", None)
+            return []
+
+    def _scan_page(self, company: dict, response: httpx.Response) -> list[dict]:
+        """Newsroom page without a feed: one candidate if it mentions a launch and a test type."""
+        if not _is_announcement(response.text):
+            return []
+        return [self.make_raw_candidate(
+            source_url=company["newsroom"],
+            raw_data={"html_preview": response.text[:3000]},
+            title=f"Potential announcement - {company['name']}",
+            company=company["name"],
+            date=datetime.now().strftime("%Y-%m-%d"),
+            query=company["name"],
+        )]
+
+    def _read_feed(self, company: dict, feed: str, content: bytes) -> list[dict]:
+        """One candidate per recent feed item that mentions a launch and a test type."""
+        lookback = datetime.now() - timedelta(days=self.config["lookback_days"])
+        candidates = []
+        for item in parse_feed(content)[:self.config["max_items_per_feed"]]:
+            if item["published"] is not None and item["published"] < lookback:
+                continue
+            if not _is_announcement(f"{item['title']} {item['summary']}"):
+                continue
+            published = item["published"].strftime("%Y-%m-%d") if item["published"] else ""
+            candidates.append(self.make_raw_candidate(
+                source_url=item["link"] or feed,
+                raw_data={
+                    "feed": feed,
+                    "title": item["title"],
+                    "link": item["link"],
+                    "published": published,
+                    "summary": item["summary"][:3000],
+                },
+                title=item["title"],
+                company=company["name"],
+                date=published,
+                query=company["name"],
+            ))
+        return candidates
 
 
 class ClinicalTrialsCollector(BaseCollector):
@@ -308,57 +810,89 @@ class ClinicalTrialsCollector(BaseCollector):
 
     name = "clinicaltrials"
     BASE_URL = "https://clinicaltrials.gov/api/v2/studies"
+    max_arms = 3  # Limit to avoid too many results
 
     def __init__(self, search_terms: list[str]):
         self.search_terms = search_terms
 
+    def arms(self) -> list[str]:
+        return list(self.search_terms)
+
     async def collect(self) -> list[dict]:
         candidates = []
 
-        async with httpx.AsyncClient(timeout=30) as client:
-            for term in self.search_terms[:3]:  # Limit to avoid too many results
+        async with self.http_client(timeout=30) as client:
+            for term, depth in self.scheduled():
                 try:
-                    studies = await self._search_studies(client, term)
+                    studies = await self._search_studies(client, term, depth)
                     candidates.extend(studies)
-                    await asyncio.sleep(0.5)
                 except Exception as e:
-                    print(f"    ClinicalTrials error for '{term}': {e}")
+                    self.failed(f"ClinicalTrials error for '{term}'", e)
 
         return candidates
 
     async def _search_studies(
-        self, client: httpx.AsyncClient, term: str
+        self, client: httpx.AsyncClient, term: str, depth: float = 1.0
     ) -> list[dict]:
-        """Search for relevant clinical trials."""
+        """
+        Search for relevant clinical trials: the most recently updated, or for
+        a backfill window every study last updated within it.
+        """
         candidates = []
 
         params = {
             "query.term": term,
             "filter.overallStatus": "RECRUITING,ACTIVE_NOT_RECRUITING",
-            "pageSize": 10,
+            "pageSize": max(round(10 * depth), 1),
             "sort": "LastUpdatePostDate:desc",
         }
+        if self.window:
+            start, end = self.window
+            params["filter.advanced"] = f"AREA[LastUpdatePostDate]RANGE[{start.isoformat()},{end.isoformat()}]"
+            params["pageSize"] = CONFIG["backfill"]["page_size"]
 
         try:
-            response = await client.get(self.BASE_URL, params=params)
-            if response.status_code != 200:
-                return candidates
+            while True:
+                self.count_request(term)
+                response = await self.api_get(client, self.BASE_URL, params=params)
+                if response.status_code != 200:
+                    if self.window:
+                        response.raise_for_status()
+                    return candidates
 
-            data = response.json()
-            for study in data.get("studies", []):
-                protocol = study.get("protocolSection", {})
-                ident = protocol.get("identificationModule", {})
-                sponsor = protocol.get("sponsorCollaboratorsModule", {})
+                data = response.json()
+                for study in data.get("studies", []):
+                    protocol = study.get("protocolSection", {})
+                    ident = protocol.get("identificationModule", {})
+                    sponsor = protocol.get("sponsorCollaboratorsModule", {})
 
-                candidate = self.make_raw_candidate(
-                    source_url=f"https://clinicaltrials.gov/study/{ident.get('nctId', '')}",
-                    raw_data=study,
-                    title=ident.get("briefTitle", ""),
-                    company=sponsor.get("leadSponsor", {}).get("name", ""),
-                    date=protocol.get("statusModule", {}).get("lastUpdatePostDateStruct", {}).get("date", ""),
-                )
-                candidates.append(candidate)
+                    candidate = self.make_raw_candidate(
+                        source_url=f"https://clinicaltrials.gov/study/{ident.get('nctId', '')}",
+                        raw_data=study,
+                        title=ident.get("briefTitle", ""),
+                        company=sponsor.get("leadSponsor", {}).get("name", ""),
+                        date=protocol.get("statusModule", {}).get("lastUpdatePostDateStruct", {}).get("date", ""),
+                        query=term,
+                    )
+                    candidates.append(candidate)
+
+                if not self.window or not data.get("nextPageToken"):
+                    return candidates
+                params["pageToken"] = data["nextPageToken"]
         except Exception as e:
-            print(f"    ClinicalTrials API error: {e}")
+            self.failed("ClinicalTrials API error", e)
 
         return candidates
+
+
+def default_collectors() -> list[BaseCollector]:
+    """One collector per source, configured from CONFIG["watchlist"]."""
+    applicants = None
+    if CONFIG["fda"]["applicants"]:
+        applicants = default_index().applicant_terms(CONFIG["fda"]["applicants"])
+    return [
+        FDACollector(applicants),
+        PubMedCollector(CONFIG["watchlist"]["search_terms"]),
+        NewsCollector(CONFIG["watchlist"]["companies"]),
+        ClinicalTrialsCollector(CONFIG["watchlist"]["search_terms"]),
+    ]
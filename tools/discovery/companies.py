@@ -0,0 +1,136 @@
+"""
+Company canonicalization: one name per company, whatever a source calls it.
+
+openFDA reports the legal applicant ("GUARDANT HEALTH, INC."), ClinicalTrials.gov
+the sponsor, the watchlist and OpenOnco their own spelling ("GRAIL" / "Grail",
+"Tempus AI" / "Tempus"). The index maps every known spelling to one canonical
+name by an exact lookup on a normalized key: lowercase, punctuation dropped,
+legal suffixes (Inc., LLC, Corp., ...) removed. Keys come from
+  - watchlist.csv: name, ticker and the optional `aliases` column
+    (";"-separated, e.g. legal names used in FDA filings);
+  - the vendors of src/data/tests/*.json, each company in a vendor string
+    ("Labcorp (Invitae)") on its own.
+A watchlist company's canonical name is its watchlist name; any other vendor's
+is its OpenOnco spelling. Names the index does not know are left as they are.
+"""
+
+import re
+from collections.abc import Iterable
+
+from config import CONFIG
+
+
+KEY_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Legal forms dropped from the end of a name ("Exact Sciences Corporation")
+LEGAL_SUFFIX_TOKENS = {
+    "inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation", "co", "company",
+    "plc", "gmbh", "ag", "sa", "bv", "nv", "lp", "llp",
+}
+
+# Brand suffixes that may or may not be part of a name ("Tempus AI", "Burning Rock Dx")
+BRAND_SUFFIX_TOKENS = {"ai", "dx"}
+
+
+def company_key(name: str) -> str:
+    """Normalized lookup key for a company name ("GUARDANT HEALTH, INC." -> "guardant health")."""
+    tokens = KEY_TOKEN_RE.findall((name or "").lower().replace("&", " and "))
+    if tokens[:1] == ["the"]:
+        tokens = tokens[1:]
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIX_TOKENS:
+        tokens = tokens[:-1]
+    return " ".join(tokens)
+
+
+def _keys(name: str) -> list[str]:
+    """The name's key, then the key without a brand suffix."""
+    key = company_key(name)
+    if not key:
+        return []
+    keys = [key]
+    tokens = key.split()
+    if len(tokens) > 1 and tokens[-1] in BRAND_SUFFIX_TOKENS:
+        keys.append(" ".join(tokens[:-1]))
+    return keys
+
+
+def vendor_companies(vendor: str) -> list[str]:
+    """Company names inside an OpenOnco vendor string ("Agilent / Resolution Bioscience" -> both)."""
+    # Lowercase fragments ("commercialized by Abbott", "brbiotech") are notes, not names
+    parts = [part.strip() for part in re.split(r"[()/,]", vendor or "")]
+    return [part for part in parts if part and part[0].isupper()]
+
+
+class CompanyIndex:
+    """Exact lookup from legal names, tickers and aliases to canonical company names."""
+
+    def __init__(self, companies: list[dict], vendors: Iterable[str] = ()):
+        self._canonical: dict[str, str] = {}
+        # canonical name -> the names it is known by (for openFDA applicant filters)
+        self.names: dict[str, list[str]] = {}
+        self.watchlist: set[str] = set()
+        for company in companies:
+            aliases = [a.strip() for a in (company.get("aliases") or "").split(";") if a.strip()]
+            self._add(company["name"], company["name"])
+            for alias in aliases:
+                self._add(alias, company["name"])
+            self.watchlist.add(company["name"])
+        # Tickers after every name, so a ticker never takes over another company's name
+        for company in companies:
+            if company.get("ticker"):
+                self._canonical.setdefault(company["ticker"].lower(), company["name"])
+        for vendor in vendors:
+            for name in [vendor, *vendor_companies(vendor)]:
+                self._add(name, self.canonical(name) or name)
+
+    def _add(self, name: str, canonical: str):
+        keys = _keys(name)
+        if not keys:
+            return
+        for key in keys:
+            self._canonical.setdefault(key, canonical)
+        known = self.names.setdefault(canonical, [])
+        if name not in known:
+            known.append(name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def canonical(self, name: str) -> str | None:
+        """Canonical name for a company string, or None if the index does not know it."""
+        for key in _keys(name):
+            if key in self._canonical:
+                return self._canonical[key]
+        return None
+
+    def canonicalize(self, name: str) -> str:
+        """Canonical name if known, else the name unchanged."""
+        return self.canonical(name) or name
+
+    def applicant_terms(self, scope: str) -> list[str]:
+        """
+        Distinct name phrases for an openFDA applicant filter: every spelling of
+        the watchlist companies ("watchlist"), or of every known company ("known").
+        """
+        terms = []
+        for canonical, names in self.names.items():
+            if scope == "watchlist" and canonical not in self.watchlist:
+                continue
+            for name in names:
+                # Vendor strings with several companies are covered by their parts
+                if len(vendor_companies(name)) > 1:
+                    continue
+                for key in _keys(name):
+                    if key not in terms:
+                        terms.append(key)
+        # "tempus" already matches every applicant "tempus ai" would
+        return [t for t in terms if not any(t.startswith(other + " ") for other in terms)]
+
+
+def default_index(tests: list[dict] | None = None) -> CompanyIndex:
+    """Index over the watchlist and the vendors of `tests` (default: src/data/tests/*.json)."""
+    if tests is None:
+        from known_tests import KnownTestIndex
+
+        tests = KnownTestIndex(CONFIG["paths"]["tests_dir"]).tests
+    return CompanyIndex(CONFIG["watchlist"]["companies"], (test["vendor"] for test in tests))
@@ -2,6 +2,7 @@
 Configuration for OpenOnco Discovery Agent
 """
 
+import csv
 import os
 from pathlib import Path
 
@@ -9,39 +10,48 @@ from pathlib import Path
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "data"
 PROJECT_ROOT = BASE_DIR.parent.parent  # /V0
+WATCHLIST_PATH = Path(os.environ.get("OO_WATCHLIST", BASE_DIR / "watchlist.csv"))
+
+
+def load_companies(path: Path) -> list[dict]:
+    """Watchlist companies from a CSV file (name, ticker, newsroom, feed, aliases); empty cells become None."""
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    except FileNotFoundError:
+        return []
+    return [
+        {key: (value or "").strip() or None for key, value in row.items()}
+        for row in rows
+        if (row.get("name") or "").strip()
+    ]
+
 
 CONFIG = {
     # File paths
     "paths": {
         "data_js": PROJECT_ROOT / "src" / "data.js",
+        "tests_dir": PROJECT_ROOT / "src" / "data" / "tests",
         "seen_candidates": DATA_DIR / "seen_candidates.json",
+        "llm_ledger": DATA_DIR / "llm_ledger.json",
+        "carryover": DATA_DIR / "carryover_candidates.json",
+        "runs_dir": DATA_DIR / "runs",
+        "daemon_state": DATA_DIR / "daemon_state.json",
+        "query_yield": DATA_DIR / "query_yield.json",
+        "outbox": DATA_DIR / "notification_outbox.json",
         "output_dir": DATA_DIR / "candidates",
+        "archive_dir": DATA_DIR / "archive",
+        "blob_dir": DATA_DIR / "blobs",
+        "history": DATA_DIR / "history.sqlite3",
+        "watchlist": WATCHLIST_PATH,
+        "news_feeds": DATA_DIR / "news_feeds.json",
     },
 
     # Companies to monitor
     "watchlist": {
-        "companies": [
-            {"name": "Guardant Health", "ticker": "GH", "newsroom": "https://guardanthealth.com/news/"},
-            {"name": "Natera", "ticker": "NTRA", "newsroom": "https://www.natera.com/company/news/"},
-            {"name": "Exact Sciences", "ticker": "EXAS", "newsroom": "https://www.exactsciences.com/newsroom"},
-            {"name": "Grail", "ticker": "GRAL", "newsroom": "https://grail.com/press-releases/"},
-            {"name": "Foundation Medicine", "ticker": None, "newsroom": "https://www.foundationmedicine.com/press-releases"},
-            {"name": "Tempus", "ticker": "TEM", "newsroom": "https://www.tempus.com/news/"},
-            {"name": "Caris Life Sciences", "ticker": None, "newsroom": "https://www.carislifesciences.com/news/"},
-            {"name": "Myriad Genetics", "ticker": "MYGN", "newsroom": "https://myriad.com/news-events/"},
-            {"name": "NeoGenomics", "ticker": "NEO", "newsroom": "https://neogenomics.com/news"},
-            {"name": "Biodesix", "ticker": "BDSX", "newsroom": "https://www.biodesix.com/news/"},
-            {"name": "Freenome", "ticker": None, "newsroom": "https://www.freenome.com/news/"},
-            {"name": "Illumina", "ticker": "ILMN", "newsroom": "https://www.illumina.com/company/news-center.html"},
-            {"name": "Roche", "ticker": "RHHBY", "newsroom": "https://www.roche.com/media/"},
-            {"name": "Resolution Bioscience", "ticker": None, "newsroom": "https://resolution.bio/news/"},
-            {"name": "Personalis", "ticker": "PSNL", "newsroom": "https://www.personalis.com/news/"},
-            {"name": "Biocept", "ticker": "BIOC", "newsroom": "https://biocept.com/news/"},
-            {"name": "Adaptive Biotechnologies", "ticker": "ADPT", "newsroom": "https://www.adaptivebiotech.com/news-events/"},
-            {"name": "Invitae", "ticker": "NVTA", "newsroom": "https://www.invitae.com/en/press"},
-            {"name": "Helio Health", "ticker": None, "newsroom": "https://www.helio.health/news/"},
-            {"name": "Burning Rock", "ticker": "BNR", "newsroom": "https://www.brbiotech.com/news/"},
-        ],
+        # One row per company: name, ticker, newsroom URL, feed URL (optional; found on the newsroom page
+        # otherwise), aliases (optional, ";"-separated other names, e.g. legal names in FDA filings)
+        "companies": load_companies(WATCHLIST_PATH),
         "search_terms": [
             "liquid biopsy cancer detection",
             "ctDNA cancer test",
@@ -64,18 +74,175 @@ CONFIG = {
             "LXN",  # Circulating tumor cell test
         ],
         "lookback_days": 30,
+        # Applicant filter pushed down to openFDA (companies.py): None queries every applicant,
+        # "watchlist" only watchlist companies (names and aliases), "known" also every OpenOnco vendor
+        "applicants": None,
+    },
+
+    # Requests per second per API host, shared by every collector (and backfill window)
+    "rate_limits": {
+        "api.fda.gov": 4.0,                 # openFDA: 240/minute without an API key
+        "eutils.ncbi.nlm.nih.gov": 2.5,     # NCBI: 3/second without an API key
+        "clinicaltrials.gov": 2.0,
+    },
+
+    # Historical backfill (python main.py backfill --from --to; see backfill.py)
+    "backfill": {
+        "window_days": 7,               # Each source collects the range in windows this long
+        "max_concurrency": 4,           # Windows collected at once
+        "page_size": 200,               # PubMed / ClinicalTrials.gov results per request
+    },
+
+    # Company newsrooms (see collectors.NewsCollector)
+    "news": {
+        "lookback_days": 30,            # Feed items older than this are ignored
+        "max_items_per_feed": 30,
+        "max_concurrency": 20,          # Newsrooms fetched at once
+        "per_host": 1,                  # Requests at once to one host
+        "host_delay_s": 1.0,            # Gap between requests to one host
+        "timeout_s": 20,
+        "feed_recheck_days": 7,         # Look for a feed again on newsrooms that had none
     },
 
     # PubMed settings
     "pubmed": {
         "lookback_days": 30,
         "max_results": 50,
+        # Abstracts, MeSH terms and affiliations from efetch, PMIDs POSTed this many at a time
+        "fetch_details": True,
+        "efetch_batch": 200,
     },
 
     # Claude settings
     "claude": {
         "model": "claude-sonnet-4-20250514",
         "max_tokens": 4000,
+        "known_tests_k": 8,  # Nearest existing tests shown per candidate
+
+        # Model cascade: a small model triages first; only candidates scoring at or
+        # above escalation_threshold reach the main model above
+        "triage": {
+            "enabled": True,
+            "model": "claude-3-5-haiku-20241022",
+            "escalation_threshold": 0.35,
+            "max_candidates": 25,
+            "output_tokens_per_candidate": 80,
+            "max_output_tokens": 2500,
+            "raw_data_chars": 800,
+        },
+
+        # USD per million tokens, for run cost reports
+        "pricing": {
+            "claude-sonnet-4-20250514": {"input": 3.00, "output": 15.00},
+            "claude-3-5-haiku-20241022": {"input": 0.80, "output": 4.00},
+        },
+
+        # Budget governor (see governor.py). Budgets are per calendar day across runs;
+        # candidates that do not fit are carried over to the next run
+        "governor": {
+            "enabled": True,
+            "daily_token_budget": 2_000_000,
+            "daily_cost_budget_usd": 10.00,
+            "max_concurrency": 4,           # Claude requests in flight at once
+            "max_run_seconds": 1800,        # No new requests after this; None for no limit
+        },
+
+        # Draft submissions: "hybrid" fills from the extraction with rules and asks
+        # Claude only for missing required fields; "llm" drafts the whole object
+        "draft": {
+            "mode": "hybrid",
+            "max_tokens": 3000,
+            "gap_tokens_per_field": 60,
+        },
+
+        # Single-call extraction + draft for candidates that nearly always get drafted:
+        # FDA clearances/approvals, watchlist-company news, and items triage scores
+        # at or above triage_threshold. Only used when drafting is on.
+        "combined": {
+            "enabled": True,
+            "sources": ["fda"],
+            "watchlist_sources": ["news"],
+            "triage_threshold": 0.85,
+            "max_tokens": 5000,
+            "raw_data_chars": 6000,
+        },
+
+        # Batched extraction: several candidates classified per request
+        "batch": {
+            "enabled": True,
+            "max_candidates": 10,               # Upper bound on candidates per request
+            "input_token_budget": 12000,        # Approx. tokens of candidate data per request
+            "output_tokens_per_candidate": 500,
+            "max_output_tokens": 8000,          # Caps N via output_tokens_per_candidate
+            "raw_data_chars": 3000,             # Per-candidate raw_data truncation in batches
+        },
+    },
+
+    # Known-test linking before enrichment (see linker.py)
+    "linker": {
+        "enabled": True,
+        "route_to_indication": True,       # Linked candidates use the cheaper new-indication prompt
+        "text_chars": 4000,                # Candidate text scanned for mentions
+        "raw_data_chars": 1500,            # Per-candidate raw_data in indication batches
+        "output_tokens_per_candidate": 250,
+    },
+
+    # Streaming pipeline (see pipeline.py)
+    "pipeline": {
+        "queue_size": 100,              # Max candidates waiting between two stages
+        "enrich_chunk": 25,             # Candidates per enrichment micro-batch
+        "enrich_wait_seconds": 1.0,     # Max wait to fill a micro-batch before sending it
+        "enrich_workers": 2,            # Micro-batches in flight at once
+        "draft_workers": 4,
+        "keep_runs": 14,                # Run checkpoint directories kept in data/runs
+        "resume_within_hours": 24,      # `run` continues an incomplete run this recent (0: never)
+    },
+
+    # Raw payload store (see blobstore.py)
+    "blobs": {
+        "inline_bytes": 1024,           # Smaller raw_data stays on the candidate
+        "compress_level": 1,            # gzip level; 1 is ~2x faster to write than 6, ~25% larger
+        "summary_chars": 300,           # Per-field cap in raw_summary
+        "cache_entries": 64,            # Payloads kept in memory after loading
+        "gc_grace_hours": 24,           # Unreferenced blobs younger than this survive garbage collection
+    },
+
+    # Search history (see history.py); runs index their archived candidates
+    "history": {
+        "enabled": True,
+        "search_limit": 20,             # Default number of results for main.py search
+    },
+
+    # Query scheduling by yield (see scheduler.py)
+    "scheduler": {
+        "enabled": True,
+        "sources": ["pubmed", "clinicaltrials", "news"],   # FDA is always queried in full
+        "min_share": 0.25,              # Exploration floor: every arm runs on >= 1 in 4 runs
+        "decay": 0.9,                   # Weight of an arm's past yield each time it is queried again
+        "prior_relevant": 1.0,          # Prior of 1 relevant per 2 requests, so new arms get tried
+        "prior_requests": 2.0,
+        "depth_range": [0.5, 2.0],      # retmax / pageSize multiplier for less / more productive arms
+        "interval_range": [0.5, 2.0],   # Daemon interval multiplier per source
+    },
+
+    # Daemon mode (python main.py daemon): seconds between runs per source
+    "daemon": {
+        "intervals": {
+            "fda": 3600,
+            "news": 6 * 3600,
+            "clinicaltrials": 24 * 3600,
+            "pubmed": 24 * 3600,
+        },
+        "host": "127.0.0.1",            # /health and /metrics
+        "port": 8765,
+        "max_connections": 20,          # Shared HTTP pool across collectors
+        "max_keepalive_connections": 10,
+    },
+
+    # Prometheus textfile-collector export (see metrics.py); None to disable.
+    # Point it into node_exporter's --collector.textfile.directory
+    "metrics": {
+        "textfile": os.environ.get("OO_PROM_TEXTFILE"),
     },
 
     # Email notification settings (uses Resend, same as main app)
@@ -85,9 +252,21 @@ CONFIG = {
         "from": "OpenOnco Discovery <noreply@openonco.org>",
         "subject_prefix": "[OpenOnco]",
         "resend_api_key": os.environ.get("RESEND_API_KEY"),
+        # Point at a local stand-in (python outbox.py serve) to test without Resend
+        "endpoint": os.environ.get("OO_EMAIL_ENDPOINT", "https://api.resend.com/emails"),
         
         # Only email if we have high-confidence candidates
         "min_confidence_to_notify": 0.7,
+
+        # Notification outbox (see outbox.py): runs enqueue candidates, and one email
+        # goes out per digest window
+        "outbox": {
+            "window_minutes": 0,        # 0: an email per run; e.g. 1440 groups a day's runs into one
+            "send_attempts": 3,         # Tries per flush (backoff 2s, 4s, ...)
+            "retry_seconds": 300,       # Wait before the next flush retries; doubles each time
+            "max_attempts": 12,         # Then the message is marked failed
+            "keep_days": 30,            # Sent and failed messages kept for inspection
+        },
     },
 
     # OpenOnco categories for classification
@@ -101,9 +280,79 @@ CONFIG = {
 
 
 def ensure_dirs():
-    """Create necessary directories."""
+    """Create the data directories. Called by commands that write; importing config has no side effects."""
     DATA_DIR.mkdir(exist_ok=True)
     CONFIG["paths"]["output_dir"].mkdir(exist_ok=True)
+    CONFIG["paths"]["runs_dir"].mkdir(exist_ok=True)
+
+
+def validate_config(config: dict = CONFIG) -> list[str]:
+    """Problems that would make a run fail part-way. Checks values only; touches nothing on disk."""
+    problems = []
+    claude = config["claude"]
 
+    def positive(section: str, values: dict, keys: list[str]):
+        for key in keys:
+            value = values.get(key)
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+                problems.append(f"{section}.{key} must be a positive number (got {value!r})")
 
-ensure_dirs()
+    for model in {claude["model"], claude["triage"]["model"]}:
+        if model not in claude["pricing"]:
+            problems.append(f"claude.pricing has no entry for {model}")
+    if claude["draft"]["mode"] not in ("hybrid", "llm"):
+        problems.append(f"claude.draft.mode must be 'hybrid' or 'llm' (got {claude['draft']['mode']!r})")
+    if not 0 <= claude["triage"]["escalation_threshold"] <= 1:
+        problems.append("claude.triage.escalation_threshold must be between 0 and 1")
+    positive("claude.batch", claude["batch"], ["max_candidates", "input_token_budget", "max_output_tokens"])
+    positive("claude.governor", claude["governor"], ["daily_token_budget", "daily_cost_budget_usd", "max_concurrency"])
+    positive("pipeline", config["pipeline"], [
+        "queue_size", "enrich_chunk", "enrich_wait_seconds", "enrich_workers", "draft_workers", "keep_runs",
+    ])
+    positive("daemon.intervals", config["daemon"]["intervals"], list(config["daemon"]["intervals"]))
+    if not config["watchlist"]["search_terms"]:
+        problems.append("watchlist.search_terms is empty")
+    if not config["watchlist"]["companies"]:
+        problems.append(f"watchlist has no companies (is {config['paths']['watchlist']} missing?)")
+    names = set()
+    for company in config["watchlist"]["companies"]:
+        if company["name"].lower() in names:
+            problems.append(f"watchlist lists {company['name']} twice")
+        names.add(company["name"].lower())
+        for key in ("newsroom", "feed"):
+            if company.get(key) and not company[key].startswith(("http://", "https://")):
+                problems.append(f"watchlist: {company['name']} {key} must be an http(s) URL (got {company[key]!r})")
+    if config["fda"]["applicants"] not in (None, "watchlist", "known"):
+        problems.append(f"fda.applicants must be None, 'watchlist' or 'known' (got {config['fda']['applicants']!r})")
+    positive("pubmed", config["pubmed"], ["lookback_days", "max_results", "efetch_batch"])
+    positive("rate_limits", config["rate_limits"], list(config["rate_limits"]))
+    positive("backfill", config["backfill"], ["window_days", "max_concurrency", "page_size"])
+    positive("news", config["news"], ["max_items_per_feed", "max_concurrency", "per_host", "timeout_s", "feed_recheck_days"])
+    if config["news"]["host_delay_s"] < 0:
+        problems.append("news.host_delay_s must be 0 or more")
+    if config["email"]["enabled"] and not config["email"]["to"]:
+        problems.append("email.to is empty while email is enabled")
+    if not 0 <= config["email"]["min_confidence_to_notify"] <= 1:
+        problems.append("email.min_confidence_to_notify must be between 0 and 1")
+    if not str(config["email"]["endpoint"]).startswith(("http://", "https://")):
+        problems.append(f"email.endpoint must be an http(s) URL (got {config['email']['endpoint']!r})")
+    if config["email"]["outbox"]["window_minutes"] < 0:
+        problems.append("email.outbox.window_minutes must be 0 or more")
+    if config["blobs"]["inline_bytes"] < 0:
+        problems.append("blobs.inline_bytes must be 0 or more")
+    if not 1 <= config["blobs"]["compress_level"] <= 9:
+        problems.append("blobs.compress_level must be between 1 and 9")
+    positive("blobs", config["blobs"], ["summary_chars", "cache_entries", "gc_grace_hours"])
+    positive("history", config["history"], ["search_limit"])
+    scheduler = config["scheduler"]
+    positive("scheduler", scheduler, ["prior_relevant", "prior_requests"])
+    if not 0 < scheduler["min_share"] <= 1:
+        problems.append("scheduler.min_share must be above 0 and at most 1")
+    if not 0 < scheduler["decay"] <= 1:
+        problems.append("scheduler.decay must be above 0 and at most 1")
+    for key in ("depth_range", "interval_range"):
+        low, high = scheduler[key]
+        if not 0 < low <= 1 <= high:
+            problems.append(f"scheduler.{key} must be [low, high] with 0 < low <= 1 <= high")
+    positive("email.outbox", config["email"]["outbox"], ["send_attempts", "retry_seconds", "max_attempts", "keep_days"])
+    return problems
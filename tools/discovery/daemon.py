@@ -0,0 +1,197 @@
+"""
+Daemon mode: one long-running process with a schedule per source.
+
+Indexes, HTTP connection pools and the Anthropic client are built once and
+reused by every run. Each source has its own interval (CONFIG["daemon"]),
+shortened or stretched by how productive its queries have been (scheduler.py);
+when sources fall due together they share one run. Between runs the daemon
+also wakes to send notifications whose digest window has closed (outbox.py).
+A small HTTP server on localhost serves /health and /metrics as JSON.
+"""
+
+import asyncio
+import json
+import signal
+import time
+from datetime import datetime
+
+import httpx
+from anthropic import Anthropic
+
+from config import CONFIG
+from notifications import email_configured, flush_outbox, open_outbox
+from runner import Resources, run_discovery
+from scheduler import QueryScheduler
+from tracing import trace_event_hooks
+
+
+class DiscoveryDaemon:
+    """Runs discovery for each source when its interval has elapsed."""
+
+    def __init__(self, skip_enrichment: bool = False, skip_email: bool = False, skip_drafts: bool = False):
+        self.config = CONFIG["daemon"]
+        self.intervals = self.config["intervals"]
+        self.state_path = CONFIG["paths"]["daemon_state"]
+        # Without email (or a way to send it) queued notifications are left alone
+        self.watch_outbox = not skip_email and email_configured()
+        self.run_options = {
+            "skip_enrichment": skip_enrichment,
+            "skip_email": skip_email,
+            "skip_drafts": skip_drafts,
+        }
+        self.started_at = time.time()
+        self.stopping = asyncio.Event()
+        self.running: list[str] = []
+        self.runs = 0
+        self.failed_runs = 0
+        self.sources = self._load_state()
+
+    def _load_state(self) -> dict:
+        """Per-source status; last run times survive restarts so sources are not re-run early."""
+        try:
+            with open(self.state_path, "r") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            saved = {}
+        return {
+            name: {
+                "interval_s": self._interval(name),
+                "last_run": saved.get(name, {}).get("last_run"),
+                "last_duration_s": saved.get(name, {}).get("last_duration_s"),
+                "last_candidates": saved.get(name, {}).get("last_candidates", 0),
+                "last_error": saved.get(name, {}).get("last_error"),
+                "runs": saved.get(name, {}).get("runs", 0),
+            }
+            for name in self.intervals
+        }
+
+    def _interval(self, name: str) -> float:
+        """The configured interval scaled by the source's yield so far (read fresh: runs update it)."""
+        scheduler = QueryScheduler(CONFIG["paths"]["query_yield"], CONFIG["scheduler"])
+        return round(scheduler.interval(name, self.intervals[name]))
+
+    def _save_state(self):
+        with open(self.state_path, "w") as f:
+            json.dump(self.sources, f, indent=2)
+
+    def next_due(self, name: str) -> float:
+        source = self.sources[name]
+        return (source["last_run"] or 0) + source["interval_s"]
+
+    def due(self, now: float) -> list[str]:
+        return [name for name in self.sources if self.next_due(name) <= now]
+
+    async def run_once(self, resources: Resources, names: list[str]):
+        """One discovery run over the given sources; failures are recorded, not raised."""
+        self.running = names
+        started = time.time()
+        error = None
+        found = {}
+        try:
+            candidates = await run_discovery(resources=resources, sources=names, **self.run_options)
+            for candidate in candidates:
+                found[candidate["source"]] = found.get(candidate["source"], 0) + 1
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            self.failed_runs += 1
+            print(f"Run for {', '.join(names)} failed: {error}")
+        self.runs += 1
+        self.running = []
+
+        for name in names:
+            source = self.sources[name]
+            source["last_run"] = started
+            source["last_duration_s"] = round(time.time() - started, 1)
+            source["last_candidates"] = found.get(name, 0)
+            source["last_error"] = error
+            source["runs"] += 1
+            source["interval_s"] = self._interval(name)
+        self._save_state()
+
+    # Health/metrics endpoint
+
+    def metrics(self) -> dict:
+        now = time.time()
+        outbox: dict[str, int] = {}
+        for message in open_outbox().messages:
+            outbox[message["status"]] = outbox.get(message["status"], 0) + 1
+        return {
+            "uptime_s": round(now - self.started_at),
+            "runs": self.runs,
+            "failed_runs": self.failed_runs,
+            "running": self.running,
+            "outbox": outbox,
+            "sources": {
+                name: {
+                    **source,
+                    "last_run": datetime.fromtimestamp(source["last_run"]).isoformat() if source["last_run"] else None,
+                    "next_run_in_s": max(0, round(self.next_due(name) - now)),
+                }
+                for name, source in self.sources.items()
+            },
+        }
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # headers are not used
+            path = request_line[1] if len(request_line) > 1 else "/"
+            if path == "/health":
+                status, body = "200 OK", {"status": "ok", "uptime_s": round(time.time() - self.started_at)}
+            elif path == "/metrics":
+                status, body = "200 OK", self.metrics()
+            else:
+                status, body = "404 Not Found", {"error": "not found"}
+            payload = json.dumps(body, indent=2).encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    # Main loop
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stopping.set)
+
+        server = await asyncio.start_server(self._handle_http, self.config["host"], self.config["port"])
+        print(f"Discovery daemon: health/metrics on http://{self.config['host']}:{self.config['port']}")
+        for name, source in self.sources.items():
+            print(f"  {name}: every {source['interval_s'] / 3600:g}h")
+
+        limits = httpx.Limits(
+            max_connections=self.config["max_connections"],
+            max_keepalive_connections=self.config["max_keepalive_connections"],
+        )
+        http_client = httpx.AsyncClient(
+            timeout=30,
+            follow_redirects=True,
+            limits=limits,
+            event_hooks=trace_event_hooks(),
+        )
+        async with http_client:
+            resources = Resources(http_client=http_client, anthropic_client=Anthropic())
+            while not self.stopping.is_set():
+                due = self.due(time.time())
+                if due:
+                    await self.run_once(resources, due)
+                    continue
+                wait = min(self.next_due(name) for name in self.sources) - time.time()
+                if self.watch_outbox:
+                    outbox = open_outbox()
+                    if (outbox.next_due() or float("inf")) <= time.time():
+                        await flush_outbox(outbox, http_client)
+                    wait = min(wait, (outbox.next_due() or float("inf")) - time.time())
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=max(wait, 1))
+                except asyncio.TimeoutError:
+                    pass
+
+        server.close()
+        await server.wait_closed()
+        print("Discovery daemon stopped")
@@ -0,0 +1,66 @@
+"""
+Draft evaluation: compares hybrid (rules + gap fill) drafting with Claude-only drafting.
+
+The corpus is an archive partition or run file (or an older candidates_<date>.json);
+its extractions are reused, so only the drafting step is replayed.
+"""
+
+import copy
+import json
+from datetime import datetime
+from pathlib import Path
+
+from archive import load_candidates
+from drafter import HybridDrafter, SubmissionDrafter
+
+
+async def evaluate_drafters(corpus_path: Path, output_dir: Path, min_confidence: float = 0.75) -> dict:
+    """Draft every eligible candidate both ways and report fill rates, tokens and cost."""
+    corpus = load_candidates(corpus_path)
+    for candidate in corpus:
+        candidate.pop("draft_submission", None)
+    print(f"Loaded {len(corpus)} recorded candidates from {corpus_path}")
+
+    results = {}
+    for label, drafter_class in (("llm", SubmissionDrafter), ("hybrid", HybridDrafter)):
+        print(f"\n{label} drafting...")
+        drafter = drafter_class(min_confidence=min_confidence)
+        drafts = await drafter.generate_drafts(copy.deepcopy(corpus))
+        results[label] = {
+            "drafts": len(drafts),
+            "requests": sum(t["requests"] for t in drafter.usage.tiers.values()),
+            "tokens": drafter.usage.total_tokens,
+            "cost_usd": drafter.usage.total_cost,
+            "fill_rates": drafter.fill_rates(),
+            "usage": drafter.usage.report(),
+        }
+        if isinstance(drafter, HybridDrafter):
+            results[label]["requests_skipped"] = drafter.skipped_requests
+            results[label]["full_drafts"] = drafter.full_drafts
+            results[label]["fill_sources"] = {"rules": drafter.rule_filled, "claude": drafter.llm_filled}
+
+    llm, hybrid = results["llm"], results["hybrid"]
+    report = {
+        "corpus": str(corpus_path),
+        "evaluated_at": datetime.now().isoformat(),
+        "tokens_saved": llm["tokens"] - hybrid["tokens"],
+        "token_savings": 1 - hybrid["tokens"] / llm["tokens"] if llm["tokens"] else 0.0,
+        **results,
+    }
+
+    output_path = Path(output_dir) / f"draft_eval_{datetime.now().strftime('%Y-%m-%d')}.json"
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'='*60}")
+    print("DRAFT EVALUATION")
+    print(f"{'='*60}")
+    print(f"  Drafts: Claude-only {llm['drafts']}, hybrid {hybrid['drafts']}")
+    print(f"  Requests: Claude-only {llm['requests']}, hybrid {hybrid['requests']} ({hybrid['requests_skipped']} skipped)")
+    print(f"  Tokens: Claude-only {llm['tokens']:,}, hybrid {hybrid['tokens']:,} ({report['token_savings']:.0%} saved)")
+    print(f"  Cost: Claude-only ${llm['cost_usd']:.4f}, hybrid ${hybrid['cost_usd']:.4f}")
+    print("  Required-field fill rates (Claude-only / hybrid):")
+    for field in sorted(set(llm["fill_rates"]) | set(hybrid["fill_rates"])):
+        print(f"    {field:<14} {llm['fill_rates'].get(field, 0):>5.0%} / {hybrid['fill_rates'].get(field, 0):>5.0%}")
+    print(f"  Report: {output_path}")
+    return report
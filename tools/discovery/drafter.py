@@ -2,11 +2,18 @@
 Submission Drafter: Generates draft submissions following SUBMISSION_PROCESS.md
 """
 
+import asyncio
 import json
 import re
+import statistics
+import time
 from datetime import datetime
 from anthropic import Anthropic
+from blobstore import BLOBS
 from config import CONFIG
+from governor import BudgetExhausted, LLMGovernor
+from submission_draft import FDA_STATUS_MAP, generate_draft_submission
+from llm import CHARS_PER_TOKEN, ParseStats, StructuredOutputError, UsageTracker, call_structured, coerce_to_schema
 
 
 DRAFT_PROMPT = """You are helping prepare a new test submission for OpenOnco, a database of liquid biopsy cancer diagnostic tests.
@@ -19,12 +26,12 @@ Based on the extracted information, generate a draft data.js entry following Ope
 ## Source URL:
 {source_url}
 
-## Raw Data (for additional context):
-{raw_data}
+## Candidate (as classified; raw data truncated):
+{context}
 
 ---
 
-Generate a COMPLETE test object in valid JSON format.
+Generate a COMPLETE test object and record it by calling the `record_draft` tool.
 Category: {category}
 
 Use this exact template and fill in all fields you can determine from the data. Use null for unknown numbers, "" for unknown strings.
@@ -32,7 +39,6 @@ Use this exact template and fill in all fields you can determine from the data.
 {template}
 
 IMPORTANT:
-- Output ONLY the JSON object, nothing else - no explanation, no markdown
 - Fill in every field you have data for
 - Use null for unknown numeric fields
 - Use "" for unknown string fields
@@ -42,6 +48,25 @@ IMPORTANT:
 - The vendorRequestedChanges should say: "{today}: Discovered via OpenOnco Discovery Agent from {source}. Source: {source_url}"
 """
 
+GAP_PROMPT = """You are completing a draft OpenOnco {category} test entry. Most fields are already filled in.
+
+## Draft so far:
+{known_json}
+
+## Candidate (as classified; raw data truncated):
+{context}
+
+---
+
+Find ONLY these missing fields in the candidate data and record them by calling the `record_gaps` tool:
+{fields}
+
+- Numbers: performance values as plain numbers (e.g. 94.5 for 94.5%); null if the data does not state them
+- Strings: "" if the data does not state them
+- fdaStatus: one of "FDA PMA", "FDA 510(k)", "FDA approved", "CLIA LDT", "CE-IVD", "RUO"
+- Do not guess or infer values that are not in the data
+"""
+
 TEMPLATES = {
     "MRD": """{
   "id": "mrd-XX",
@@ -181,106 +206,399 @@ REQUIRED_FIELDS = {
 }
 
 
+def template_field_lines() -> str:
+    """One line per category listing its template fields, for compact prompts."""
+    return "\n".join(
+        f"{category}: {', '.join(json.loads(template))}" for category, template in TEMPLATES.items()
+    )
+
+
+def template_schema(category: str) -> dict:
+    """
+    Derive a tool-use JSON schema from a category template.
+
+    Template placeholders determine the type: null -> number, "" -> string,
+    [] -> list of strings, false -> boolean.
+    """
+    template = json.loads(TEMPLATES.get(category, TEMPLATES["MRD"]))
+    properties = {}
+    for field, placeholder in template.items():
+        if isinstance(placeholder, bool):
+            properties[field] = {"type": "boolean"}
+        elif isinstance(placeholder, list):
+            properties[field] = {"type": "array", "items": {"type": "string"}}
+        elif placeholder is None:
+            properties[field] = {"type": ["number", "null"]}
+        else:
+            properties[field] = {"type": "string"}
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": ["name", "vendor"],
+    }
+
+
 class SubmissionDrafter:
-    """Generates draft submissions for high-confidence candidates."""
+    """
+    Generates draft submissions for high-confidence candidates.
 
-    def __init__(self):
-        self.client = Anthropic()
-        self.model = CONFIG["claude"]["model"]
+    Drafting can start while enrichment is still running: pass `submit` as the
+    enricher's on_enriched callback and await `gather()` at the end. With a
+    governor, drafts run concurrently under the shared LLM limits.
+    """
 
-    def generate_draft(self, candidate: dict) -> dict | None:
-        """Generate a draft submission for a candidate."""
-        extracted = candidate.get("extracted", {})
-        if not extracted:
-            return None
+    def __init__(
+        self,
+        usage: UsageTracker | None = None,
+        governor: LLMGovernor | None = None,
+        context_fn=None,
+        min_confidence: float = 0.75,
+        client: Anthropic | None = None,
+    ):
+        self.client = client or Anthropic()
+        self.model = CONFIG["claude"]["model"]
+        self.max_tokens = CONFIG["claude"]["draft"]["max_tokens"]
+        self.parse_stats = ParseStats()
+        self.governor = governor
+        self.usage = usage or UsageTracker(CONFIG["claude"]["pricing"], governor=governor)
+        # Returns the compact candidate payload the enricher already built
+        self.context_fn = context_fn
+        self.min_confidence = min_confidence
+        self._tasks: dict[str, tuple[dict, asyncio.Task]] = {}
+        # Drafts that arrived with the extraction, and when each draft was finished
+        self.combined_drafts = 0
+        self.finished_at: dict[str, float] = {}
+        # Required-field fill counts over finished drafts
+        self.drafted = 0
+        self.required_counts: dict[str, int] = {}
+        self.filled_counts: dict[str, int] = {}
 
-        category = extracted.get("category", "MRD")
-        template = TEMPLATES.get(category, TEMPLATES["MRD"])
+    def is_eligible(self, candidate: dict) -> bool:
+        """Relevant, confident, genuinely new tests only."""
+        extracted = candidate.get("extracted") or {}
+        return (
+            candidate.get("is_relevant", False)
+            and candidate.get("confidence", 0) >= self.min_confidence
+            and extracted.get("is_new_test", False)
+            and not extracted.get("is_existing_test_update", False)
+        )
 
-        raw_data = json.dumps(candidate.get("raw_data", {}), indent=2)
+    def _candidate_context(self, candidate: dict) -> str:
+        """Candidate section of the prompt, reusing the enrichment payload when available."""
+        if self.context_fn is not None:
+            return self.context_fn(candidate)
+        raw_data = json.dumps(BLOBS.raw_data(candidate), separators=(",", ":"))
         if len(raw_data) > 4000:
-            raw_data = raw_data[:4000] + "\n... [truncated]"
-
-        source_url = candidate.get("source_url", "")
-        today = datetime.now().strftime("%Y-%m-%d")
-        source = candidate.get("source", "unknown")
+            raw_data = raw_data[:4000] + "... [truncated]"
+        return f"TITLE: {candidate.get('title', '')}\nCOMPANY: {candidate.get('company', '')}\n\nRAW DATA:\n{raw_data}"
 
+    def build_prompt(self, candidate: dict) -> tuple[str, str]:
+        """Return (prompt, category) for a candidate with an extraction."""
+        extracted = candidate["extracted"]
+        category = extracted.get("category") or "MRD"
         prompt = DRAFT_PROMPT.format(
-            extracted_json=json.dumps(extracted, indent=2),
-            source_url=source_url,
-            raw_data=raw_data,
+            extracted_json=json.dumps(
+                {k: v for k, v in extracted.items() if v not in (None, "", [])},
+                separators=(",", ":"),
+            ),
+            source_url=candidate.get("source_url", ""),
+            context=self._candidate_context(candidate),
             category=category,
-            template=template,
-            today=today,
-            source=source,
+            template=TEMPLATES.get(category, TEMPLATES["MRD"]),
+            today=datetime.now().strftime("%Y-%m-%d"),
+            source=candidate.get("source", "unknown"),
         )
+        return prompt, category
 
-        try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=3000,
-                messages=[{"role": "user", "content": prompt}],
-            )
+    def _request_draft(self, prompt: str, category: str) -> dict:
+        return call_structured(
+            self.client,
+            model=self.model,
+            max_tokens=self.max_tokens,
+            prompt=prompt,
+            tool_name="record_draft",
+            description=f"Record the completed OpenOnco {category} test object.",
+            schema=template_schema(category),
+            stats=self.parse_stats,
+            usage=self.usage,
+            tier="draft",
+        )
 
-            content = response.content[0].text.strip()
-            
-            # Clean markdown if present
-            if content.startswith("```"):
-                lines = content.split("\n")
-                content = "\n".join(lines[1:-1] if lines[-1].strip() == "```" else lines[1:])
-                content = content.strip()
-            
-            draft = json.loads(content)
-            
-            # Add metadata for email formatting
-            draft["_category"] = category
-            draft["_confidence"] = candidate.get("confidence", 0)
-            draft["_source_url"] = source_url
-            draft["_source"] = source
-            
-            # Check for missing required fields
-            required = REQUIRED_FIELDS.get(category, [])
-            missing = []
-            for field in required:
-                val = draft.get(field)
-                if val is None or val == "" or val == []:
-                    missing.append(field)
-            draft["_missing_fields"] = missing
-            
-            return draft
+    def _finish_draft(self, draft: dict, candidate: dict, category: str) -> dict:
+        """Add email metadata and the list of missing required fields."""
+        draft["_category"] = category
+        draft["_confidence"] = candidate.get("confidence", 0)
+        draft["_source_url"] = candidate.get("source_url", "")
+        draft["_source"] = candidate.get("source", "unknown")
+
+        required = REQUIRED_FIELDS.get(category, [])
+        draft["_missing_fields"] = [
+            field for field in required if draft.get(field) in (None, "", [])
+        ]
+        self.drafted += 1
+        for field in required:
+            self.required_counts[field] = self.required_counts.get(field, 0) + 1
+            if field not in draft["_missing_fields"]:
+                self.filled_counts[field] = self.filled_counts.get(field, 0) + 1
+        return draft
+
+    def fill_rates(self) -> dict[str, float]:
+        """Share of finished drafts with each required field filled."""
+        return {
+            field: self.filled_counts.get(field, 0) / count
+            for field, count in self.required_counts.items()
+        }
 
-        except json.JSONDecodeError as e:
-            print(f"      Draft JSON parse error: {e}")
+    async def _call(self, prompt: str, max_tokens: int, fn, *args):
+        """Run a request through the governor when there is one, else in a worker thread."""
+        if self.governor is None:
+            # The Anthropic client blocks; off the event loop, other requests keep going
+            return await asyncio.to_thread(fn, *args)
+        return await self.governor.call(self.model, len(prompt) // CHARS_PER_TOKEN, max_tokens, fn, *args)
+
+    async def draft(self, candidate: dict) -> dict | None:
+        """Generate a draft submission for a candidate."""
+        if not candidate.get("extracted"):
+            return None
+
+        prompt, category = self.build_prompt(candidate)
+        try:
+            draft = await self._call(prompt, self.max_tokens, self._request_draft, prompt, category)
+        except BudgetExhausted:
+            # Carried over: the candidate keeps its extraction and is drafted next run
+            candidate["draft_deferred"] = True
+            return None
+        except StructuredOutputError as e:
+            print(f"      Draft structured output error: {e}")
             return None
         except Exception as e:
             print(f"      Draft generation error: {e}")
             return None
+        return self._finish_draft(draft, candidate, category)
+
+    def finish_combined(self, combined: dict, candidate: dict) -> dict:
+        """Complete a draft that came back with the extraction (enricher combined mode)."""
+        category = candidate["extracted"].get("category") or "MRD"
+        draft = coerce_to_schema(combined, template_schema(category))
+        self.combined_drafts += 1
+        return self._finish_draft(draft, candidate, category)
+
+    def submit(self, candidate: dict):
+        """Start drafting a candidate now if it is eligible (enricher on_enriched hook)."""
+        combined = candidate.pop("combined_draft", None)
+        if not self.is_eligible(candidate) or candidate.get("draft_submission"):
+            # Drafts restored from a run checkpoint are not requested again
+            return
 
-    def generate_drafts(self, candidates: list[dict], min_confidence: float = 0.75) -> list[dict]:
+        async def run():
+            if combined:
+                draft = self.finish_combined(combined, candidate)
+            else:
+                name = candidate["extracted"].get("test_name") or "Unknown"
+                print(f"    Drafting: {name}...")
+                draft = await self.draft(candidate)
+            if draft:
+                candidate["draft_submission"] = draft
+                self.finished_at[candidate["id"]] = time.monotonic()
+            return draft
+
+        self._tasks[candidate["id"]] = (candidate, asyncio.create_task(run()))
+
+    async def wait_for(self, candidate: dict) -> dict | None:
+        """Wait for one candidate's draft, if one was submitted (streaming pipeline)."""
+        entry = self._tasks.pop(candidate["id"], None)
+        return await entry[1] if entry else None
+
+    async def gather(self) -> list[dict]:
+        """Wait for every submitted draft. Returns drafts in submission order."""
+        tasks = list(self._tasks.values())
+        self._tasks = {}
+        results = await asyncio.gather(*(task for _, task in tasks))
+        deferred = sum(1 for candidate, _ in tasks if candidate.get("draft_deferred"))
+        if deferred:
+            print(f"  {deferred} drafts deferred by the LLM budget")
+        return [draft for draft in results if draft]
+
+    def latency_report(self, started_at: dict[str, float], combined_ids: set[str]) -> dict:
+        """
+        End-to-end seconds per drafted candidate, by path.
+
+        Measured from the candidate's first enrichment request to its finished
+        draft: "combined" is one request, "two_step" is extraction then draft.
+        """
+        paths = {"combined": [], "two_step": []}
+        for cid, finished in self.finished_at.items():
+            if cid in started_at:
+                path = "combined" if cid in combined_ids else "two_step"
+                paths[path].append(finished - started_at[cid])
+        return {
+            path: {
+                "candidates": len(times),
+                "median_s": statistics.median(times) if times else None,
+                "mean_s": statistics.fmean(times) if times else None,
+            }
+            for path, times in paths.items()
+        }
+
+    async def generate_drafts(self, candidates: list[dict]) -> list[dict]:
         """Generate drafts for high-confidence, relevant candidates."""
-        drafts = []
-        
-        eligible = [
-            c for c in candidates
-            if c.get("is_relevant", False) 
-            and c.get("confidence", 0) >= min_confidence
-            and c.get("extracted", {}).get("is_new_test", False)
-            and not c.get("extracted", {}).get("is_existing_test_update", False)
-        ]
-        
+        eligible = [c for c in candidates if self.is_eligible(c)]
         if not eligible:
             print("  No candidates eligible for draft generation")
-            return drafts
+            return []
 
+        if self.governor:
+            eligible = self.governor.order(eligible)
         print(f"  Generating drafts for {len(eligible)} candidates...")
-        
-        for i, candidate in enumerate(eligible):
-            name = candidate.get("extracted", {}).get("test_name", "Unknown")
-            print(f"    [{i+1}/{len(eligible)}] Drafting: {name}...")
-            
-            draft = self.generate_draft(candidate)
-            if draft:
-                drafts.append(draft)
-                candidate["draft_submission"] = draft
+        for candidate in eligible:
+            self.submit(candidate)
+        return await self.gather()
+
+
+class HybridDrafter(SubmissionDrafter):
+    """
+    Rule-based draft first (submission_draft.py), Claude only for missing required fields.
 
-        return drafts
+    Candidates whose required fields are all covered by the rules need no
+    request at all; categories the rules do not handle fall back to a full
+    Claude draft.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gap_tokens_per_field = CONFIG["claude"]["draft"]["gap_tokens_per_field"]
+        self.rule_filled: dict[str, int] = {}
+        self.llm_filled: dict[str, int] = {}
+        self.gap_requests = 0
+        self.skipped_requests = 0
+        self.full_drafts = 0
+        self.llm_only_tokens_est = 0
+
+    def _rule_missing(self, draft: dict, candidate: dict, category: str) -> list[str]:
+        """Required fields the rules could not fill."""
+        fda_raw = (candidate["extracted"].get("fda_status") or "").lower()
+        fda_mapped = any(key in fda_raw for key in FDA_STATUS_MAP)
+        missing = []
+        for field in REQUIRED_FIELDS.get(category, []):
+            value = draft.get(field)
+            # fdaStatus keeps the template's "CLIA LDT" default when the status was not mapped
+            if value in (None, "", []) or (field == "fdaStatus" and not fda_mapped):
+                missing.append(field)
+        return missing
+
+    def build_gap_prompt(self, candidate: dict, draft: dict, category: str, missing: list[str]) -> str:
+        known = {
+            k: v for k, v in draft.items()
+            if not k.startswith("_") and k not in missing and v not in (None, "", [], False)
+        }
+        return GAP_PROMPT.format(
+            category=category,
+            known_json=json.dumps(known, separators=(",", ":")),
+            context=self._candidate_context(candidate),
+            fields="\n".join(f"- {field}" for field in missing),
+        )
+
+    def _request_gaps(self, prompt: str, category: str, missing: list[str]) -> dict:
+        properties = template_schema(category)["properties"]
+        schema = {
+            "type": "object",
+            "properties": {field: properties.get(field, {"type": "string"}) for field in missing},
+            # null is a valid answer ("not stated"), so none of the fields can be required
+            "required": [],
+        }
+        return call_structured(
+            self.client,
+            model=self.model,
+            max_tokens=self._gap_max_tokens(missing),
+            prompt=prompt,
+            tool_name="record_gaps",
+            description=f"Record the missing fields of an OpenOnco {category} test object.",
+            schema=schema,
+            stats=self.parse_stats,
+            usage=self.usage,
+            tier="draft_gaps",
+        )
+
+    def _gap_max_tokens(self, missing: list[str]) -> int:
+        return 200 + self.gap_tokens_per_field * len(missing)
+
+    def _estimate_llm_only_tokens(self, candidate: dict, category: str) -> int:
+        """What the full Claude draft would have cost: its prompt plus a filled template."""
+        prompt, _ = self.build_prompt(candidate)
+        template = TEMPLATES.get(category, TEMPLATES["MRD"])
+        return (len(prompt) + len(template)) // CHARS_PER_TOKEN
+
+    async def draft(self, candidate: dict) -> dict | None:
+        """Generate a rule-based draft, asking Claude only for what the rules left empty."""
+        if not candidate.get("extracted"):
+            return None
+        draft = generate_draft_submission(candidate)
+        if draft is None:
+            self.full_drafts += 1
+            return await super().draft(candidate)
+
+        category = draft["_category"]
+        missing = self._rule_missing(draft, candidate, category)
+        if "fdaStatus" in missing:
+            # Unknown rather than the template default, so an unfilled status gets flagged
+            draft["fdaStatus"] = None
+
+        gaps = {}
+        if missing:
+            prompt = self.build_gap_prompt(candidate, draft, category, missing)
+            try:
+                gaps = await self._call(
+                    prompt, self._gap_max_tokens(missing), self._request_gaps, prompt, category, missing
+                )
+                self.gap_requests += 1
+            except BudgetExhausted:
+                candidate["draft_deferred"] = True
+                return None
+            except Exception as e:
+                # The rule-based draft is still worth reviewing with its gaps listed
+                print(f"      Gap fill error: {e}")
+        else:
+            self.skipped_requests += 1
+
+        for field in REQUIRED_FIELDS.get(category, []):
+            if field not in missing:
+                self.rule_filled[field] = self.rule_filled.get(field, 0) + 1
+        self.llm_only_tokens_est += self._estimate_llm_only_tokens(candidate, category)
+
+        for field, value in gaps.items():
+            if value in (None, "", []):
+                continue
+            draft[field] = value
+            self.llm_filled[field] = self.llm_filled.get(field, 0) + 1
+            if f"{field}Citations" in draft and not draft[f"{field}Citations"]:
+                draft[f"{field}Citations"] = candidate.get("source_url")
+        return self._finish_draft(draft, candidate, category)
+
+    def tokens_used(self) -> int:
+        """Tokens actually spent on gap-fill requests."""
+        tier = self.usage.tiers.get("draft_gaps", {})
+        return tier.get("input_tokens", 0) + tier.get("output_tokens", 0)
+
+    def summary(self) -> str:
+        """One-line hybrid drafting summary for run output."""
+        used = self.tokens_used()
+        # No Claude-only draft is made in a run, so its cost is estimated from prompt sizes;
+        # draft_eval.py (main.py eval-drafts) measures both ways on real requests
+        saved = self.llm_only_tokens_est - used
+        return (
+            f"{self.gap_requests} gap requests, {self.skipped_requests} drafts needed no request, "
+            f"{self.full_drafts} full drafts; {used:,} gap-fill tokens, "
+            f"est. {max(saved, 0):,} fewer than Claude-only (measure with eval-drafts)"
+        )
+
+    def fill_lines(self) -> list[str]:
+        """Per-field fill rates, split into rules and Claude."""
+        lines = []
+        for field, count in self.required_counts.items():
+            rule = self.rule_filled.get(field, 0)
+            llm = self.llm_filled.get(field, 0)
+            lines.append(
+                f"{field:<14} {self.filled_counts.get(field, 0) / count:>5.0%} filled "
+                f"(rules {rule}, Claude {llm}, of {count})"
+            )
+        return lines
@@ -2,13 +2,30 @@
 Claude Enricher: Extracts structured test information from raw candidates.
 """
 
+import asyncio
 import json
+import time
+from datetime import datetime
 from anthropic import Anthropic
 
+from blobstore import BLOBS
 from config import CONFIG
+from drafter import template_field_lines
+from governor import BudgetExhausted, JobQueue, LLMGovernor, on_watchlist
+from llm import (
+    CHARS_PER_TOKEN,
+    ParseStats,
+    StructuredOutputError,
+    UsageTracker,
+    call_structured,
+    coerce_to_schema,
+    schema_problems,
+)
+from known_tests import KnownTestIndex
+from tracing import TRACER
 
 
-EXTRACTION_PROMPT = """You are analyzing a potential new cancer diagnostic test for the OpenOnco database.
+PROMPT_HEADER = """You are analyzing potential new cancer diagnostic tests for the OpenOnco database.
 
 OpenOnco tracks liquid biopsy and molecular diagnostic tests across these categories:
 - **MRD** (Minimal Residual Disease): Monitors for cancer recurrence after treatment
@@ -16,34 +33,25 @@ OpenOnco tracks liquid biopsy and molecular diagnostic tests across these catego
 - **TRM** (Treatment Response Monitoring): Tracks how cancer responds to therapy
 - **TDS** (Treatment Decision Support): Guides therapy selection based on tumor profiling
 
-**KNOWN EXISTING TESTS (already in OpenOnco - do NOT flag as new):**
-Signatera, Guardant360, Guardant360 CDx, Guardant360 TissueNext, GuardantReveal, GuardantINFINITY, GuardantOMNI,
-FoundationOne Liquid CDx, F1LCDx, FoundationOne CDx, FoundationOne Heme,
-Tempus xT, Tempus xF, Tempus xF+, Tempus xR, Tempus xG, Tempus xE,
-Galleri, Shield, CancerSEEK, Caris Assure, Caris Molecular Intelligence,
-clonoSEQ, RaDaR, Invitae Personalized Cancer Monitoring, Resolution ctDx, Resolution ctDx FIRST,
-Oncomine, TruSight Oncology 500, NeoLAB, Biodesix GeneStrat, Biodesix Nodify,
-Myriad myChoice, Myriad BRACAnalysis, PGDx elio, AVENIO, DELFI,
-PredicineCARE, InVisionFirst, Plasma-SafeSeqS, CancerIntercept, PanSeer, OncoLBx, 
-LUNAR-1, LUNAR-2, NeXT Personal, Natera Prospera, Natera Renasight, Natera Panorama,
-Helio Liver Test, HelioLiver, Exact Sciences Cologuard, Oncotype DX
-
-Analyze this candidate and classify it.
+Each candidate lists the NEAREST EXISTING OPENONCO TESTS, retrieved from the database by
+name, vendor and method. Those tests are already in OpenOnco - do NOT flag them as new.
+Tests marked [mentioned] are named in the candidate's own text.
+"""
 
-SOURCE: {source}
+CANDIDATE_BLOCK = """SOURCE: {source}
 SOURCE URL: {source_url}
 TITLE: {title}
 COMPANY: {company}
 DATE: {date}
 
+NEAREST EXISTING OPENONCO TESTS:
+{known_tests}
+
 RAW DATA:
 {raw_data}
+"""
 
----
-
-Respond with ONLY a valid JSON object (no markdown, no ```, no explanation):
-
-{{
+EXTRACTION_FIELDS = """{{
     "is_new_test": true/false,
     "is_new_indication": true/false,
     "is_relevant": true/false,
@@ -64,11 +72,11 @@ Respond with ONLY a valid JSON object (no markdown, no ```, no explanation):
     "new_indication_details": "If is_new_indication=true, what's new",
     "notes": "Other relevant context",
     "confidence": 0.0-1.0
-}}
+}}"""
 
-CLASSIFICATION RULES:
-1. **is_new_test=true**: Genuinely NEW test NOT in the known list above. Set is_relevant=true.
-2. **is_new_indication=true**: EXISTING test (from known list) being studied in a new cancer type, patient population, or clinical context. Set is_relevant=true but is_new_test=false.
+CLASSIFICATION_RULES = """CLASSIFICATION RULES:
+1. **is_new_test=true**: Genuinely NEW test, NOT one of the nearest existing tests listed for the candidate. Set is_relevant=true.
+2. **is_new_indication=true**: EXISTING test (from the nearest existing tests) being studied in a new cancer type, patient population, or clinical context. Set is_relevant=true but is_new_test=false.
 3. **is_relevant=false**: Pure academic research, tissue-only tests, not cancer diagnostics, or duplicates.
 
 Examples:
@@ -77,20 +85,527 @@ Examples:
 - "University study on ctDNA kinetics" → is_relevant=false (pure research)
 """
 
+EXTRACTION_PROMPT = (
+    PROMPT_HEADER
+    + """
+Analyze this candidate and classify it.
+
+"""
+    + CANDIDATE_BLOCK
+    + """
+---
+
+Record your classification by calling the `record_extraction` tool with these fields:
+
+"""
+    + EXTRACTION_FIELDS
+    + "\n\n"
+    + CLASSIFICATION_RULES
+)
+
+# Extraction and draft in one request, for candidates that nearly always get drafted
+COMBINED_PROMPT = (
+    PROMPT_HEADER
+    + """
+Analyze this candidate and classify it. If it is a genuinely new test, also draft its
+OpenOnco entry.
+
+"""
+    + CANDIDATE_BLOCK
+    + """
+---
+
+Call the `record_extraction_and_draft` tool once with two fields.
+
+"extraction": your classification, with these fields:
+
+"""
+    + EXTRACTION_FIELDS
+    + "\n\n"
+    + CLASSIFICATION_RULES
+    + """
+"draft": ONLY if is_new_test=true, the complete OpenOnco test object for the category you
+chose, using exactly that category's fields below; otherwise null.
+
+{draft_fields}
+
+Draft rules:
+- Use null for unknown numbers and "" for unknown strings; do not guess
+- cancerTypes is an array like ["Lung", "Breast"] or ["Pan-cancer"]
+- Include the source URL in methodCitations
+- Set vendorVerified: false
+- vendorRequestedChanges: "{today}: Discovered via OpenOnco Discovery Agent from {source}. Source: {source_url}"
+"""
+)
+
+# Instructions are sent once per request; {candidates} holds one block per candidate.
+BATCH_EXTRACTION_PROMPT = (
+    PROMPT_HEADER
+    + """
+Analyze each of the {count} candidates below and classify them independently.
+
+{candidates}
+---
+
+Record your classifications by calling the `record_extractions` tool. Its "results"
+array must contain exactly one object per candidate. Each object must have
+"candidate_id" set to the ID shown in the candidate's header, plus these fields:
+
+"""
+    + EXTRACTION_FIELDS
+    + "\n\n"
+    + CLASSIFICATION_RULES
+)
+
+# Cheaper path for candidates that already mention an existing test (see linker.py)
+INDICATION_PROMPT = (
+    PROMPT_HEADER
+    + """
+Each of the {count} candidates below mentions a test that is ALREADY in OpenOnco (marked
+[mentioned]). Decide only whether it describes a new indication of that test: a new
+cancer type, patient population, or clinical context.
+
+{candidates}
+---
+
+Record your answers by calling the `record_indications` tool. Its "results" array must
+contain exactly one object per candidate, with "candidate_id" set to the ID shown in the
+candidate's header, plus these fields:
+
+{{
+    "is_relevant": true/false,
+    "is_new_indication": true/false,
+    "is_new_test": true ONLY if the candidate is really about a different, new test,
+    "existing_test_name": "Which existing test",
+    "new_indication_details": "What's new",
+    "cancer_types": ["Cancer types if specified"],
+    "relevance_reason": "Brief explanation",
+    "confidence": 0.0-1.0
+}}
+
+Pure academic research that merely uses the test, or news that repeats a known indication,
+is is_relevant=false.
+"""
+)
+
+# First tier of the model cascade: a small model screens out clearly irrelevant items
+TRIAGE_PROMPT = """You are screening items for OpenOnco, a database of liquid biopsy and molecular
+cancer diagnostic tests (MRD, early cancer detection, treatment response monitoring,
+treatment decision support).
+
+For each of the {count} items below, estimate the probability that it announces or
+validates a specific commercial or clinical-grade cancer diagnostic test (a new test,
+or an existing test in a new indication). Pure academic research, treatment trials,
+tissue-only pathology, and non-cancer items should score low. When unsure, score in
+the middle rather than low.
+
+{candidates}
+---
+
+Record your answers by calling the `record_triage` tool with one result per item:
+"candidate_id", "relevance" (0.0-1.0) and a short "reason".
+"""
+
+TRIAGE_BLOCK = """SOURCE: {source}
+TITLE: {title}
+COMPANY: {company}
+RAW DATA (excerpt):
+{raw_data}
+"""
+
+_STRING = {"type": "string"}
+_NULLABLE_STRING = {"type": ["string", "null"]}
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+# JSON schema enforced through tool use; mirrors EXTRACTION_FIELDS
+EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "is_new_test": {"type": "boolean"},
+        "is_new_indication": {"type": "boolean"},
+        "is_relevant": {"type": "boolean"},
+        "relevance_reason": _STRING,
+        "test_name": _NULLABLE_STRING,
+        "company": _NULLABLE_STRING,
+        "cancer_types": _STRING_LIST,
+        "sample_type": _NULLABLE_STRING,
+        "methodology": _NULLABLE_STRING,
+        "category": {"type": ["string", "null"], "description": "MRD, ECD, TRM, or TDS"},
+        "secondary_categories": _STRING_LIST,
+        "approach": _NULLABLE_STRING,
+        "fda_status": _NULLABLE_STRING,
+        "clearance_date": _NULLABLE_STRING,
+        "key_claims": _STRING_LIST,
+        "biomarkers": _STRING_LIST,
+        "existing_test_name": _NULLABLE_STRING,
+        "new_indication_details": _NULLABLE_STRING,
+        "notes": _NULLABLE_STRING,
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+    },
+    "required": ["is_new_test", "is_new_indication", "is_relevant", "confidence"],
+}
+
+COMBINED_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "extraction": EXTRACTION_SCHEMA,
+        "draft": {
+            "type": ["object", "null"],
+            "description": "OpenOnco test object for the chosen category, or null if not a new test",
+        },
+    },
+    "required": ["extraction"],
+}
+
+BATCH_EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                **EXTRACTION_SCHEMA,
+                "properties": {"candidate_id": _STRING, **EXTRACTION_SCHEMA["properties"]},
+                "required": ["candidate_id", *EXTRACTION_SCHEMA["required"]],
+            },
+        },
+    },
+    "required": ["results"],
+}
+
+INDICATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "candidate_id": _STRING,
+                    "is_relevant": {"type": "boolean"},
+                    "is_new_indication": {"type": "boolean"},
+                    "is_new_test": {"type": "boolean"},
+                    "existing_test_name": _NULLABLE_STRING,
+                    "new_indication_details": _NULLABLE_STRING,
+                    "cancer_types": _STRING_LIST,
+                    "relevance_reason": _STRING,
+                    "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+                },
+                "required": ["candidate_id", "is_relevant", "is_new_indication", "confidence"],
+            },
+        },
+    },
+    "required": ["results"],
+}
+
+TRIAGE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "candidate_id": _STRING,
+                    "relevance": {"type": "number", "minimum": 0, "maximum": 1},
+                    "reason": _STRING,
+                },
+                "required": ["candidate_id", "relevance"],
+            },
+        },
+    },
+    "required": ["results"],
+}
+
+# Prompt, tool and schema for each batched request path
+BATCH_MODES = {
+    "full": {
+        "prompt": BATCH_EXTRACTION_PROMPT,
+        "tool": "record_extractions",
+        "description": "Record the structured classification of every candidate in the batch.",
+        "schema": BATCH_EXTRACTION_SCHEMA,
+    },
+    "indication": {
+        "prompt": INDICATION_PROMPT,
+        "tool": "record_indications",
+        "description": "Record whether each candidate is a new indication of an existing test.",
+        "schema": INDICATION_SCHEMA,
+    },
+    "triage": {
+        "prompt": TRIAGE_PROMPT,
+        "tool": "record_triage",
+        "description": "Record the relevance estimate for every item.",
+        "schema": TRIAGE_SCHEMA,
+    },
+}
+
 
 class ClaudeEnricher:
-    """Uses Claude to extract structured test information from raw candidates."""
+    """
+    Uses Claude to extract structured test information from raw candidates.
+
+    Candidates flow through up to three tiers: linked candidates take the cheap
+    new-indication path; the rest are screened by a small triage model and only
+    those at or above the escalation threshold reach full extraction.
 
-    def __init__(self):
-        self.client = Anthropic()
+    With a governor, requests run concurrently in priority order and candidates
+    that do not fit the daily budget are flagged enrichment_deferred.
+
+    When drafting is on (on_enriched is set) and use_combined is enabled, FDA
+    clearances, watchlist news and high-scoring triage items get extraction and
+    draft from a single request; the draft is handed over as combined_draft.
+    """
+
+    def __init__(
+        self,
+        test_index: KnownTestIndex | None = None,
+        use_triage: bool | None = None,
+        route_linked: bool | None = None,
+        governor: LLMGovernor | None = None,
+        on_enriched=None,
+        use_combined: bool | None = None,
+        client: Anthropic | None = None,
+    ):
+        self.client = client or Anthropic()
         self.model = CONFIG["claude"]["model"]
         self.max_tokens = CONFIG["claude"]["max_tokens"]
+        self.batch_config = CONFIG["claude"]["batch"]
+        self.linker_config = CONFIG["linker"]
+        self.triage_config = CONFIG["claude"]["triage"]
+        self.use_triage = self.triage_config["enabled"] if use_triage is None else use_triage
+        self.route_linked = self.linker_config["route_to_indication"] if route_linked is None else route_linked
+        self.combined_config = CONFIG["claude"]["combined"]
+        self.use_combined = self.combined_config["enabled"] if use_combined is None else use_combined
+        self.watchlist = {c["name"].lower() for c in CONFIG["watchlist"]["companies"]}
+        self.parse_stats = ParseStats()
+        self.governor = governor
+        self.usage = UsageTracker(CONFIG["claude"]["pricing"], governor=governor)
+        self.test_index = test_index or KnownTestIndex(CONFIG["paths"]["tests_dir"])
+        self.known_tests_k = CONFIG["claude"]["known_tests_k"]
+        self._known_tests_cache = {}
+        self._payload_cache = {}
+        # Called with each candidate as soon as its extraction is final
+        self.on_enriched = on_enriched
+        # When each candidate's first request started, for end-to-end latency
+        self.started_at: dict[str, float] = {}
+        self.combined_ids: set[str] = set()
+
+    def _format_raw_data(self, candidate: dict, limit: int) -> str:
+        """Serialize raw_data, truncated to at most `limit` characters."""
+        raw_data = json.dumps(BLOBS.raw_data(candidate), indent=2)
+        if len(raw_data) > limit:
+            raw_data = raw_data[:limit] + "\n... [truncated]"
+        return raw_data
+
+    def _known_tests(self, candidate: dict) -> str:
+        """
+        Prompt lines for the existing tests nearest to this candidate (cached per ID).
+
+        Tests the linker found in the candidate's text come first, flagged [mentioned].
+        """
+        cid = candidate["id"]
+        if cid not in self._known_tests_cache:
+            linked = [
+                t for t in (self.test_index.get(i) for i in candidate.get("linked_tests", [])) if t
+            ]
+            linked_ids = {t["id"] for t in linked}
+            nearest = [
+                t for t in self.test_index.search_candidate(candidate, k=self.known_tests_k)
+                if t["id"] not in linked_ids
+            ]
+            tests = (linked + nearest)[:max(self.known_tests_k, len(linked))]
+            self._known_tests_cache[cid] = KnownTestIndex.format_tests(tests, mentioned=linked_ids)
+        return self._known_tests_cache[cid]
+
+    def _format_candidate(self, candidate: dict, raw_limit: int, mode: str = "full") -> str:
+        """Render the per-candidate section of a prompt (cached; batching renders it twice)."""
+        key = (candidate["id"], raw_limit, mode == "triage")
+        if key not in self._payload_cache:
+            TRACER.incr("cache.payload.miss")
+            self._payload_cache[key] = self._render_candidate(candidate, raw_limit, mode)
+        else:
+            TRACER.incr("cache.payload.hit")
+        return self._payload_cache[key]
+
+    def candidate_context(self, candidate: dict) -> str:
+        """
+        The compact candidate payload sent for full or indication enrichment.
+
+        Drafting reuses this instead of serializing raw_data again.
+        """
+        for raw_limit in (self.batch_config["raw_data_chars"], self.linker_config["raw_data_chars"]):
+            payload = self._payload_cache.get((candidate["id"], raw_limit, False))
+            if payload is not None:
+                TRACER.incr("cache.payload.hit")
+                return payload
+        return self._format_candidate(candidate, self.batch_config["raw_data_chars"])
+
+    def release(self, candidate: dict):
+        """Drop cached prompt text for a finished candidate (keeps streaming runs bounded)."""
+        cid = candidate["id"]
+        self._known_tests_cache.pop(cid, None)
+        for key in [k for k in self._payload_cache if k[0] == cid]:
+            del self._payload_cache[key]
+
+    def _render_candidate(self, candidate: dict, raw_limit: int, mode: str) -> str:
+        if mode == "triage":
+            return TRIAGE_BLOCK.format(
+                source=candidate["source"],
+                title=candidate.get("title", ""),
+                company=candidate.get("company", ""),
+                raw_data=self._format_raw_data(candidate, raw_limit),
+            )
+        return CANDIDATE_BLOCK.format(
+            source=candidate["source"],
+            source_url=candidate["source_url"],
+            title=candidate.get("title", ""),
+            company=candidate.get("company", ""),
+            date=candidate.get("date", ""),
+            known_tests=self._known_tests(candidate),
+            raw_data=self._format_raw_data(candidate, raw_limit),
+        )
+
+    async def _call(self, model: str, prompt: str, max_tokens: int, fn, *args):
+        """Run a request through the governor when there is one, else in a worker thread."""
+        if self.governor is None:
+            # The Anthropic client blocks; off the event loop, other requests keep going
+            return await asyncio.to_thread(fn, *args)
+        return await self.governor.call(model, len(prompt) // CHARS_PER_TOKEN, max_tokens, fn, *args)
+
+    def _order(self, candidates: list[dict]) -> list[dict]:
+        return self.governor.order(candidates) if self.governor else list(candidates)
+
+    def _mark_started(self, candidates: list[dict]):
+        now = time.monotonic()
+        for candidate in candidates:
+            self.started_at.setdefault(candidate["id"], now)
+
+    def _wants_combined(self, candidate: dict) -> bool:
+        """Source rule: FDA clearances/approvals and news about watchlist companies."""
+        if candidate.get("linked_tests"):
+            return False
+        source = candidate.get("source")
+        if source in self.combined_config["sources"]:
+            return True
+        return source in self.combined_config["watchlist_sources"] and on_watchlist(candidate, self.watchlist)
+
+    def _request_combined(self, prompt: str) -> dict:
+        return call_structured(
+            self.client,
+            model=self.model,
+            max_tokens=self.combined_config["max_tokens"],
+            prompt=prompt,
+            tool_name="record_extraction_and_draft",
+            description="Record the classification of one candidate and, for a new test, its draft entry.",
+            schema=COMBINED_SCHEMA,
+            stats=self.parse_stats,
+            usage=self.usage,
+            tier="combined",
+        )
+
+    async def enrich_combined(self, candidate: dict) -> dict:
+        """Extraction and draft in one request; falls back to plain extraction on a bad reply."""
+        prompt = COMBINED_PROMPT.format(
+            source=candidate["source"],
+            source_url=candidate["source_url"],
+            title=candidate.get("title", ""),
+            company=candidate.get("company", ""),
+            date=candidate.get("date", ""),
+            known_tests=self._known_tests(candidate),
+            raw_data=self._format_raw_data(candidate, self.combined_config["raw_data_chars"]),
+            draft_fields=template_field_lines(),
+            today=datetime.now().strftime("%Y-%m-%d"),
+        )
+
+        self._mark_started([candidate])
+        try:
+            reply = await self._call(
+                self.model, prompt, self.combined_config["max_tokens"], self._request_combined, prompt
+            )
+            problems = schema_problems(reply["extraction"], EXTRACTION_SCHEMA)
+            if problems:
+                raise StructuredOutputError("; ".join(problems))
+        except BudgetExhausted:
+            self._defer([candidate])
+            return candidate
+        except Exception as e:
+            print(f"      Combined request failed ({e}) - falling back to extraction only")
+            return await self.enrich(candidate)
+
+        self.combined_ids.add(candidate["id"])
+        if reply.get("draft"):
+            candidate["combined_draft"] = reply["draft"]
+        self._apply_extraction(candidate, coerce_to_schema(reply["extraction"], EXTRACTION_SCHEMA), "combined")
+        return candidate
+
+    def _request_extraction(self, prompt: str, max_tokens: int) -> dict:
+        """Request a single extraction via the record_extraction tool."""
+        return call_structured(
+            self.client,
+            model=self.model,
+            max_tokens=max_tokens,
+            prompt=prompt,
+            tool_name="record_extraction",
+            description="Record the structured classification of one candidate.",
+            schema=EXTRACTION_SCHEMA,
+            stats=self.parse_stats,
+            usage=self.usage,
+            tier="full",
+        )
+
+    def _apply_extraction(self, candidate: dict, extracted: dict, path: str = "full"):
+        """Copy extraction results onto the candidate and hand it to on_enriched."""
+        candidate["extracted"] = extracted
+        candidate["confidence"] = extracted.get("confidence", 0.5)
+        candidate["is_relevant"] = extracted.get("is_relevant", True)
+        candidate["is_new_test"] = extracted.get("is_new_test", False)
+        candidate["is_new_indication"] = extracted.get("is_new_indication", False)
+        candidate["enrichment_path"] = path
+        if self.on_enriched is not None:
+            self.on_enriched(candidate)
+
+    def _apply_indication(self, candidate: dict, result: dict):
+        """Expand a new-indication answer into a full extraction record."""
+        linked = [t for t in (self.test_index.get(i) for i in candidate["linked_tests"]) if t]
+        primary = linked[0] if linked else {}
+
+        extracted = coerce_to_schema(result, EXTRACTION_SCHEMA)
+        existing_name = extracted.get("existing_test_name") or primary.get("name")
+        extracted["is_new_test"] = False
+        extracted["existing_test_name"] = existing_name
+        extracted["test_name"] = existing_name
+        extracted["company"] = primary.get("vendor") or candidate.get("company")
+        extracted["category"] = primary.get("category")
+        self._apply_extraction(candidate, extracted, "indication")
+
+    def _apply_triage(self, candidate: dict, result: dict):
+        """Record a triage score; screened-out candidates get a not-relevant extraction."""
+        relevance = result.get("relevance", 0.0)
+        candidate["triage_relevance"] = relevance
+        if relevance >= self.triage_config["escalation_threshold"]:
+            return
+        extracted = coerce_to_schema({
+            "is_new_test": False,
+            "is_new_indication": False,
+            "is_relevant": False,
+            "relevance_reason": f"Screened out by triage: {result.get('reason', '')}".strip(),
+            "confidence": round(1 - relevance, 2),
+        }, EXTRACTION_SCHEMA)
+        self._apply_extraction(candidate, extracted, "triage")
+
+    def _mark_failed(self, candidate: dict, error: str):
+        """Record an enrichment failure on the candidate."""
+        candidate["extracted"] = None
+        candidate["confidence"] = 0
+        candidate["enrichment_error"] = error
+
+    def _defer(self, candidates: list[dict]):
+        """Flag candidates whose request did not fit the budget, for carryover."""
+        for candidate in candidates:
+            candidate["enrichment_deferred"] = True
 
     async def enrich(self, candidate: dict) -> dict:
         """Enrich a single candidate with Claude extraction."""
-        raw_data = json.dumps(candidate.get("raw_data", {}), indent=2)
-        if len(raw_data) > 6000:
-            raw_data = raw_data[:6000] + "\n... [truncated]"
+        raw_data = self._format_raw_data(candidate, 6000)
 
         prompt = EXTRACTION_PROMPT.format(
             source=candidate["source"],
@@ -98,50 +613,266 @@ class ClaudeEnricher:
             title=candidate.get("title", ""),
             company=candidate.get("company", ""),
             date=candidate.get("date", ""),
+            known_tests=self._known_tests(candidate),
             raw_data=raw_data,
         )
 
+        self._mark_started([candidate])
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                messages=[{"role": "user", "content": prompt}],
+            extracted = await self._call(
+                self.model, prompt, self.max_tokens, self._request_extraction, prompt, self.max_tokens
             )
+            self._apply_extraction(candidate, extracted)
 
-            content = response.content[0].text.strip()
-            
-            # Handle markdown code blocks
-            if content.startswith("```"):
-                lines = content.split("\n")
-                content = "\n".join(lines[1:-1] if lines[-1].strip() == "```" else lines[1:])
-                content = content.strip()
-
-            extracted = json.loads(content)
-
-            candidate["extracted"] = extracted
-            candidate["confidence"] = extracted.get("confidence", 0.5)
-            candidate["is_relevant"] = extracted.get("is_relevant", True)
-            candidate["is_new_test"] = extracted.get("is_new_test", False)
-            candidate["is_new_indication"] = extracted.get("is_new_indication", False)
-
-        except json.JSONDecodeError as e:
-            print(f"      JSON parse error: {e}")
-            candidate["extracted"] = None
-            candidate["confidence"] = 0
-            candidate["enrichment_error"] = f"JSON parse: {str(e)}"
+        except BudgetExhausted:
+            self._defer([candidate])
+        except StructuredOutputError as e:
+            print(f"      Structured output error: {e}")
+            self._mark_failed(candidate, f"Structured output: {str(e)}")
         except Exception as e:
             print(f"      Enrichment error: {e}")
-            candidate["extracted"] = None
-            candidate["confidence"] = 0
-            candidate["enrichment_error"] = str(e)
+            self._mark_failed(candidate, str(e))
 
         return candidate
 
+    def _group_config(self, mode: str) -> dict:
+        """Batch sizing for the full, new-indication or triage path."""
+        if mode == "indication":
+            return {
+                **self.batch_config,
+                "raw_data_chars": self.linker_config["raw_data_chars"],
+                "output_tokens_per_candidate": self.linker_config["output_tokens_per_candidate"],
+            }
+        if mode == "triage":
+            return {**self.batch_config, **self.triage_config}
+        return self.batch_config
+
+    def _model_for(self, mode: str) -> str:
+        return self.triage_config["model"] if mode == "triage" else self.model
+
+    def plan_batches(self, candidates: list[dict], mode: str = "full") -> list[list[dict]]:
+        """
+        Group candidates into batches that fit the token budget.
+
+        A batch closes when adding the next candidate would exceed either the
+        input token budget or the output budget implied by max_output_tokens.
+        """
+        cfg = self._group_config(mode)
+        max_by_output = max(1, cfg["max_output_tokens"] // cfg["output_tokens_per_candidate"])
+        max_per_batch = min(cfg["max_candidates"], max_by_output)
+
+        batches = []
+        current = []
+        current_tokens = 0
+        for candidate in candidates:
+            block = self._format_candidate(candidate, cfg["raw_data_chars"], mode)
+            tokens = len(block) // CHARS_PER_TOKEN
+            if current and (
+                len(current) >= max_per_batch
+                or current_tokens + tokens > cfg["input_token_budget"]
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(candidate)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _batch_prompt(self, group: list[dict], mode: str = "full") -> tuple[str, int]:
+        """Prompt and max_tokens for classifying a group in one request."""
+        cfg = self._group_config(mode)
+        blocks = [
+            f"### CANDIDATE {c['id']}\n{self._format_candidate(c, cfg['raw_data_chars'], mode)}"
+            for c in group
+        ]
+        prompt = BATCH_MODES[mode]["prompt"].format(count=len(group), candidates="\n".join(blocks))
+        max_tokens = min(
+            cfg["max_output_tokens"],
+            len(group) * cfg["output_tokens_per_candidate"],
+        )
+        return prompt, max_tokens
+
+    def _request_batch(self, prompt: str, max_tokens: int, mode: str = "full") -> dict[str, dict]:
+        """Classify a group in one request. Returns results keyed by candidate ID."""
+        spec = BATCH_MODES[mode]
+        reply = call_structured(
+            self.client,
+            model=self._model_for(mode),
+            max_tokens=max_tokens,
+            prompt=prompt,
+            tool_name=spec["tool"],
+            description=spec["description"],
+            schema=spec["schema"],
+            stats=self.parse_stats,
+            usage=self.usage,
+            tier=mode,
+        )
+
+        by_id = {}
+        for item in reply["results"]:
+            if isinstance(item, dict) and item.get("candidate_id"):
+                by_id[str(item.pop("candidate_id"))] = item
+        return by_id
+
+    async def _enrich_group(self, group: list[dict], mode: str = "full") -> None:
+        """
+        Enrich a group in one request, splitting and retrying on parse failures.
+
+        On the indication and triage paths, candidates that need full extraction
+        (flagged is_new_test, or triaged at/above the threshold) are left
+        unenriched so that enrich_batch passes them on.
+        """
+        if len(group) == 1 and mode == "combined":
+            await self.enrich_combined(group[0])
+            return
+        if len(group) == 1 and mode == "full":
+            await self.enrich(group[0])
+            return
+
+        prompt, max_tokens = self._batch_prompt(group, mode)
+        self._mark_started(group)
+        try:
+            results = await self._call(
+                self._model_for(mode), prompt, max_tokens, self._request_batch, prompt, max_tokens, mode
+            )
+        except BudgetExhausted:
+            self._defer(group)
+            return
+        except StructuredOutputError as e:
+            if len(group) == 1:
+                self._mark_failed(group[0], f"Structured output: {str(e)}")
+                return
+            print(f"      Batch of {len(group)} failed structured output ({e}) - splitting")
+            results = {}
+        except Exception as e:
+            print(f"      Batch enrichment error: {e}")
+            for candidate in group:
+                self._mark_failed(candidate, str(e))
+            return
+
+        missing = []
+        for candidate in group:
+            result = results.get(candidate["id"])
+            if result is None:
+                missing.append(candidate)
+            elif mode == "full":
+                self._apply_extraction(candidate, result)
+            elif mode == "indication":
+                if not result.get("is_new_test"):
+                    self._apply_indication(candidate, result)
+            else:
+                self._apply_triage(candidate, result)
+
+        if not missing:
+            return
+        if len(missing) < len(group):
+            await self._enrich_group(missing, mode)
+        elif len(missing) == 1:
+            self._mark_failed(missing[0], "Missing from batch response")
+        else:
+            mid = len(missing) // 2
+            await self._enrich_group(missing[:mid], mode)
+            await self._enrich_group(missing[mid:], mode)
+
+    def _jobs(self) -> JobQueue:
+        """Queue for group requests: the governor's, else one request at a time in submission order."""
+        return self.governor.queue() if self.governor else JobQueue(1)
+
+    def _submit_groups(self, jobs: JobQueue, batches: list[list[dict]], mode: str, label: str):
+        """Queue planned groups, each at the priority of its most urgent candidate."""
+        def job(i: int, group: list[dict]):
+            async def run():
+                title = group[0].get("title", "Unknown")[:40]
+                print(f"  [{mode} batch {i+1}/{len(batches)}] {label} {len(group)} candidates: {title}...")
+                await self._enrich_group(group, mode)
+            return run
+
+        for i, group in enumerate(batches):
+            priority = min(self.governor.priority(c) for c in group) if self.governor else ()
+            jobs.submit(priority, job(i, group))
+
+    async def _run_groups(self, batches: list[list[dict]], mode: str, label: str):
+        """Enrich planned groups; with a governor they run concurrently, highest priority first."""
+        async with self._jobs() as jobs:
+            self._submit_groups(jobs, batches, mode, label)
+
+    async def _run_tier(self, candidates: list[dict], mode: str, label: str) -> list[dict]:
+        """
+        Run a cheap tier over candidates. Returns those that still need full extraction.
+
+        Candidates that fail on a cheap tier are passed on rather than dropped.
+        """
+        self.usage.add_candidates(mode, self._model_for(mode), len(candidates))
+        batches = self.plan_batches(self._order(candidates), mode)
+        await self._run_groups(batches, mode, label)
+
+        passed_on = [
+            c for c in candidates if not c.get("extracted") and not c.get("enrichment_deferred")
+        ]
+        for candidate in passed_on:
+            candidate.pop("enrichment_error", None)
+        return passed_on
+
     async def enrich_batch(self, candidates: list[dict]) -> list[dict]:
-        """Enrich multiple candidates."""
-        enriched = []
-        for i, candidate in enumerate(candidates):
-            print(f"  [{i+1}/{len(candidates)}] Enriching: {candidate.get('title', 'Unknown')[:50]}...")
-            enriched_candidate = await self.enrich(candidate)
-            enriched.append(enriched_candidate)
-        return enriched
+        """
+        Enrich multiple candidates, several per request when batching is enabled.
+
+        Linked candidates take the new-indication path (when route_linked is set),
+        the rest go through triage (when use_triage is set); whatever remains gets
+        full extraction with the main model. Combined extract-and-draft requests
+        for source-rule candidates start right away, alongside the tiers, and
+        share one priority queue with the full extraction requests.
+        """
+        # Candidates carried over with an extraction already only need drafting
+        pending = [c for c in candidates if not c.get("extracted")]
+        if self.on_enriched is not None:
+            for candidate in candidates:
+                if candidate.get("extracted"):
+                    self.on_enriched(candidate)
+
+        use_combined = self.use_combined and self.on_enriched is not None
+        # Combined and full requests share one priority queue; combined ones start right away
+        async with self._jobs() as jobs:
+            if use_combined:
+                combined = self._order([c for c in pending if self._wants_combined(c)])
+                pending = [c for c in pending if not self._wants_combined(c)]
+                if combined:
+                    self.usage.add_candidates("combined", self.model, len(combined))
+                    self._submit_groups(jobs, [[c] for c in combined], "combined", "Enriching and drafting")
+
+            if self.route_linked:
+                linked = [c for c in pending if c.get("linked_tests")]
+                if linked:
+                    escalated = await self._run_tier(linked, "indication", "Checking linked")
+                    if escalated:
+                        print(f"  {len(escalated)} linked candidates escalated to full extraction")
+                    pending = [c for c in pending if not c.get("linked_tests")] + escalated
+
+            if self.use_triage and pending:
+                unlinked = [c for c in pending if not c.get("linked_tests")]
+                relevant = await self._run_tier(unlinked, "triage", "Triaging")
+                print(f"  Triage escalated {len(relevant)} of {len(unlinked)} candidates")
+                pending = [c for c in pending if c.get("linked_tests")] + relevant
+
+            if use_combined:
+                # Pre-classifier rule: items triage is confident about will almost surely be drafted
+                threshold = self.combined_config["triage_threshold"]
+                promoted = self._order([c for c in pending if c.get("triage_relevance", 0) >= threshold])
+                pending = [c for c in pending if c.get("triage_relevance", 0) < threshold]
+                if promoted:
+                    self.usage.add_candidates("combined", self.model, len(promoted))
+                    self._submit_groups(jobs, [[c] for c in promoted], "combined", "Enriching and drafting")
+
+            self.usage.add_candidates("full", self.model, len(pending))
+            pending = self._order(pending)
+            if not self.batch_config["enabled"]:
+                batches = [[candidate] for candidate in pending]
+            else:
+                batches = self.plan_batches(pending)
+            self._submit_groups(jobs, batches, "full", "Enriching")
+
+        deferred = sum(1 for c in candidates if c.get("enrichment_deferred"))
+        if deferred:
+            print(f"  {deferred} candidates deferred by the LLM budget")
+        return list(candidates)
@@ -0,0 +1,283 @@
+"""
+LLM budget governor: daily token/spend budgets, concurrency limits and priority scheduling.
+
+Every Claude request from the enricher and drafter goes through one governor.
+Spend is recorded in a per-day ledger on disk, so budgets hold across runs on
+the same day. Candidates whose requests do not fit the remaining budget are
+written to a carryover file and picked up by the next run.
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from llm import estimate_cost
+
+
+# Lower rank is scheduled first
+SOURCE_RANK = {"fda": 0, "news": 1, "clinicaltrials": 2, "pubmed": 3}
+
+
+class BudgetExhausted(Exception):
+    """Raised when a request would exceed the daily budget or the run's time limit."""
+
+
+class BudgetLedger:
+    """Per-day token and spend totals, persisted as JSON."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.days = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError as e:
+            print(f"  Warning: could not read {self.path.name} ({e}); starting a new ledger")
+            return {}
+
+    @property
+    def today(self) -> dict:
+        return self.days.setdefault(datetime.now().strftime("%Y-%m-%d"), {
+            "requests": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cost_usd": 0.0,
+        })
+
+    @property
+    def tokens_today(self) -> int:
+        return self.today["input_tokens"] + self.today["output_tokens"]
+
+    @property
+    def cost_today(self) -> float:
+        return self.today["cost_usd"]
+
+    def charge(self, input_tokens: int, output_tokens: int, cost: float):
+        """Add one request to today's totals."""
+        day = self.today
+        day["requests"] += 1
+        day["input_tokens"] += input_tokens
+        day["output_tokens"] += output_tokens
+        day["cost_usd"] += cost
+
+    def save(self, keep_days: int = 30):
+        """Write the ledger, keeping only the most recent days."""
+        for day in sorted(self.days)[:-keep_days]:
+            del self.days[day]
+        with open(self.path, "w") as f:
+            json.dump(self.days, f, indent=2)
+
+
+def on_watchlist(candidate: dict, names: set[str]) -> bool:
+    """
+    Whether the candidate's company is a watchlist company (names lowercased).
+    An exact join: dedup has already replaced the company with its canonical
+    name (companies.py).
+    """
+    return (candidate.get("company") or "").lower() in names
+
+
+def pre_score(candidate: dict) -> float:
+    """Cheap relevance signal available before full extraction (0-1)."""
+    if "triage_relevance" in candidate:
+        return candidate["triage_relevance"]
+    score = 0.0
+    if candidate.get("linked_tests"):
+        score += 0.5
+    if candidate.get("linked_vendors"):
+        score += 0.3
+    return score
+
+
+class JobQueue:
+    """
+    (priority, coroutine function) jobs run by a fixed number of workers, lowest
+    priority key first, for as long as the queue is open (async with). Jobs
+    submitted while earlier ones run still go ahead of waiting lower-priority
+    work. Leaving the block waits for every job; an error cancels the rest.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._queue = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._tasks: list[asyncio.Task] = []
+
+    def submit(self, priority: tuple, job):
+        self._queue.put_nowait(((0, priority), next(self._seq), job))
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            if job is None:
+                return
+            await job()
+
+    async def __aenter__(self) -> "JobQueue":
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                # Stop markers sort after every job
+                for _ in self._tasks:
+                    self._queue.put_nowait(((1,), next(self._seq), None))
+                await asyncio.gather(*self._tasks)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class LLMGovernor:
+    """
+    Hands out Claude requests in priority order within daily budgets.
+
+    Requests run in worker threads (the Anthropic client is synchronous) with at
+    most max_concurrency in flight. Before each request the estimated tokens and
+    cost are reserved against what is left of today's budget; a request that
+    does not fit raises BudgetExhausted instead of being sent.
+    """
+
+    def __init__(self, config: dict, pricing: dict, watchlist: list[dict], ledger_path: Path, carryover_path: Path):
+        self.config = config
+        self.pricing = pricing
+        self.ledger = BudgetLedger(ledger_path)
+        self.carryover_path = Path(carryover_path)
+        self.watchlist = {c["name"].lower() for c in watchlist}
+        self.max_concurrency = config["max_concurrency"]
+        self.deadline = time.monotonic() + config["max_run_seconds"] if config.get("max_run_seconds") else None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._reserved_tokens = 0
+        self._reserved_cost = 0.0
+        # Reservations and charges also come from worker threads (repair requests, UsageTracker)
+        self._lock = threading.Lock()
+        self.deferred_requests = 0
+
+    # Priority
+
+    def priority(self, candidate: dict) -> tuple:
+        """Sort key: source rank, then watchlist companies, then higher pre-score."""
+        return (
+            SOURCE_RANK.get(candidate.get("source"), len(SOURCE_RANK)),
+            0 if on_watchlist(candidate, self.watchlist) else 1,
+            -pre_score(candidate),
+        )
+
+    def order(self, candidates: list[dict]) -> list[dict]:
+        """Candidates in the order their requests should be made."""
+        return sorted(candidates, key=self.priority)
+
+    # Budget
+
+    @property
+    def remaining_tokens(self) -> int:
+        return self.config["daily_token_budget"] - self.ledger.tokens_today - self._reserved_tokens
+
+    @property
+    def remaining_cost(self) -> float:
+        return self.config["daily_cost_budget_usd"] - self.ledger.cost_today - self._reserved_cost
+
+    def fits(self, model: str, input_tokens: int, output_tokens: int) -> bool:
+        """Whether a request of this size fits what is left of today's budget."""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            return False
+        return (
+            input_tokens + output_tokens <= self.remaining_tokens
+            and estimate_cost(self.pricing, model, input_tokens, output_tokens) <= self.remaining_cost
+        )
+
+    def charge(self, input_tokens: int, output_tokens: int, cost: float):
+        """Record actual usage of a completed request (called by UsageTracker)."""
+        with self._lock:
+            self.ledger.charge(input_tokens, output_tokens, cost)
+
+    @contextmanager
+    def reserve(self, model: str, input_tokens: int, output_tokens: int):
+        """
+        Hold a reservation for one request of about this size while it runs;
+        raises BudgetExhausted if it does not fit. Thread-safe: a repair request
+        made inside a governed call (llm.call_structured) reserves from its
+        worker thread.
+        """
+        with self._lock:
+            if not self.fits(model, input_tokens, output_tokens):
+                self.deferred_requests += 1
+                raise BudgetExhausted(
+                    f"request of ~{input_tokens + output_tokens:,} tokens does not fit "
+                    f"(remaining {max(self.remaining_tokens, 0):,} tokens, ${max(self.remaining_cost, 0):.2f})"
+                )
+            tokens = input_tokens + output_tokens
+            cost = estimate_cost(self.pricing, model, input_tokens, output_tokens)
+            self._reserved_tokens += tokens
+            self._reserved_cost += cost
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._reserved_tokens -= tokens
+                self._reserved_cost -= cost
+
+    async def call(self, model: str, input_tokens: int, output_tokens: int, fn, *args, **kwargs):
+        """
+        Run a synchronous request function under the budget and concurrency limits.
+
+        input_tokens/output_tokens are estimates used for the reservation; actual
+        usage is charged by the UsageTracker when the response arrives. A repair
+        request fn makes after a bad reply takes a reservation of its own
+        (UsageTracker.reserve), in the same concurrency slot.
+        """
+        async with self._semaphore:
+            with self.reserve(model, input_tokens, output_tokens):
+                return await asyncio.to_thread(fn, *args, **kwargs)
+
+    def queue(self) -> "JobQueue":
+        """An open priority queue with max_concurrency workers (see JobQueue)."""
+        return JobQueue(self.max_concurrency)
+
+    async def run(self, jobs: list[tuple[tuple, object]]):
+        """
+        Run (priority, coroutine function) jobs from a priority queue.
+
+        max_concurrency workers pull the highest-priority job next, so when the
+        budget runs out it is the low-priority work that gets deferred.
+        """
+        async with JobQueue(min(self.max_concurrency, len(jobs))) as queue:
+            for priority, job in jobs:
+                queue.submit(priority, job)
+
+    # Carryover
+
+    def load_carryover(self) -> list[dict]:
+        """Candidates deferred by a previous run."""
+        try:
+            with open(self.carryover_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def save_carryover(self, candidates: list[dict]):
+        """Replace the carryover file with this run's deferred candidates."""
+        with open(self.carryover_path, "w") as f:
+            json.dump(candidates, f, indent=2, default=str)
+
+    def save(self):
+        self.ledger.save()
+
+    def summary(self) -> str:
+        """One-line budget summary for run output."""
+        return (
+            f"today {self.ledger.tokens_today:,}/{self.config['daily_token_budget']:,} tokens, "
+            f"${self.ledger.cost_today:.2f}/${self.config['daily_cost_budget_usd']:.2f}; "
+            f"{self.deferred_requests} requests deferred"
+        )
@@ -0,0 +1,370 @@
+"""
+Searchable history of discovered candidates (SQLite with FTS5).
+
+Every run's archived candidates (archive.py) are indexed into
+data/history.sqlite3 when the run saves them:
+
+    candidates       one row per candidate ID (latest run wins), with the
+                     archived record as JSON; indexed on source, discovered_at,
+                     category and confidence
+    candidates_fts   full text of title, company, extracted fields and notes
+                     (relevance reason, extraction notes, raw_summary)
+    runs             archive files already indexed, and their size then
+
+The index can always be rebuilt from the archive (`main.py search --reindex`),
+which also picks up candidates_<date>.json files from before the archive.
+
+    python main.py search "methylation colorectal" --since 6m --source fda
+    CandidateHistory(path).search("guardant OR natera", category="MRD", min_confidence=0.7)
+"""
+
+import json
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from config import CONFIG
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    run_id TEXT,
+    source TEXT,
+    discovered_at TEXT,
+    date TEXT,
+    title TEXT,
+    company TEXT,
+    test_name TEXT,
+    category TEXT,
+    confidence REAL,
+    is_relevant INTEGER,
+    is_new_test INTEGER,
+    is_new_indication INTEGER,
+    source_url TEXT,
+    record TEXT
+);
+CREATE INDEX IF NOT EXISTS candidates_source ON candidates(source, discovered_at);
+CREATE INDEX IF NOT EXISTS candidates_discovered ON candidates(discovered_at);
+CREATE INDEX IF NOT EXISTS candidates_category ON candidates(category, discovered_at);
+CREATE INDEX IF NOT EXISTS candidates_confidence ON candidates(confidence);
+CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+    title, company, extracted, notes, tokenize = 'porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS runs (
+    file TEXT PRIMARY KEY,
+    run_id TEXT,
+    records INTEGER,
+    bytes INTEGER,
+    indexed_at TEXT
+);
+"""
+
+# Extraction fields searched as "extracted"
+EXTRACTED_FIELDS = (
+    "test_name", "existing_test_name", "company", "category", "secondary_categories",
+    "cancer_types", "sample_type", "methodology", "approach", "fda_status", "biomarkers",
+    "key_claims", "new_indication_details",
+)
+
+# bm25 weights for title, company, extracted, notes
+RANK_WEIGHTS = (10.0, 5.0, 3.0, 1.0)
+
+RESULT_COLUMNS = (
+    "id", "run_id", "source", "discovered_at", "date", "title", "company",
+    "test_name", "category", "confidence", "is_relevant", "source_url",
+)
+
+FTS_OPERATORS = {"AND", "OR", "NOT"}
+
+
+def _text(value) -> str:
+    if isinstance(value, list):
+        return " ".join(_text(v) for v in value)
+    if isinstance(value, dict):
+        return " ".join(_text(v) for v in value.values())
+    return "" if value is None else str(value)
+
+
+def fts_query(text: str) -> str:
+    """
+    An FTS5 query from search-box text: words and "quoted phrases" must all
+    match, OR/NOT/AND work between them, and a trailing * matches a prefix.
+    Other punctuation is not FTS syntax, so "510(k)" is just a phrase.
+
+    Repeated operators collapse to one (the last, or NOT: "a OR OR b" is
+    "a OR b", "a AND NOT b" is "a NOT b") and a dangling AND/OR is dropped. FTS5 cannot exclude
+    without something to exclude from, so a leading NOT, or NOT mixed with
+    OR, raises ValueError instead of changing what the query means.
+    """
+    parts = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        if word in FTS_OPERATORS:
+            if parts and isinstance(parts[-1], list):
+                parts[-1].append(word)
+            else:
+                parts.append([word])
+            continue
+        prefix = word.endswith("*")
+        terms = re.findall(r"\w+", phrase or word)
+        if terms:
+            parts.append('"' + " ".join(terms) + '"' + ("*" if prefix else ""))
+
+    # A trailing operator has nothing to apply to
+    while parts and isinstance(parts[-1], list):
+        parts.pop()
+    if parts and isinstance(parts[0], list):
+        if "NOT" in parts[0]:
+            raise ValueError("NOT needs a term before it: search for what to keep, then NOT what to leave out")
+        parts.pop(0)
+
+    query = []
+    for part in parts:
+        if isinstance(part, str):
+            query.append(part)
+        elif "NOT" in part and "OR" in part:
+            raise ValueError("NOT cannot follow OR: NOT excludes from what comes before it")
+        else:
+            query.append("NOT" if "NOT" in part else part[-1])
+    return " ".join(query)
+
+
+def parse_when(value: str) -> str:
+    """An ISO date from YYYY-MM-DD or a span back from now: 30d, 8w, 6m, 2y."""
+    match = re.fullmatch(r"(\d+)([dwmy])", value.strip().lower())
+    if match is None:
+        return datetime.strptime(value.strip(), "%Y-%m-%d").date().isoformat()
+    count, unit = int(match.group(1)), match.group(2)
+    days = count * {"d": 1, "w": 7, "m": 30, "y": 365}[unit]
+    return (datetime.now() - timedelta(days=days)).date().isoformat()
+
+
+class CandidateHistory:
+    """Index and query API over data/history.sqlite3."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Indexing
+
+    def add(self, candidates, run_id: str | None = None) -> int:
+        """Index candidates (a re-indexed ID replaces its row). Returns how many were written."""
+        count = 0
+        with self.db:
+            for candidate in candidates:
+                self._upsert(candidate, run_id)
+                count += 1
+        return count
+
+    def _upsert(self, candidate: dict, run_id: str | None):
+        extracted = candidate.get("extracted") or {}
+        record = {k: v for k, v in candidate.items() if k != "raw_data"}
+        row = self.db.execute(
+            """
+            INSERT INTO candidates (id, run_id, source, discovered_at, date, title, company, test_name,
+                                    category, confidence, is_relevant, is_new_test, is_new_indication,
+                                    source_url, record)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                run_id = excluded.run_id, source = excluded.source, discovered_at = excluded.discovered_at,
+                date = excluded.date, title = excluded.title, company = excluded.company,
+                test_name = excluded.test_name, category = excluded.category, confidence = excluded.confidence,
+                is_relevant = excluded.is_relevant, is_new_test = excluded.is_new_test,
+                is_new_indication = excluded.is_new_indication, source_url = excluded.source_url,
+                record = excluded.record
+            RETURNING rowid
+            """,
+            (
+                candidate["id"],
+                run_id or candidate.get("run_id"),
+                candidate.get("source"),
+                candidate.get("discovered_at"),
+                candidate.get("date"),
+                candidate.get("title"),
+                candidate.get("company"),
+                extracted.get("test_name"),
+                extracted.get("category"),
+                candidate.get("confidence"),
+                candidate.get("is_relevant"),
+                candidate.get("is_new_test"),
+                candidate.get("is_new_indication"),
+                candidate.get("source_url"),
+                json.dumps(record, default=str),
+            ),
+        ).fetchone()
+        rowid = row[0]
+        notes = [extracted.get("relevance_reason"), extracted.get("notes"), candidate.get("raw_summary")]
+        self.db.execute("DELETE FROM candidates_fts WHERE rowid = ?", (rowid,))
+        self.db.execute(
+            "INSERT INTO candidates_fts (rowid, title, company, extracted, notes) VALUES (?, ?, ?, ?, ?)",
+            (
+                rowid,
+                candidate.get("title") or "",
+                candidate.get("company") or "",
+                _text([extracted.get(field) for field in EXTRACTED_FIELDS]),
+                _text(notes),
+            ),
+        )
+
+    def index_file(self, path: Path, run_id: str | None = None, force: bool = False) -> int:
+        """
+        Index an archive run file (or a legacy candidates_<date>.json). Files
+        indexed before are skipped unless they have grown since. Returns the
+        number of candidates indexed.
+        """
+        from archive import read_run
+
+        path = Path(path)
+        size = path.stat().st_size
+        key = str(path.resolve())
+        row = self.db.execute("SELECT bytes FROM runs WHERE file = ?", (key,)).fetchone()
+        if row is not None and row["bytes"] == size and not force:
+            return 0
+        if path.suffix == ".jsonl":
+            run_id = run_id or path.stem
+            candidates = read_run(path)
+        else:
+            run_id = run_id or path.stem.removeprefix("candidates_")
+            with open(path, "r") as f:
+                candidates = json.load(f)
+        count = self.add(candidates, run_id)
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO runs (file, run_id, records, bytes, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, run_id, count, size, datetime.now().isoformat(timespec="seconds")),
+            )
+        return count
+
+    def reindex(self, archive_dir: Path, output_dir: Path | None = None, force: bool = False) -> int:
+        """Index every archived run (and legacy candidates_*.json in output_dir). Returns candidates indexed."""
+        files = []
+        if output_dir is not None:
+            files += sorted(Path(output_dir).glob("candidates_*.json"))
+        files += sorted(Path(archive_dir).glob("*/*.jsonl"))
+        return sum(self.index_file(path, force=force) for path in files)
+
+    # Queries
+
+    def search(
+        self,
+        text: str | None = None,
+        source: str | None = None,
+        category: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        min_confidence: float | None = None,
+        relevant_only: bool = False,
+        limit: int = 20,
+    ) -> list[dict]:
+        """
+        Matching candidates, best match first (newest first without text).
+
+        since/until are ISO dates (see parse_when) compared with when the
+        candidate was discovered. Results with text carry a snippet.
+        """
+        where, params = [], []
+        if source:
+            where.append("c.source = ?")
+            params.append(source)
+        if category:
+            where.append("c.category = ?")
+            params.append(category.upper())
+        if since:
+            where.append("c.discovered_at >= ?")
+            params.append(since)
+        if until:
+            # Inclusive of the whole `until` day
+            where.append("c.discovered_at < ?")
+            params.append((datetime.fromisoformat(until) + timedelta(days=1)).date().isoformat())
+        if min_confidence is not None:
+            where.append("c.confidence >= ?")
+            params.append(min_confidence)
+        if relevant_only:
+            where.append("c.is_relevant = 1")
+
+        columns = ", ".join(f"c.{column}" for column in RESULT_COLUMNS)
+        query = fts_query(text or "")
+        if not query:
+            sql = (
+                f"SELECT {columns} FROM candidates c "
+                f"{'WHERE ' + ' AND '.join(where) if where else ''} "
+                "ORDER BY c.discovered_at DESC LIMIT ?"
+            )
+            return [dict(row) for row in self.db.execute(sql, [*params, limit])]
+
+        # Rank first, then snippet only the rows returned: snippet() in the
+        # ranking query would run on every match, not just the top `limit`.
+        # Without filters the ranking reads the FTS index alone and only the
+        # top rows are joined (about half the time for broad queries).
+        score = f"bm25(candidates_fts, {', '.join(str(w) for w in RANK_WEIGHTS)})"
+        if where:
+            sql = (
+                f"SELECT c.rowid AS rowid, {columns} "
+                "FROM candidates_fts JOIN candidates c ON c.rowid = candidates_fts.rowid "
+                f"WHERE candidates_fts MATCH ? AND {' AND '.join(where)} ORDER BY {score} LIMIT ?"
+            )
+        else:
+            sql = (
+                f"SELECT c.rowid AS rowid, {columns} FROM ("
+                f"SELECT rowid, {score} AS score FROM candidates_fts "
+                "WHERE candidates_fts MATCH ? ORDER BY score LIMIT ?"
+                ") f JOIN candidates c ON c.rowid = f.rowid ORDER BY f.score"
+            )
+        results = [dict(row) for row in self.db.execute(sql, [query, *params, limit])]
+        if results:
+            rowids = [r.pop("rowid") for r in results]
+            snippets = dict(self.db.execute(
+                "SELECT rowid, snippet(candidates_fts, -1, '[', ']', '…', 12) FROM candidates_fts "
+                f"WHERE candidates_fts MATCH ? AND rowid IN ({', '.join('?' * len(rowids))})",
+                [query, *rowids],
+            ).fetchall())
+            for rowid, result in zip(rowids, results):
+                result["snippet"] = snippets.get(rowid)
+        return results
+
+    def get(self, candidate_id: str) -> dict | None:
+        """The indexed record of one candidate (as archived, raw_data as a raw_ref)."""
+        row = self.db.execute("SELECT record FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+        return json.loads(row["record"]) if row else None
+
+    def stats(self) -> dict:
+        row = self.db.execute(
+            "SELECT COUNT(*) AS candidates, MIN(discovered_at) AS first, MAX(discovered_at) AS last FROM candidates"
+        ).fetchone()
+        runs = self.db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        return {**dict(row), "files": runs}
+
+
+def index_run(path: Path, run_id: str | None = None) -> int:
+    """
+    Index a run's archive file into the history store. Failures are reported,
+    not raised: the run's output is safe in the archive and `search --reindex`
+    can catch up.
+    """
+    if not CONFIG["history"]["enabled"]:
+        return 0
+    start = time.perf_counter()
+    try:
+        with CandidateHistory(CONFIG["paths"]["history"]) as history:
+            count = history.index_file(path, run_id=run_id)
+    except sqlite3.Error as e:
+        print(f"  History not updated ({e}); run `python main.py search --reindex` later")
+        return 0
+    print(f"  Indexed {count} candidates for search in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return count
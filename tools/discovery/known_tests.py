@@ -0,0 +1,117 @@
+"""
+Known-test index: local retrieval over OpenOnco test records in src/data/tests/*.json.
+"""
+
+import json
+import math
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from blobstore import BLOBS
+
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+]*")
+
+# Field weights for scoring: a name hit matters more than a method hit
+FIELD_WEIGHTS = {"name": 3.0, "vendor": 2.0, "method": 1.0}
+
+# Very common words in test records that carry no identifying signal
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "for", "in", "on", "with", "to", "by", "or",
+    "test", "assay", "cancer", "based", "from", "via", "using", "plus",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens, minus stopwords."""
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class KnownTestIndex:
+    """TF-IDF style index over test name, vendor and method for nearest-test lookup."""
+
+    def __init__(self, tests_dir: Path):
+        self.tests_dir = Path(tests_dir)
+        self.tests = self._load_tests()
+        self._postings = self._build_postings()
+        self._by_id = {test["id"]: test for test in self.tests}
+
+    def get(self, test_id: str) -> dict | None:
+        """Look up a test by OpenOnco ID."""
+        return self._by_id.get(test_id)
+
+    def _load_tests(self) -> list[dict]:
+        """Load the compact fields of every test record."""
+        tests = []
+        for path in sorted(self.tests_dir.glob("*.json")):
+            try:
+                with open(path, "r") as f:
+                    records = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"  Warning: could not load {path.name}: {e}")
+                continue
+            for record in records:
+                if not record.get("name"):
+                    continue
+                test_id = record.get("id", "")
+                tests.append({
+                    "id": test_id,
+                    "name": record["name"],
+                    "vendor": record.get("vendor", ""),
+                    "method": record.get("method", "") or "",
+                    "category": test_id.split("-")[0].upper() if test_id else path.stem.upper(),
+                    "aliases": [record["previousName"]] if record.get("previousName") else [],
+                })
+        return tests
+
+    def _build_postings(self) -> dict[str, list[tuple[int, float]]]:
+        """Build token -> [(test index, weighted tf-idf)] postings."""
+        term_weights = []
+        doc_freq = defaultdict(int)
+        for test in self.tests:
+            weights = defaultdict(float)
+            for field, field_weight in FIELD_WEIGHTS.items():
+                for token in tokenize(test[field]):
+                    weights[token] += field_weight
+            term_weights.append(weights)
+            for token in weights:
+                doc_freq[token] += 1
+
+        n_docs = max(len(self.tests), 1)
+        postings = defaultdict(list)
+        for i, weights in enumerate(term_weights):
+            for token, weight in weights.items():
+                idf = math.log(1 + n_docs / doc_freq[token])
+                postings[token].append((i, (1 + math.log(weight)) * idf))
+        return dict(postings)
+
+    def search(self, text: str, k: int = 8) -> list[dict]:
+        """Return up to k tests most similar to the given free text."""
+        scores = defaultdict(float)
+        for token in set(tokenize(text)):
+            for i, weight in self._postings.get(token, ()):
+                scores[i] += weight
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [self.tests[i] for i, _ in ranked]
+
+    def search_candidate(self, candidate: dict, k: int = 8, raw_chars: int = 2000) -> list[dict]:
+        """Nearest existing tests for a raw candidate (title, company, start of raw_data)."""
+        raw = json.dumps(BLOBS.raw_data(candidate))[:raw_chars]
+        # Title and company are repeated so they outweigh incidental raw_data terms
+        text = " ".join([candidate.get("title", "")] * 2 + [candidate.get("company", "")] * 2 + [raw])
+        return self.search(text, k)
+
+    @staticmethod
+    def format_tests(tests: list[dict], method_chars: int = 80, mentioned: set[str] = frozenset()) -> str:
+        """Render tests as compact prompt lines; IDs in `mentioned` are flagged [mentioned]."""
+        if not tests:
+            return "- (no similar tests found)"
+        lines = []
+        for test in tests:
+            method = test["method"]
+            if len(method) > method_chars:
+                method = method[:method_chars].rstrip() + "..."
+            flag = " [mentioned]" if test["id"] in mentioned else ""
+            lines.append(f"- {test['name']} ({test['vendor']}) [{test['category']}]{flag}: {method}")
+        return "\n".join(lines)
@@ -0,0 +1,235 @@
+"""
+Known-test linker: tags candidates with the existing OpenOnco tests and vendors they mention.
+
+Patterns are built from test names, previous names, derived aliases and vendor
+names in src/data/tests/*.json, and matched as token n-grams in a single pass
+over each candidate's text.
+"""
+
+import json
+import re
+import sys
+import time
+
+from blobstore import BLOBS
+from known_tests import KnownTestIndex
+
+
+LINK_TOKEN_RE = re.compile(r"[a-z0-9]+\+?")
+
+# Trailing words dropped to form a shorter alias ("clonoSEQ Assay" -> "clonoSEQ")
+SUFFIX_TOKENS = {"assay", "test", "kit", "dx", "cdx"}
+
+# Parenthetical qualifiers that are not names in their own right ("(RUO)", "(MRD)")
+QUALIFIER_TOKENS = {
+    "mrd", "trm", "ruo", "platform", "io", "monitoring", "therapy", "selected",
+    "variants", "tube", "1", "2", "+",
+}
+
+# Legal/brand suffixes stripped from vendor names ("Tempus AI" -> "Tempus")
+VENDOR_SUFFIX_TOKENS = {"inc", "llc", "ltd", "corp", "corporation", "ai", "dx"}
+
+# Words that are too common to identify a test on their own. An alias made only
+# of these (e.g. "Gastric Cancer Panel", "Shield") links only if the test's
+# vendor is mentioned as well.
+GENERIC_TOKENS = {
+    "a", "and", "the", "of", "for", "in", "with", "by", "via", "powered",
+    "cancer", "cancers", "test", "panel", "assay", "kit", "blood", "plasma",
+    "tissue", "liquid", "multi", "hereditary", "comprehensive", "full", "common",
+    "expanded", "breast", "lung", "colorectal", "prostate", "pancreatic",
+    "thyroid", "gastric", "liver", "bladder", "oral", "throat", "detection",
+    "screen", "mutation", "profiling", "focus", "plus", "select", "response",
+    "monitor", "tracker", "trace", "solid", "tumor", "hematology", "mrd", "dx",
+    "shield", "latitude", "reveal", "precise", "radar", "signal", "c", "x",
+}
+
+# Minimum alias length (characters) so that short codes do not link by accident
+MIN_ALIAS_CHARS = 4
+
+
+def link_tokens(text: str) -> list[str]:
+    """Lowercase tokens used for pattern matching (keeps a trailing '+')."""
+    return LINK_TOKEN_RE.findall((text or "").lower())
+
+
+def _name_aliases(name: str) -> set[str]:
+    """Aliases for a test name: without parentheticals, without suffixes, and the parenthetical itself."""
+    aliases = {name}
+    base = re.sub(r"\s*\([^)]*\)", "", name).strip()
+    if base:
+        aliases.add(base)
+    for inner in re.findall(r"\(([^)]*)\)", name):
+        if any(t not in QUALIFIER_TOKENS for t in link_tokens(inner)):
+            aliases.add(inner.strip())
+    for alias in list(aliases):
+        tokens = alias.split()
+        while len(tokens) > 1 and tokens[-1].lower() in SUFFIX_TOKENS:
+            tokens = tokens[:-1]
+            aliases.add(" ".join(tokens))
+    return aliases
+
+
+def _vendor_aliases(vendor: str) -> set[str]:
+    """Company names inside a vendor string ("Abbott (Exact Sciences)" -> Abbott, Exact Sciences)."""
+    aliases = set()
+    for part in re.split(r"[()/,]", vendor or ""):
+        part = part.strip()
+        # Skip lowercase fragments such as "commercialized by Abbott" or "brbiotech"
+        if not part or not part[0].isupper():
+            continue
+        aliases.add(part)
+        tokens = part.split()
+        while len(tokens) > 1 and tokens[-1].lower().rstrip(".") in VENDOR_SUFFIX_TOKENS:
+            tokens = tokens[:-1]
+            aliases.add(" ".join(tokens))
+    return aliases
+
+
+def candidate_text(candidate: dict, max_chars: int = 4000) -> str:
+    """Title, company and string values from raw_data, capped at max_chars."""
+    parts = [candidate.get("title", ""), candidate.get("company", "")]
+    budget = max_chars - sum(len(p) for p in parts)
+
+    stack = [BLOBS.raw_data(candidate)]
+    while stack and budget > 0:
+        value = stack.pop()
+        if isinstance(value, str):
+            parts.append(value[:budget])
+            budget -= len(value)
+        elif isinstance(value, dict):
+            stack.extend(reversed(list(value.values())))
+        elif isinstance(value, list):
+            stack.extend(reversed(value))
+    return " ".join(parts)
+
+
+class KnownTestLinker:
+    """Multi-pattern matcher from known test and vendor names to OpenOnco IDs."""
+
+    def __init__(self, index: KnownTestIndex):
+        self.index = index
+        # token tuple -> list of ("test", id, needs_vendor) / ("vendor", name, False)
+        self._patterns: dict[tuple[str, ...], list[tuple[str, str, bool]]] = {}
+        self._test_vendors: dict[str, set[str]] = {}
+        self._build()
+        self._first_tokens = {key[0] for key in self._patterns}
+        self._max_len = max((len(key) for key in self._patterns), default=0)
+
+    def _add(self, alias: str, entry: tuple[str, str, bool]):
+        key = tuple(link_tokens(alias))
+        if not key or len("".join(key)) < MIN_ALIAS_CHARS:
+            return
+        entries = self._patterns.setdefault(key, [])
+        if entry not in entries:
+            entries.append(entry)
+
+    def _build(self):
+        for test in self.index.tests:
+            vendors = _vendor_aliases(test["vendor"])
+            self._test_vendors[test["id"]] = vendors
+            for vendor in vendors:
+                self._add(vendor, ("vendor", vendor, False))
+
+            names = set()
+            for name in [test["name"], *test.get("aliases", [])]:
+                names |= _name_aliases(name)
+            for alias in names:
+                needs_vendor = all(t in GENERIC_TOKENS for t in link_tokens(alias))
+                self._add(alias, ("test", test["id"], needs_vendor))
+
+    @property
+    def pattern_count(self) -> int:
+        return len(self._patterns)
+
+    def link_text(self, text: str) -> tuple[list[str], list[str]]:
+        """Return (test IDs, vendor names) mentioned in text, in order of first mention."""
+        tokens = link_tokens(text)
+        first_tokens = self._first_tokens
+        patterns = self._patterns
+        tests: list[tuple[str, bool]] = []
+        vendors: list[str] = []
+
+        i = 0
+        n_tokens = len(tokens)
+        while i < n_tokens:
+            if tokens[i] not in first_tokens:
+                i += 1
+                continue
+            # Longest match wins ("Signatera Genome" over "Signatera")
+            for n in range(min(self._max_len, n_tokens - i), 0, -1):
+                entries = patterns.get(tuple(tokens[i:i + n]))
+                if entries:
+                    for kind, value, needs_vendor in entries:
+                        if kind == "vendor":
+                            if value not in vendors:
+                                vendors.append(value)
+                        else:
+                            tests.append((value, needs_vendor))
+                    i += n
+                    break
+            else:
+                i += 1
+
+        vendor_set = set(vendors)
+        test_ids = []
+        for test_id, needs_vendor in tests:
+            if test_id in test_ids:
+                continue
+            if needs_vendor and not (self._test_vendors.get(test_id, set()) & vendor_set):
+                continue
+            test_ids.append(test_id)
+        return test_ids, vendors
+
+    def link(self, candidate: dict, max_chars: int = 4000) -> tuple[list[str], list[str]]:
+        """Link a raw candidate using its title, company and raw_data text."""
+        return self.link_text(candidate_text(candidate, max_chars))
+
+    def tag(self, candidates: list[dict], max_chars: int = 4000) -> int:
+        """Set linked_tests/linked_vendors on each candidate. Returns the number linked to a test."""
+        linked = 0
+        for candidate in candidates:
+            test_ids, vendors = self.link(candidate, max_chars)
+            candidate["linked_tests"] = test_ids
+            candidate["linked_vendors"] = vendors
+            if test_ids:
+                linked += 1
+        return linked
+
+
+def _benchmark(n_titles: int):
+    """Time link_text over synthetic PubMed-style titles."""
+    import random
+    from config import CONFIG
+
+    index = KnownTestIndex(CONFIG["paths"]["tests_dir"])
+    linker = KnownTestLinker(index)
+    rng = random.Random(0)
+    names = [t["name"] for t in index.tests]
+    filler = (
+        "circulating tumor DNA analysis in patients with resected stage II colon cancer "
+        "a prospective multicenter cohort study of minimal residual disease detection"
+    ).split()
+    titles = []
+    for _ in range(n_titles):
+        words = rng.sample(filler, 12)
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), rng.choice(names))
+        titles.append(" ".join(words))
+
+    start = time.perf_counter()
+    hits = sum(1 for title in titles if linker.link_text(title)[0])
+    elapsed = time.perf_counter() - start
+    print(f"Patterns: {linker.pattern_count}")
+    print(f"Linked {hits}/{n_titles} titles in {elapsed:.3f}s ({n_titles / elapsed:,.0f} titles/sec)")
+
+
+if __name__ == "__main__":
+    # Usage: python linker.py --bench [N]   |   python linker.py "some title"
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench":
+        _benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 50000)
+    elif len(sys.argv) > 1:
+        from config import CONFIG
+
+        linker = KnownTestLinker(KnownTestIndex(CONFIG["paths"]["tests_dir"]))
+        test_ids, vendors = linker.link_text(" ".join(sys.argv[1:]))
+        print(json.dumps({"tests": test_ids, "vendors": vendors}, indent=2))
@@ -0,0 +1,404 @@
+"""
+Structured Claude calls: tool-use schemas, near-miss repair and parse statistics.
+"""
+
+import json
+import re
+import threading
+import time
+from contextlib import nullcontext
+
+from tracing import TRACER
+
+
+# Rough chars-per-token ratio used to size requests without a tokenizer round trip
+CHARS_PER_TOKEN = 4
+
+
+REPAIR_PROMPT = """Your reply could not be used because it did not match the required structure.
+
+Problems found:
+{problems}
+
+Call the `{tool_name}` tool again. Keep every value you already extracted and only fix
+the structure (missing fields, wrong types, malformed JSON). Take any missing value from
+the request above; do not make up values it does not support.
+"""
+
+
+class StructuredOutputError(Exception):
+    """Raised when a reply cannot be turned into data matching the schema."""
+
+
+class ParseStats:
+    """Tracks how structured replies were obtained, for failure-rate reporting."""
+
+    OUTCOMES = ("tool_use", "coerced", "text_repaired", "repair_call", "failed")
+
+    def __init__(self):
+        self.counts = {outcome: 0 for outcome in self.OUTCOMES}
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    @property
+    def calls(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def failure_rate(self) -> float:
+        return self.counts["failed"] / self.calls if self.calls else 0.0
+
+    def summary(self) -> str:
+        """One-line summary for run output."""
+        parts = ", ".join(f"{k}={v}" for k, v in self.counts.items() if v)
+        return f"{self.calls} structured calls ({parts or 'none'}), {self.failure_rate:.1%} failed"
+
+
+def estimate_cost(pricing: dict, model: str, input_tokens: int, output_tokens: int) -> float:
+    """Estimated USD cost from CONFIG pricing (per million tokens)."""
+    price = pricing.get(model, {"input": 0.0, "output": 0.0})
+    return (input_tokens * price["input"] + output_tokens * price["output"]) / 1_000_000
+
+
+class UsageTracker:
+    """
+    Per-tier request counts, latency, tokens and estimated cost.
+
+    When a governor is given, every recorded request is also charged to its
+    daily budget ledger.
+    """
+
+    def __init__(self, pricing: dict, governor=None):
+        self.pricing = pricing
+        self.governor = governor
+        self.tiers: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _tier(self, tier: str, model: str) -> dict:
+        return self.tiers.setdefault(tier, {
+            "model": model,
+            "requests": 0,
+            "candidates": 0,
+            "latency_s": 0.0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cost_usd": 0.0,
+        })
+
+    def cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
+        return estimate_cost(self.pricing, model, input_tokens, output_tokens)
+
+    def record(self, tier: str, model: str, latency: float, input_tokens: int, output_tokens: int):
+        """Record one API request (may be called from worker threads)."""
+        cost = self.cost(model, input_tokens, output_tokens)
+        with self._lock:
+            stats = self._tier(tier, model)
+            stats["requests"] += 1
+            stats["latency_s"] += latency
+            stats["input_tokens"] += input_tokens
+            stats["output_tokens"] += output_tokens
+            stats["cost_usd"] += cost
+            if self.governor is not None:
+                self.governor.charge(input_tokens, output_tokens, cost)
+
+    def reserve(self, model: str, input_tokens: int, output_tokens: int):
+        """Budget reservation for an extra request inside a governed call (a no-op without a governor)."""
+        if self.governor is None:
+            return nullcontext()
+        return self.governor.reserve(model, input_tokens, output_tokens)
+
+    def add_candidates(self, tier: str, model: str, count: int):
+        """Record how many candidates a tier handled."""
+        with self._lock:
+            self._tier(tier, model)["candidates"] += count
+
+    @property
+    def total_cost(self) -> float:
+        return sum(t["cost_usd"] for t in self.tiers.values())
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(t["input_tokens"] + t["output_tokens"] for t in self.tiers.values())
+
+    def report(self) -> dict:
+        """Machine-readable per-tier report."""
+        return {
+            tier: {**stats, "avg_latency_s": stats["latency_s"] / stats["requests"] if stats["requests"] else 0.0}
+            for tier, stats in self.tiers.items()
+        }
+
+    def summary_lines(self) -> list[str]:
+        """Human-readable per-tier lines for run output."""
+        lines = []
+        for tier, stats in self.report().items():
+            lines.append(
+                f"{tier:<10} {stats['model']}: {stats['candidates']} candidates, "
+                f"{stats['requests']} requests, {stats['avg_latency_s']:.1f}s avg, "
+                f"{stats['input_tokens']:,} in / {stats['output_tokens']:,} out tokens, "
+                f"${stats['cost_usd']:.4f}"
+            )
+        lines.append(f"{'total':<10} ${self.total_cost:.4f}")
+        return lines
+
+
+def _default_for(prop: dict):
+    """Neutral value for a schema property the model left out."""
+    types = prop.get("type", "string")
+    if isinstance(types, list):
+        return None if "null" in types else _default_for({"type": types[0]})
+    return {"array": [], "boolean": False, "object": {}}.get(types)
+
+
+def _coerce_value(value, prop: dict):
+    """Coerce a near-miss value (e.g. "0.8", "true", "Lung") to the schema type."""
+    types = prop.get("type")
+    if types is None:
+        return value
+    if not isinstance(types, list):
+        types = [types]
+    if value is None:
+        return None if "null" in types else _default_for(prop)
+
+    if "array" in types and not isinstance(value, list):
+        return [value] if value not in ("", None) else []
+    if "array" in types and "items" in prop and prop["items"].get("type") == "object":
+        # An item missing a required field is dropped rather than filled with defaults
+        # (a missing is_relevant is not False); batch callers retry what is missing
+        return [coerce_to_schema(v, prop["items"]) for v in value if not schema_problems(v, prop["items"])]
+    if "boolean" in types and isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("true", "yes"):
+            return True
+        if lowered in ("false", "no"):
+            return False
+    if "number" in types and isinstance(value, str):
+        try:
+            return float(value.strip().rstrip("%"))
+        except ValueError:
+            return None if "null" in types else value
+    if "string" in types and isinstance(value, list) and "array" not in types:
+        return ", ".join(str(v) for v in value)
+    if "object" in types and isinstance(value, dict) and "properties" in prop:
+        return coerce_to_schema(value, prop)
+    return value
+
+
+def coerce_to_schema(data: dict, schema: dict) -> dict:
+    """Fill missing properties with neutral defaults and coerce near-miss types."""
+    properties = schema.get("properties", {})
+    result = dict(data)
+    for name, prop in properties.items():
+        if name in result:
+            result[name] = _coerce_value(result[name], prop)
+        else:
+            result[name] = _default_for(prop)
+    return result
+
+
+def schema_problems(data, schema: dict, items: bool = True, path: str = "") -> list[str]:
+    """
+    List structural problems that coercion cannot fix: required fields missing
+    at any depth. With items=False, the items of object arrays (a batch's
+    per-candidate results) are not checked.
+    """
+    if not isinstance(data, dict):
+        return [f"expected a JSON object{f' at {path}' if path else ''}, got {type(data).__name__}"]
+    problems = [
+        f"missing required field '{path}{name}'"
+        for name in schema.get("required", [])
+        if data.get(name) is None
+    ]
+    for name, prop in schema.get("properties", {}).items():
+        value = data.get(name)
+        if isinstance(value, dict) and "properties" in prop:
+            problems.extend(schema_problems(value, prop, items, f"{path}{name}."))
+        elif items and isinstance(value, list) and prop.get("items", {}).get("type") == "object":
+            for i, item in enumerate(value):
+                problems.extend(schema_problems(item, prop["items"], items, f"{path}{name}[{i}]."))
+    return problems
+
+
+def repair_json(text: str):
+    """
+    Parse JSON from a reply that is almost valid.
+
+    Handles markdown fences, prose around the JSON, trailing commas, Python
+    literals and smart quotes. Raises json.JSONDecodeError if still unparseable.
+    """
+    content = text.strip()
+    if content.startswith("```"):
+        lines = content.split("\n")
+        content = "\n".join(lines[1:-1] if lines[-1].strip() == "```" else lines[1:]).strip()
+
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        pass
+
+    # Keep only the outermost object/array
+    starts = [i for i in (content.find("{"), content.find("[")) if i >= 0]
+    if starts:
+        start = min(starts)
+        end = max(content.rfind("}"), content.rfind("]"))
+        if end > start:
+            content = content[start:end + 1]
+
+    content = (
+        content.replace("“", '"').replace("”", '"')
+        .replace("‘", "'").replace("’", "'")
+    )
+    content = re.sub(r",(\s*[\]}])", r"\1", content)
+    content = re.sub(r"\bTrue\b", "true", content)
+    content = re.sub(r"\bFalse\b", "false", content)
+    content = re.sub(r"\bNone\b", "null", content)
+    return json.loads(content)
+
+
+def _response_payload(response, tool_name: str):
+    """Return (tool_input, text) from a Messages API response."""
+    text_parts = []
+    for block in response.content:
+        if getattr(block, "type", None) == "tool_use" and block.name == tool_name:
+            return block.input, ""
+        if getattr(block, "type", None) == "text":
+            text_parts.append(block.text)
+    return None, "\n".join(text_parts)
+
+
+def _assistant_turn(response) -> list[dict]:
+    """A reply's text and tool_use blocks as message content, to send back in a follow-up request."""
+    blocks = []
+    for block in response.content:
+        kind = getattr(block, "type", None)
+        if kind == "tool_use":
+            blocks.append({"type": "tool_use", "id": block.id, "name": block.name, "input": block.input})
+        elif kind == "text" and block.text:
+            blocks.append({"type": "text", "text": block.text})
+    return blocks or [{"type": "text", "text": "(no reply)"}]
+
+
+def _repair_turn(assistant: list[dict], text: str) -> list[dict] | str:
+    """The user turn answering a bad reply: an error result for each tool call, or plain text."""
+    tool_ids = [block["id"] for block in assistant if block["type"] == "tool_use"]
+    if not tool_ids:
+        return text
+    return [{"type": "tool_result", "tool_use_id": i, "is_error": True, "content": text} for i in tool_ids]
+
+
+def _create(client, usage: UsageTracker | None, tier: str, repair: bool = False, **kwargs):
+    """messages.create with latency and token accounting (one trace span per request)."""
+    with TRACER.span(f"llm.{tier}", kind="llm", model=kwargs["model"]) as span:
+        if repair:
+            span["retries"] = 1
+        start = time.perf_counter()
+        response = client.messages.create(**kwargs)
+        tokens = getattr(response, "usage", None)
+        input_tokens = getattr(tokens, "input_tokens", 0) or 0
+        output_tokens = getattr(tokens, "output_tokens", 0) or 0
+        span["input_tokens"] = input_tokens
+        span["output_tokens"] = output_tokens
+        span["cache_read_tokens"] = getattr(tokens, "cache_read_input_tokens", 0) or 0
+        span["stop_reason"] = getattr(response, "stop_reason", None)
+        if usage is not None:
+            usage.record(tier, kwargs["model"], time.perf_counter() - start, input_tokens, output_tokens)
+    return response
+
+
+def call_structured(
+    client,
+    model: str,
+    max_tokens: int,
+    prompt: str,
+    tool_name: str,
+    description: str,
+    schema: dict,
+    stats: ParseStats,
+    usage: UsageTracker | None = None,
+    tier: str = "default",
+) -> dict:
+    """
+    Ask Claude for data matching `schema` via forced tool use.
+
+    Near-miss replies are coerced locally; anything still broken gets one
+    repair request, which resends the original prompt and the bad reply so
+    the model can take what is missing from the source. Items of a batch's
+    results that lack a required field are dropped for the caller to retry.
+    Raises StructuredOutputError if all of that fails.
+    """
+    tool = {"name": tool_name, "description": description, "input_schema": schema}
+    messages = [{"role": "user", "content": prompt}]
+    response = _create(
+        client,
+        usage,
+        tier,
+        model=model,
+        max_tokens=max_tokens,
+        tools=[tool],
+        tool_choice={"type": "tool", "name": tool_name},
+        messages=messages,
+    )
+
+    if getattr(response, "stop_reason", None) == "max_tokens":
+        # A truncated reply cannot be repaired in place; callers split the work instead
+        stats.record("failed")
+        raise StructuredOutputError("reply was cut off at max_tokens")
+
+    data, text = _response_payload(response, tool_name)
+    outcome = "tool_use"
+    if data is None:
+        try:
+            data = repair_json(text)
+            outcome = "text_repaired"
+        except json.JSONDecodeError as e:
+            data = None
+            problems = [f"reply was not valid JSON ({e})"]
+
+    if isinstance(data, list) and schema.get("required") == ["results"]:
+        # A bare array where a {"results": [...]} wrapper was expected
+        data = {"results": data}
+
+    if data is not None:
+        # Required fields must come from the model; coercion only fills optional ones
+        problems = schema_problems(data, schema, items=False)
+        if not problems:
+            coerced = coerce_to_schema(data, schema)
+            if outcome == "tool_use" and any(coerced[k] != v for k, v in data.items() if k in coerced):
+                outcome = "coerced"
+            stats.record(outcome)
+            return coerced
+
+    assistant = _assistant_turn(response)
+    repair_text = REPAIR_PROMPT.format(problems="\n".join(f"- {p}" for p in problems), tool_name=tool_name)
+    messages = messages + [
+        {"role": "assistant", "content": assistant},
+        {"role": "user", "content": _repair_turn(assistant, repair_text)},
+    ]
+    # A request of its own: under a governor it needs its own budget reservation
+    tokens = getattr(response, "usage", None)
+    repair_input = (
+        (getattr(tokens, "input_tokens", 0) or len(prompt) // CHARS_PER_TOKEN)
+        + (getattr(tokens, "output_tokens", 0) or 0)
+        + len(repair_text) // CHARS_PER_TOKEN
+    )
+    with usage.reserve(model, repair_input, max_tokens) if usage is not None else nullcontext():
+        repair = _create(
+            client,
+            usage,
+            tier,
+            repair=True,
+            model=model,
+            max_tokens=max_tokens,
+            tools=[tool],
+            tool_choice={"type": "tool", "name": tool_name},
+            messages=messages,
+        )
+    data, _ = _response_payload(repair, tool_name)
+    if isinstance(data, dict) and not schema_problems(data, schema, items=False):
+        stats.record("repair_call")
+        return coerce_to_schema(data, schema)
+
+    stats.record("failed")
+    raise StructuredOutputError("; ".join(problems))
@@ -2,159 +2,299 @@
 """
 OpenOnco Test Discovery Agent
 Discovers new cancer diagnostic tests from multiple sources.
+
+    python main.py [run] [--skip-email ...]     # full streaming pipeline
+    python main.py collect|dedup|enrich|draft|digest|notify [--run ID]
+    python main.py backfill --from 2026-01-01 --to 2026-03-31 [--run ID]
+    python main.py outbox [--flush] [--now]
+    python main.py search "ctDNA methylation" [--since 6m] [--source fda] ...
+    python main.py yields
+    python main.py daemon
+
+Each command imports what it needs when it runs, so commands that make no
+API calls (dedup, digest) start without loading httpx or the Anthropic SDK.
 """
 
-import asyncio
-from datetime import datetime
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
 
-from config import CONFIG
-from collectors import FDACollector, PubMedCollector, NewsCollector, ClinicalTrialsCollector
-from normalizer import Normalizer
-from enricher import ClaudeEnricher
-from drafter import SubmissionDrafter
-from output import OutputHandler
-from notifications import notify_candidates
+from config import CONFIG, ensure_dirs, validate_config
 
 
-async def run_discovery(skip_enrichment: bool = False, skip_email: bool = False, skip_drafts: bool = False):
-    """Main discovery pipeline."""
-    print(f"\n{'='*60}")
-    print(f"OpenOnco Discovery Agent - {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-    print(f"{'='*60}\n")
+COMMANDS = (
+    "run", "collect", "backfill", "dedup", "enrich", "draft", "digest", "notify", "outbox", "search",
+    "yields", "daemon", "eval-cascade", "eval-drafts",
+)
 
-    # Initialize components
-    normalizer = Normalizer(
-        data_js_path=CONFIG["paths"]["data_js"],
-        seen_path=CONFIG["paths"]["seen_candidates"]
-    )
-    output = OutputHandler(CONFIG["paths"]["output_dir"])
-
-    # Initialize collectors
-    collectors = [
-        FDACollector(),
-        PubMedCollector(CONFIG["watchlist"]["search_terms"]),
-        NewsCollector(CONFIG["watchlist"]["companies"]),
-        ClinicalTrialsCollector(CONFIG["watchlist"]["search_terms"]),
-    ]
-
-    # Collect from all sources
-    print("PHASE 1: Collecting from sources...")
-    all_candidates = []
-    for collector in collectors:
-        print(f"  → {collector.name}...")
+# Flags from before subcommands, still accepted: --daemon, --eval-cascade F, --eval-drafts F
+LEGACY_COMMANDS = {"--daemon": "daemon", "--eval-cascade": "eval-cascade", "--eval-drafts": "eval-drafts"}
+
+
+def _sources(value: str) -> list[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def _run_async(coroutine):
+    import asyncio  # ~35ms (pulls in ssl); not needed by dedup or digest
+
+    return asyncio.run(coroutine)
+
+
+def cmd_run(args):
+    from runner import run_discovery
+
+    _run_async(run_discovery(
+        skip_enrichment=args.skip_enrichment,
+        skip_email=args.skip_email,
+        skip_drafts=args.skip_drafts,
+        resume=args.resume,
+        new=args.new,
+        sources=args.sources,
+        profile=args.profile,
+        prom_file=args.prom_file,
+    ))
+
+
+def cmd_collect(args):
+    from steps import collect
+
+    _run_async(collect(args.run, sources=args.sources))
+
+
+def cmd_backfill(args):
+    from backfill import backfill
+
+    _run_async(backfill(args.start, args.end, sources=args.sources, run_id=args.run, window_days=args.window_days))
+
+
+def cmd_dedup(args):
+    from steps import dedup
+
+    dedup(args.run)
+
+
+def cmd_enrich(args):
+    from steps import enrich
+
+    _run_async(enrich(args.run))
+
+
+def cmd_draft(args):
+    from steps import draft
+
+    _run_async(draft(args.run))
+
+
+def cmd_digest(args):
+    from steps import digest
+
+    digest(args.run)
+
+
+def cmd_notify(args):
+    from steps import notify
+
+    _run_async(notify(args.run))
+
+
+def cmd_outbox(args):
+    from notifications import flush_outbox, open_outbox
+
+    outbox = open_outbox()
+    if args.flush or args.now:
+        _run_async(flush_outbox(outbox, close_open=args.now))
+    lines = outbox.status_lines()
+    print(f"Notification outbox ({outbox.path}):")
+    for line in lines or ["empty"]:
+        print(f"  {line}")
+
+
+def cmd_search(args):
+    import json
+    import sqlite3
+    import time
+
+    from history import CandidateHistory, parse_when
+
+    path = CONFIG["paths"]["history"]
+    if not path.exists() and not args.reindex:
+        print(f"No search history at {path}; build it with: python main.py search --reindex")
+        return
+    with CandidateHistory(path) as history:
+        if args.reindex:
+            start = time.perf_counter()
+            count = history.reindex(CONFIG["paths"]["archive_dir"], CONFIG["paths"]["output_dir"], force=True)
+            print(f"Indexed {count} candidates in {time.perf_counter() - start:.1f}s")
+            if not args.query:
+                return
+        start = time.perf_counter()
         try:
-            candidates = await collector.collect()
-            print(f"    Found {len(candidates)} raw candidates")
-            all_candidates.extend(candidates)
-        except Exception as e:
-            print(f"    Error: {e}")
-
-    print(f"\nTotal raw candidates: {len(all_candidates)}")
-
-    if not all_candidates:
-        print("\nNo candidates found from any source.")
-        return []
-
-    # Normalize and deduplicate
-    print("\nPHASE 2: Deduplicating...")
-    new_candidates = normalizer.process(all_candidates)
-    print(f"New candidates after dedup: {len(new_candidates)}")
-
-    if not new_candidates:
-        print("\nNo new candidates - all have been seen before or exist in OpenOnco.")
-        return []
-
-    # Enrich with Claude
-    if not skip_enrichment:
-        print(f"\nPHASE 3: Enriching {len(new_candidates)} candidates with Claude...")
-        enricher = ClaudeEnricher()
-        enriched = await enricher.enrich_batch(new_candidates)
-    else:
-        print("\nPHASE 3: Skipping enrichment (--skip-enrichment flag)")
-        enriched = new_candidates
-
-    # Filter to relevant NEW candidates only
-    relevant = [
-        c for c in enriched 
-        if c.get("is_relevant", True) 
-        and not c.get("extracted", {}).get("is_existing_test_update", False)
-    ]
-    print(f"\nRelevant NEW candidates: {len(relevant)} of {len(enriched)}")
-
-    # Generate draft submissions for high-confidence candidates
-    drafts = []
-    if not skip_drafts and not skip_enrichment:
-        print("\nPHASE 4: Generating draft submissions...")
-        drafter = SubmissionDrafter()
-        drafts = drafter.generate_drafts(enriched, min_confidence=0.75)
-        print(f"  Generated {len(drafts)} drafts")
-    else:
-        print("\nPHASE 4: Skipping draft generation")
-
-    # Generate output
-    print("\nPHASE 5: Generating output...")
-    output_path = output.save_candidates(enriched)
-    print(f"  Saved to: {output_path}")
-
-    # Save drafts separately
-    if drafts:
-        drafts_path = output.output_dir / f"drafts_{datetime.now().strftime('%Y-%m-%d')}.txt"
-        with open(drafts_path, "w") as f:
-            for draft in drafts:
-                f.write(f"\n{'='*60}\n")
-                f.write(f"TEST: {draft.get('test_name')} ({draft.get('category')})\n")
-                f.write(f"{'='*60}\n\n")
-                f.write(draft.get('draft', ''))
-                f.write("\n\n")
-        print(f"  Saved drafts to: {drafts_path}")
-
-    # Update seen candidates
-    normalizer.mark_seen(enriched)
-
-    # Generate digest
-    digest = output.generate_digest(enriched)
-    print(f"\n{'='*60}")
-    print("DAILY DIGEST")
-    print(f"{'='*60}")
-    print(digest)
-
-    # Send email notification
-    if not skip_email:
-        print("\nPHASE 6: Sending notifications...")
-        notify_candidates(enriched, drafts=drafts)
-    else:
-        print("\nPHASE 6: Skipping email (--skip-email flag)")
-
-    return enriched
-
-
-def main():
-    """Entry point with CLI args."""
-    import sys
-    
-    skip_enrichment = "--skip-enrichment" in sys.argv
-    skip_email = "--skip-email" in sys.argv
-    skip_drafts = "--skip-drafts" in sys.argv
-    
-    if "--help" in sys.argv:
-        print("""
-OpenOnco Discovery Agent
-
-Usage: python main.py [options]
-
-Options:
-  --skip-enrichment  Skip Claude enrichment (faster, for testing collectors)
-  --skip-drafts      Skip draft submission generation
-  --skip-email       Don't send email notification
-  --help             Show this help
-        """)
+            results = history.search(
+                " ".join(args.query) or None,
+                source=args.source,
+                category=args.category,
+                since=parse_when(args.since) if args.since else None,
+                until=parse_when(args.until) if args.until else None,
+                min_confidence=args.min_confidence,
+                relevant_only=args.relevant,
+                limit=args.limit,
+            )
+        except (ValueError, sqlite3.OperationalError) as e:
+            print(f"Cannot search for {' '.join(args.query)!r}: {e}")
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+    if args.json:
+        print(json.dumps(results, indent=2))
         return
-    
-    asyncio.run(run_discovery(
-        skip_enrichment=skip_enrichment,
-        skip_email=skip_email,
-        skip_drafts=skip_drafts,
-    ))
+    for r in results:
+        confidence = f"{r['confidence']:.2f}" if r["confidence"] is not None else "  - "
+        print(f"{(r['discovered_at'] or '')[:10]}  {r['source']:<14} {confidence}  {r['title']}"
+              + (f" — {r['company']}" if r["company"] else ""))
+        details = [r["category"], r["test_name"], r.get("snippet")]
+        print(f"    {' | '.join(d for d in details if d)}  [{r['id']}, run {r['run_id']}]")
+    print(f"{len(results)} result{'s' if len(results) != 1 else ''} in {elapsed:.1f}ms")
+
+
+def cmd_yields(args):
+    from scheduler import QueryScheduler
+
+    scheduler = QueryScheduler(CONFIG["paths"]["query_yield"], CONFIG["scheduler"])
+    lines = scheduler.report_lines()
+    print(f"Query yield ({scheduler.path}), relevant candidates per request, most productive first:")
+    for line in lines or ["no runs recorded yet"]:
+        print(f"  {line}")
+
+
+def cmd_daemon(args):
+    from daemon import DiscoveryDaemon
+
+    daemon = DiscoveryDaemon(
+        skip_enrichment=args.skip_enrichment,
+        skip_email=args.skip_email,
+        skip_drafts=args.skip_drafts,
+    )
+    _run_async(daemon.run())
+
+
+def cmd_eval_cascade(args):
+    from cascade_eval import evaluate_cascade
+
+    _run_async(evaluate_cascade(args.file, CONFIG["paths"]["output_dir"]))
+
+
+def cmd_eval_drafts(args):
+    from draft_eval import evaluate_drafters
+
+    _run_async(evaluate_drafters(args.file, CONFIG["paths"]["output_dir"]))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="OpenOnco Discovery Agent",
+        epilog="With no command, `run` is assumed (python main.py --skip-email).",
+    )
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    def add(name: str, handler, help_text: str, writes: bool = True) -> argparse.ArgumentParser:
+        sub = commands.add_parser(name, help=help_text, description=help_text)
+        sub.set_defaults(handler=handler, writes=writes)
+        return sub
+
+    def run_options(sub: argparse.ArgumentParser):
+        sub.add_argument("--skip-enrichment", action="store_true",
+                         help="Skip Claude enrichment (faster, for testing collectors)")
+        sub.add_argument("--skip-drafts", action="store_true", help="Skip draft submission generation")
+        sub.add_argument("--skip-email", action="store_true", help="Don't send email notification")
+
+    def run_id(sub: argparse.ArgumentParser):
+        sub.add_argument("--run", metavar="ID", default="latest",
+                         help="Run to work on (a data/runs/ directory name; default: latest)")
+
+    run = add("run", cmd_run, "Full discovery run through the streaming pipeline")
+    run_options(run)
+    run.add_argument("--resume", metavar="ID",
+                     help='Continue an interrupted run from its checkpoint ("latest" for the most recent)')
+    run.add_argument("--new", action="store_true",
+                     help="Start a new run even if the last one over the same sources did not complete")
+    run.add_argument("--sources", type=_sources, metavar="LIST", help="Comma-separated collectors (default: all)")
+    run.add_argument("--profile", action="store_true",
+                     help="Run each phase under cProfile (stats in data/runs/<run-id>/profile/)")
+    run.add_argument("--prom-file", metavar="F", help="Write Prometheus textfile metrics to F (or set OO_PROM_TEXTFILE)")
+
+    collect = add("collect", cmd_collect, "Run collectors into a new run (or into --run ID)")
+    collect.add_argument("--run", metavar="ID", help="Add collectors to an existing run instead of starting one")
+    collect.add_argument("--sources", type=_sources, metavar="LIST", help="Comma-separated collectors (default: all)")
+    backfill = add("backfill", cmd_backfill, "Collect a past date range in concurrent windows, then dedup it once")
+    backfill.add_argument("--from", dest="start", type=date.fromisoformat, metavar="YYYY-MM-DD")
+    backfill.add_argument("--to", dest="end", type=date.fromisoformat, metavar="YYYY-MM-DD",
+                          help="Last day to collect (inclusive)")
+    backfill.add_argument("--sources", type=_sources, metavar="LIST",
+                          help="Comma-separated collectors (default: all that can be queried by date)")
+    backfill.add_argument("--window-days", type=int, metavar="N",
+                          help=f'Days per window (default: {CONFIG["backfill"]["window_days"]})')
+    backfill.add_argument("--run", metavar="ID", help="Resume a backfill: collect its unfinished windows, then dedup")
+    run_id(add("dedup", cmd_dedup, "Canonicalize, deduplicate and link a run's collected candidates"))
+    run_id(add("enrich", cmd_enrich, "Extract test details from a run's deduplicated candidates with Claude"))
+    run_id(add("draft", cmd_draft, "Draft submissions, save the run's candidates and mark them seen"))
+    run_id(add("digest", cmd_digest, "Print a run's digest from stored candidates (no API calls)", writes=False))
+    run_id(add("notify", cmd_notify, "Queue a run's finished candidates for email and send what is due"))
+    outbox = add("outbox", cmd_outbox, "Show queued notifications")
+    outbox.add_argument("--flush", action="store_true", help="Send messages whose window closed or retry is due")
+    outbox.add_argument("--now", action="store_true", help="Close open digest windows and send them now")
+
+    search = add("search", cmd_search, "Search every discovered candidate (data/history.sqlite3)", writes=False)
+    search.add_argument("query", nargs="*",
+                        help='Words, "quoted phrases", OR/NOT, prefix*; omit to list the newest')
+    search.add_argument("--source", help="Only this source (fda, pubmed, clinicaltrials, news)")
+    search.add_argument("--category", help="Only this category (MRD, ECD, TRM, TDS)")
+    search.add_argument("--since", metavar="WHEN", help="Discovered on or after YYYY-MM-DD, or within 30d/8w/6m/2y")
+    search.add_argument("--until", metavar="WHEN", help="Discovered on or before YYYY-MM-DD (or 30d/8w/6m/2y ago)")
+    search.add_argument("--min-confidence", type=float, metavar="X")
+    search.add_argument("--relevant", action="store_true", help="Only candidates enrichment found relevant")
+    search.add_argument("--limit", type=int, default=CONFIG["history"]["search_limit"])
+    search.add_argument("--json", action="store_true", help="Print results as JSON")
+    search.add_argument("--reindex", action="store_true",
+                        help="Rebuild the index from data/archive (and old candidates_*.json) first")
+
+    add("yields", cmd_yields, "Show each query's yield, as the scheduler sees it (data/query_yield.json)", writes=False)
+
+    daemon = add("daemon", cmd_daemon, 'Keep running; each source on its own interval (CONFIG["daemon"])')
+    run_options(daemon)
+
+    cascade = add("eval-cascade", cmd_eval_cascade, "Compare cascade vs single-model enrichment on archived candidates")
+    cascade.add_argument("file", type=Path, help="data/archive/YYYY-MM-DD (or one run's .jsonl)")
+    drafts = add("eval-drafts", cmd_eval_drafts, "Compare hybrid vs Claude-only drafting on archived candidates")
+    drafts.add_argument("file", type=Path, help="data/archive/YYYY-MM-DD (or one run's .jsonl)")
+    return parser
+
+
+def _normalize_argv(argv: list[str]) -> list[str]:
+    """Map the pre-subcommand flags onto commands; no command means `run`."""
+    for flag, command in LEGACY_COMMANDS.items():
+        if flag in argv:
+            argv = [arg for arg in argv if arg != flag]
+            return [command] + argv
+    if not argv or argv[0] not in COMMANDS and argv[0] not in ("-h", "--help"):
+        return ["run"] + argv
+    return argv
+
+
+def main(argv: list[str] | None = None):
+    """Entry point with CLI args."""
+    args = build_parser().parse_args(_normalize_argv(sys.argv[1:] if argv is None else argv))
+
+    problems = validate_config()
+    if problems:
+        print("Invalid configuration (config.py):")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(2)
+    if args.writes:
+        ensure_dirs()
+    args.handler(args)
 
 
 if __name__ == "__main__":
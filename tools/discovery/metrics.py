@@ -0,0 +1,171 @@
+"""
+Prometheus textfile-collector export.
+
+At the end of each run the metrics are written to a .prom file that
+node_exporter's textfile collector picks up. Counters and histogram buckets
+are cumulative across runs: their totals are kept in a JSON sidecar
+(<file>.state.json) and this run's values are added before the file is
+rewritten. The file is replaced atomically so a scrape never sees half of it.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+from tracing import TRACER
+
+
+PREFIX = "openonco_discovery"
+
+RUN_DURATION_BUCKETS = (30, 60, 120, 300, 600, 1200, 1800, 3600)
+LLM_DURATION_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+COLLECTOR_DURATION_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+class PromTextfile:
+    """Counters, gauges and histograms written in the Prometheus text format."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.state_path = self.path.with_name(self.path.name + ".state.json")
+        state = self._load_state()
+        self.counters: dict = state.get("counters", {})
+        self.histograms: dict = state.get("histograms", {})
+        self.gauges: dict = {}
+        self.help: dict[str, list[str]] = state.get("help", {})
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _key(labels: dict) -> str:
+        return json.dumps(labels, sort_keys=True)
+
+    def inc(self, name: str, help_text: str, value: float = 1, **labels):
+        self.help[name] = ["counter", help_text]
+        series = self.counters.setdefault(name, {})
+        key = self._key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, help_text: str, value: float, **labels):
+        self.help[name] = ["gauge", help_text]
+        self.gauges.setdefault(name, {})[self._key(labels)] = value
+
+    def observe(self, name: str, help_text: str, value: float, buckets: tuple, **labels):
+        self.help[name] = ["histogram", help_text]
+        series = self.histograms.setdefault(name, {})
+        hist = series.setdefault(self._key(labels), {
+            "buckets": list(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0,
+        })
+        for i, bound in enumerate(hist["buckets"]):
+            if value <= bound:
+                hist["counts"][i] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+
+    def render(self) -> str:
+        lines = []
+        for name in sorted(set(self.counters) | set(self.gauges) | set(self.histograms)):
+            kind, help_text = self.help[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(self.counters.get(name, {}).items()):
+                lines.append(f"{name}{_labels(json.loads(key))} {_number(value)}")
+            for key, value in sorted(self.gauges.get(name, {}).items()):
+                lines.append(f"{name}{_labels(json.loads(key))} {_number(value)}")
+            for key, hist in sorted(self.histograms.get(name, {}).items()):
+                labels = json.loads(key)
+                for bound, count in zip(hist["buckets"], hist["counts"]):
+                    lines.append(f"{name}_bucket{_labels({**labels, 'le': f'{bound:g}'})} {count}")
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {hist['count']}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(hist['sum'])}")
+                lines.append(f"{name}_count{_labels(labels)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        """Rewrite the .prom file (atomically) and save cumulative state."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_path, "w") as f:
+            json.dump({"counters": self.counters, "histograms": self.histograms, "help": self.help}, f)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render())
+        tmp.replace(self.path)
+
+
+def export_run(path: Path, summary: dict, candidates: list[dict], ok: bool = True):
+    """Add one discovery run (its summary, candidates and trace spans) to the textfile."""
+    prom = PromTextfile(path)
+    status = "ok" if ok else "failed"
+    prom.inc(f"{PREFIX}_runs_total", "Discovery runs by outcome.", status=status)
+    prom.observe(
+        f"{PREFIX}_run_duration_seconds", "Wall time of a discovery run.",
+        summary["duration_s"], RUN_DURATION_BUCKETS,
+    )
+    prom.set(f"{PREFIX}_last_run_timestamp_seconds", "Unix time the last run finished.", time.time())
+    prom.set(f"{PREFIX}_last_run_success", "1 if the last run completed.", 1 if ok else 0)
+
+    # Candidates
+    for span in TRACER.spans:
+        if span["kind"] == "collector":
+            source = span["name"].split(".", 1)[1]
+            prom.inc(f"{PREFIX}_raw_candidates_total", "Raw candidates returned per source.",
+                     span.get("candidates", 0), source=source)
+            prom.observe(f"{PREFIX}_collector_duration_seconds", "Collector wall time per source.",
+                         span["duration_ms"] / 1000, COLLECTOR_DURATION_BUCKETS, source=source)
+    by_source: dict[str, int] = {}
+    for candidate in candidates:
+        source = candidate.get("source", "unknown")
+        by_source[source] = by_source.get(source, 0) + 1
+    for source, count in by_source.items():
+        prom.inc(f"{PREFIX}_new_candidates_total", "New (deduplicated) candidates persisted per source.",
+                 count, source=source)
+    prom.inc(f"{PREFIX}_drafts_total", "Draft submissions generated.", summary["counts"].get("drafts", 0))
+
+    # Claude usage
+    for span in TRACER.spans:
+        if span["kind"] != "llm":
+            continue
+        tier = span["name"].split(".", 1)[1]
+        prom.inc(f"{PREFIX}_llm_requests_total", "Claude requests per tier.", tier=tier, model=span.get("model", ""))
+        prom.observe(f"{PREFIX}_llm_request_duration_seconds", "Claude request latency per tier.",
+                     span["duration_ms"] / 1000, LLM_DURATION_BUCKETS, tier=tier)
+        for direction in ("input", "output"):
+            prom.inc(f"{PREFIX}_llm_tokens_total", "Claude tokens per tier and direction.",
+                     span.get(f"{direction}_tokens", 0), tier=tier, direction=direction)
+        if span.get("retries"):
+            prom.inc(f"{PREFIX}_llm_repair_requests_total", "Repair requests for malformed replies.", tier=tier)
+    for tier, usage in (summary.get("llm") or {}).items():
+        prom.inc(f"{PREFIX}_llm_cost_usd_total", "Estimated Claude spend per tier (USD).",
+                 usage.get("cost_usd", 0), tier=tier)
+
+    # Errors; every kind is written (at 0) so rate() has a series from the first run
+    errors = {kind: 0 for kind in ("run", "collector", "http", "llm")}
+    for span in TRACER.spans:
+        if "error" in span:
+            errors[span["kind"]] = errors.get(span["kind"], 0) + 1
+    if not ok:
+        errors["run"] += 1
+    for kind, count in errors.items():
+        prom.inc(f"{PREFIX}_errors_total", "Errors by kind (run, collector, http, llm, ...).", count, kind=kind)
+
+    prom.write()
+    return prom.path
@@ -6,13 +6,16 @@ import json
 import re
 from pathlib import Path
 
+from companies import CompanyIndex
+
 
 class Normalizer:
     """Normalizes candidates and filters out already-seen items."""
 
-    def __init__(self, data_js_path: Path, seen_path: Path):
+    def __init__(self, data_js_path: Path, seen_path: Path, companies: CompanyIndex | None = None):
         self.data_js_path = data_js_path
         self.seen_path = seen_path
+        self.companies = companies
         self.existing_tests = self._load_existing_tests()
         self.seen_candidates = self._load_seen_candidates()
 
@@ -67,50 +70,65 @@ class Normalizer:
             .replace("  ", " ")
         )
 
-    def process(self, candidates: list[dict]) -> list[dict]:
+    def canonicalize(self, candidate: dict) -> dict:
         """
-        Process raw candidates:
-        1. Remove duplicates within batch
-        2. Remove already-seen candidates
-        3. Remove tests already in OpenOnco
+        Collapse whitespace in title/company so dedup and prompts see consistent
+        text, and replace a known company's name as the source gave it
+        ("GUARDANT HEALTH, INC.") with its canonical name, keeping the original
+        in company_raw.
         """
-        new_candidates = []
-        seen_in_batch = set()
+        for key in ("title", "company"):
+            if isinstance(candidate.get(key), str):
+                candidate[key] = " ".join(candidate[key].split())
+        company = candidate.get("company")
+        if self.companies is not None and company:
+            canonical = self.companies.canonical(company)
+            if canonical and canonical != company:
+                candidate["company_raw"] = company
+                candidate["company"] = canonical
+        return candidate
+
+    def is_new(self, candidate: dict, seen_in_batch: set[str]) -> bool:
+        """
+        Whether a candidate survives dedup:
+        1. Not a duplicate within this batch (IDs are added to seen_in_batch)
+        2. Not seen in a previous run
+        3. Not a test already in OpenOnco
+        """
+        cid = candidate["id"]
 
-        for candidate in candidates:
-            cid = candidate["id"]
+        # Skip if already seen in this batch
+        if cid in seen_in_batch:
+            return False
+        seen_in_batch.add(cid)
 
-            # Skip if already seen in this batch
-            if cid in seen_in_batch:
-                continue
-            seen_in_batch.add(cid)
+        # Skip if we've seen this before
+        if cid in self.seen_candidates:
+            return False
 
-            # Skip if we've seen this before
-            if cid in self.seen_candidates:
-                continue
+        # Skip if test name matches existing OpenOnco test
+        title_normalized = self._normalize_name(candidate.get("title", ""))
 
-            # Skip if test name matches existing OpenOnco test
-            title_normalized = self._normalize_name(candidate.get("title", ""))
-            company_normalized = self._normalize_name(candidate.get("company", ""))
-            
-            # Check for exact match on test name
-            if title_normalized and len(title_normalized) > 3:
-                if title_normalized in self.existing_tests:
-                    continue
-                    
-                # Check for partial match (e.g., "Guardant360" in "Guardant360 CDx")
-                is_duplicate = False
-                for existing in self.existing_tests:
-                    if len(existing) > 5:
-                        if title_normalized in existing or existing in title_normalized:
-                            is_duplicate = True
-                            break
-                if is_duplicate:
-                    continue
-
-            new_candidates.append(candidate)
-
-        return new_candidates
+        # Check for exact match on test name
+        if title_normalized and len(title_normalized) > 3:
+            if title_normalized in self.existing_tests:
+                return False
+
+            # Check for partial match (e.g., "Guardant360" in "Guardant360 CDx")
+            for existing in self.existing_tests:
+                if len(existing) > 5:
+                    if title_normalized in existing or existing in title_normalized:
+                        return False
+
+        return True
+
+    def process(self, candidates: list[dict]) -> list[dict]:
+        """Canonicalize and deduplicate a whole batch of raw candidates."""
+        seen_in_batch = set()
+        return [
+            candidate for candidate in candidates
+            if self.is_new(self.canonicalize(candidate), seen_in_batch)
+        ]
 
     def mark_seen(self, candidates: list[dict]):
         """Mark candidates as seen for future runs."""
@@ -1,81 +1,82 @@
 """
 Email notifications for OpenOnco Discovery Agent.
-Uses Resend (same as the main OpenOnco app).
+Uses Resend (same as the main OpenOnco app), through the outbox in outbox.py.
 """
 
 from datetime import datetime
+
+import httpx
+
 from config import CONFIG
+from outbox import NotificationOutbox, SendError
+
+
+RESEND_ENDPOINT = "https://api.resend.com/emails"
+
+
+def email_configured() -> bool:
+    """Whether sending can work: Resend needs an API key, a local stand-in does not."""
+    return bool(CONFIG["email"]["resend_api_key"]) or CONFIG["email"]["endpoint"] != RESEND_ENDPOINT
 
 
-def send_email(subject: str, html_body: str) -> bool:
+async def send_email(client: httpx.AsyncClient, subject: str, html_body: str, idempotency_key: str) -> str:
     """
-    Send email notification via Resend.
-    Returns True if sent successfully.
+    Send one email via Resend (or CONFIG["email"]["endpoint"]). Returns the message id.
+
+    Resend sends at most one email per Idempotency-Key, so retrying is safe.
+    Raises SendError; 4xx responses other than 408/409/429 are permanent.
     """
-    if not CONFIG["email"]["enabled"]:
-        print("  Email notifications disabled")
-        return False
-    
-    api_key = CONFIG["email"]["resend_api_key"]
-    if not api_key:
-        print("  No RESEND_API_KEY set - skipping email")
-        return False
-    
+    headers = {"Content-Type": "application/json", "Idempotency-Key": idempotency_key}
+    if CONFIG["email"]["resend_api_key"]:
+        headers["Authorization"] = f"Bearer {CONFIG['email']['resend_api_key']}"
     try:
-        import httpx
-    except ImportError:
-        print("  httpx not installed")
-        return False
-    
-    try:
-        with httpx.Client() as client:
-            response = client.post(
-                "https://api.resend.com/emails",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "from": CONFIG["email"]["from"],
-                    "to": CONFIG["email"]["to"],
-                    "subject": f"{CONFIG['email']['subject_prefix']} {subject}",
-                    "html": html_body,
-                },
-                timeout=30
-            )
-            if response.status_code == 200:
-                print(f"  ✓ Email sent via Resend to {CONFIG['email']['to']}")
-                return True
-            else:
-                print(f"  Resend error: {response.status_code} - {response.text}")
-                return False
-    except Exception as e:
-        print(f"  Resend error: {e}")
-        return False
+        response = await client.post(
+            CONFIG["email"]["endpoint"],
+            headers=headers,
+            json={
+                "from": CONFIG["email"]["from"],
+                "to": CONFIG["email"]["to"],
+                "subject": f"{CONFIG['email']['subject_prefix']} {subject}",
+                "html": html_body,
+            },
+            timeout=30
+        )
+    except httpx.HTTPError as e:
+        raise SendError(f"{type(e).__name__}: {e}")
+    if response.is_success:
+        try:
+            return response.json().get("id", "")
+        except ValueError:
+            return ""
+    permanent = response.status_code < 500 and response.status_code not in (408, 409, 429)
+    raise SendError(f"Resend error: {response.status_code} - {response.text[:200]}", permanent=permanent)
 
 
-def format_candidates_email(candidates: list[dict]) -> tuple[str, str] | tuple[None, None]:
-    """
-    Format candidates as email content with two sections:
-    1. New Tests (genuinely new)
-    2. New Indications (existing tests in new contexts)
-    """
+def notable_candidates(candidates: list[dict]) -> tuple[list[dict], list[dict]]:
+    """(new tests, new indications) that are relevant and meet the notification threshold."""
     min_confidence = CONFIG["email"]["min_confidence_to_notify"]
-    
-    # Split into new tests vs new indications
     new_tests = []
     new_indications = []
-    
     for c in candidates:
         if c.get("confidence", 0) < min_confidence:
             continue
         if not c.get("is_relevant", True):
             continue
-            
         if c.get("is_new_test", False):
             new_tests.append(c)
         elif c.get("is_new_indication", False):
             new_indications.append(c)
+    return new_tests, new_indications
+
+
+def format_candidates_email(candidates: list[dict]) -> tuple[str, str] | tuple[None, None]:
+    """
+    Format candidates as email content with two sections:
+    1. New Tests (genuinely new)
+    2. New Indications (existing tests in new contexts)
+    """
+    # Split into new tests vs new indications
+    new_tests, new_indications = notable_candidates(candidates)
     
     # Nothing to send?
     if not new_tests and not new_indications:
@@ -158,22 +159,22 @@ def _format_candidate_html(c: dict, css_class: str) -> str:
     
     test_name = extracted.get("test_name") or c.get("title", "Unknown Test")
     company = extracted.get("company") or c.get("company", "Unknown")
-    category = extracted.get("category", "Unknown")
+    category = extracted.get("category") or "Unknown"
     confidence = c.get("confidence", 0)
     conf_class = "high" if confidence >= 0.85 else "medium"
     source_url = c.get("source_url", "#")
     source = c.get("source", "unknown")
     
-    cancer_types = extracted.get("cancer_types", [])
+    cancer_types = extracted.get("cancer_types") or []
     cancer_str = ", ".join(cancer_types[:5]) if cancer_types else "Not specified"
     
-    fda_status = extracted.get("fda_status", "Unknown")
-    methodology = extracted.get("methodology", "")
-    notes = extracted.get("notes", "")
+    fda_status = extracted.get("fda_status") or "Unknown"
+    methodology = extracted.get("methodology") or ""
+    notes = extracted.get("notes") or ""
     
     # For new indications, show which existing test
-    existing_test = extracted.get("existing_test_name", "")
-    indication_details = extracted.get("new_indication_details", "")
+    existing_test = extracted.get("existing_test_name") or ""
+    indication_details = extracted.get("new_indication_details") or ""
     
     html = f"""
         <div class="candidate {css_class}">
@@ -206,15 +207,48 @@ def _format_candidate_html(c: dict, css_class: str) -> str:
     return html
 
 
-def notify_candidates(candidates: list[dict]) -> bool:
+def open_outbox() -> NotificationOutbox:
+    return NotificationOutbox(
+        CONFIG["paths"]["outbox"],
+        CONFIG["email"]["outbox"],
+        render=format_candidates_email,
+        send=send_email,
+    )
+
+
+async def flush_outbox(
+    outbox: NotificationOutbox | None = None,
+    client: httpx.AsyncClient | None = None,
+    close_open: bool = False,
+) -> int:
+    """Send whatever is due in the outbox. Returns the number of emails sent."""
+    outbox = outbox or open_outbox()
+    if not email_configured():
+        print("  No RESEND_API_KEY set - notifications stay queued")
+        return 0
+    sent = await outbox.flush(client, close_open=close_open)
+    if sent:
+        print(f"  ✓ {sent} email{'s' if sent != 1 else ''} sent to {CONFIG['email']['to']}")
+    return sent
+
+
+async def notify_candidates(candidates: list[dict], run_id: str, client: httpx.AsyncClient | None = None) -> int:
     """
-    Send email notification for new candidates.
-    Returns True if email was sent.
+    Queue a run's notable candidates in the outbox and send whatever is due.
+    Returns the number of emails sent (0 while the digest window is open).
     """
-    subject, html_body = format_candidates_email(candidates)
-    
-    if not subject:
+    if not CONFIG["email"]["enabled"]:
+        print("  Email notifications disabled")
+        return 0
+
+    outbox = open_outbox()
+    new_tests, new_indications = notable_candidates(candidates)
+    if outbox.has_run(run_id):
+        print(f"  Run {run_id} is already in the notification outbox")
+    elif not new_tests and not new_indications:
+        outbox.enqueue(run_id, [])
         print("  No candidates meet notification threshold")
-        return False
-    
-    return send_email(subject, html_body)
+    else:
+        added = outbox.enqueue(run_id, new_tests + new_indications)
+        print(f"  Queued {added} candidates for notification")
+    return await flush_outbox(outbox, client)
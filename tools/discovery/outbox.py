@@ -0,0 +1,311 @@
+"""
+Durable notification outbox.
+
+Runs enqueue their notable candidates instead of emailing directly. Candidates
+collect in an open message until its digest window closes (window_minutes after
+the first one arrived; 0 closes it at the next flush), so several runs in one
+window produce one email. When a message closes, its subject, body and
+idempotency key are fixed. It is then retried with backoff until it is sent.
+Every retry POSTs the same Idempotency-Key, so the endpoint sends it at most
+once. State is one JSON file, replaced atomically on each change. Changes hold
+an exclusive lock on a sidecar `.lock` file and start from the file's current
+contents, so a daemon flush and a cron `notify` never overwrite each other.
+
+    python outbox.py serve --port 8025 --fail-rate 0.3   # local stand-in endpoint
+    OO_EMAIL_ENDPOINT=http://127.0.0.1:8025/emails python main.py notify
+"""
+
+import asyncio
+import fcntl
+import json
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+from tracing import trace_event_hooks
+
+
+# Candidate fields the email does not use; dropped before queueing
+DROPPED_FIELDS = ("raw_data", "raw_ref", "raw_summary", "draft_submission", "linked_tests", "linked_vendors")
+
+
+class SendError(Exception):
+    """A send that failed. Permanent failures (the endpoint rejected the message) are not retried."""
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+class NotificationOutbox:
+    """
+    Queued notification messages, one per digest window.
+
+    render(candidates) returns (subject, html) or (None, None) when there is
+    nothing to send; send(client, subject, html, idempotency_key) returns the
+    provider's message id or raises SendError.
+    """
+
+    def __init__(self, path: Path, config: dict, render, send):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.config = config
+        self.render = render
+        self.send = send
+        self.state = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"runs": {}, "candidates": {}, "messages": []}
+
+    def _save(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=2, default=str)
+        tmp.replace(self.path)
+
+    def _lock_file(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return open(self.lock_path, "a")
+
+    @contextmanager
+    def _locked(self):
+        """Hold the lock, reload the state, and save it if the block succeeds."""
+        with self._lock_file() as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.state = self._load()
+            yield
+            self._save()
+
+    @asynccontextmanager
+    async def _locked_async(self):
+        """_locked for flush: waits for the lock off the event loop."""
+        with self._lock_file() as lock:
+            await asyncio.to_thread(fcntl.flock, lock, fcntl.LOCK_EX)
+            self.state = self._load()
+            yield
+            self._save()
+
+    @property
+    def messages(self) -> list[dict]:
+        return self.state["messages"]
+
+    def _open_message(self, now: float) -> dict:
+        for message in self.messages:
+            if message["status"] == "open":
+                return message
+        message = {
+            "id": uuid.uuid4().hex[:16],
+            "status": "open",
+            "opened_at": now,
+            "closes_at": now + self.config["window_minutes"] * 60,
+            "runs": [],
+            "candidates": {},
+            "attempts": 0,
+            "failed_flushes": 0,
+            "next_attempt_at": None,
+            "last_error": None,
+        }
+        self.messages.append(message)
+        return message
+
+    def has_run(self, run_id: str) -> bool:
+        return run_id in self.state["runs"]
+
+    def enqueue(self, run_id: str, candidates: list[dict], now: float | None = None) -> int:
+        """
+        Add a run's candidates to the open window. Returns how many were new to it.
+
+        A run is only enqueued once, and a candidate already queued by an earlier
+        message is left out, so a retried run cannot notify twice even under a
+        new run ID.
+        """
+        now = now or time.time()
+        with self._locked():
+            if run_id in self.state["runs"]:
+                return 0
+            self.state["runs"][run_id] = now
+            queued = self.state.setdefault("candidates", {})
+            open_ids = next((m["candidates"] for m in self.messages if m["status"] == "open"), {})
+            candidates = [c for c in candidates if c["id"] not in queued or c["id"] in open_ids]
+            added = 0
+            if candidates:
+                message = self._open_message(now)
+                message["runs"].append(run_id)
+                for candidate in candidates:
+                    if candidate["id"] not in message["candidates"]:
+                        added += 1
+                    queued[candidate["id"]] = now
+                    message["candidates"][candidate["id"]] = {
+                        k: v for k, v in candidate.items() if k not in DROPPED_FIELDS
+                    }
+        return added
+
+    def _close(self, message: dict, now: float):
+        """Fix the message's content and key; retries send exactly this."""
+        subject, html = self.render(list(message["candidates"].values()))
+        message["closed_at"] = now
+        if not subject:
+            message["status"] = "skipped"
+            return
+        message.update(
+            status="pending",
+            subject=subject,
+            html=html,
+            idempotency_key=f"openonco-discovery-{message['id']}",
+            next_attempt_at=now,
+        )
+
+    def next_due(self) -> float | None:
+        """When the next window closes or retry is due, if anything is queued."""
+        times = [m["closes_at"] for m in self.messages if m["status"] == "open"]
+        times += [m["next_attempt_at"] for m in self.messages if m["status"] == "pending"]
+        return min(times) if times else None
+
+    async def flush(self, client: httpx.AsyncClient | None = None, close_open: bool = False) -> int:
+        """
+        Close windows that have ended (all open ones with close_open) and send
+        every message that is due. Returns the number sent.
+
+        The lock is held while sending, so a second flush waits and then sees
+        the messages this one sent.
+        """
+        async with self._locked_async():
+            now = time.time()
+            for message in self.messages:
+                if message["status"] == "open" and (close_open or message["closes_at"] <= now):
+                    self._close(message, now)
+            due = [m for m in self.messages if m["status"] == "pending" and m["next_attempt_at"] <= now]
+            sent = 0
+            if due:
+                if client is not None:
+                    for message in due:
+                        sent += await self._deliver(client, message)
+                else:
+                    async with httpx.AsyncClient(event_hooks=trace_event_hooks()) as client:
+                        for message in due:
+                            sent += await self._deliver(client, message)
+            self._prune(now)
+        return sent
+
+    async def _deliver(self, client: httpx.AsyncClient, message: dict) -> bool:
+        for attempt in range(self.config["send_attempts"]):
+            if attempt:
+                await asyncio.sleep(2 ** attempt)
+            message["attempts"] += 1
+            try:
+                message["provider_id"] = await self.send(
+                    client, message["subject"], message["html"], message["idempotency_key"]
+                )
+            except SendError as e:
+                message["last_error"] = str(e)
+                print(f"  Send failed (attempt {message['attempts']}): {e}")
+                if e.permanent or message["attempts"] >= self.config["max_attempts"]:
+                    message["status"] = "failed"
+                    print(f"  Giving up on notification {message['id']}; it stays in {self.path}")
+                    return False
+                continue
+            message.update(status="sent", sent_at=time.time(), html=None, last_error=None)
+            print(
+                f"  ✓ Sent notification: {message['subject']} "
+                f"({len(message['runs'])} run{'s' if len(message['runs']) != 1 else ''})"
+            )
+            return True
+
+        message["failed_flushes"] += 1
+        wait = self.config["retry_seconds"] * 2 ** min(message["failed_flushes"] - 1, 8)
+        message["next_attempt_at"] = time.time() + wait
+        when = f"{wait:.0f}s" if wait < 120 else f"{wait / 60:.0f} min"
+        print(f"  Notification {message['id']} stays queued; next attempt in {when}")
+        return False
+
+    def _prune(self, now: float):
+        """Forget finished messages and enqueued run and candidate IDs older than keep_days."""
+        cutoff = now - self.config["keep_days"] * 86400
+        self.state["messages"] = [
+            m for m in self.messages
+            if m["status"] in ("open", "pending") or m.get("sent_at", m.get("closed_at", now)) >= cutoff
+        ]
+        self.state["runs"] = {run: at for run, at in self.state["runs"].items() if at >= cutoff}
+        self.state["candidates"] = {
+            cid: at for cid, at in self.state.get("candidates", {}).items() if at >= cutoff
+        }
+
+    def status_lines(self) -> list[str]:
+        """One line per queued or recent message, for `main.py outbox`."""
+        lines = []
+        for m in self.messages:
+            opened = datetime.fromtimestamp(m["opened_at"]).strftime("%Y-%m-%d %H:%M")
+            line = f"{m['id']}  {m['status']:<8} opened {opened}, {len(m['candidates'])} candidates, {len(m['runs'])} runs"
+            if m["status"] == "open":
+                line += f", closes {datetime.fromtimestamp(m['closes_at']).strftime('%Y-%m-%d %H:%M')}"
+            elif m["status"] in ("pending", "failed") and m["last_error"]:
+                line += f", {m['attempts']} attempts, last error: {m['last_error']}"
+            lines.append(line)
+        return lines
+
+
+# Local stand-in for the email endpoint
+
+async def _serve(host: str, port: int, fail_rate: float):
+    """Accept Resend-style POSTs, print them and answer like Resend, failing some on purpose."""
+    import random
+
+    sent: dict[str, str] = {}
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            key = headers.get("idempotency-key", "")
+            if random.random() < fail_rate:
+                status, reply = "503 Service Unavailable", {"message": "stand-in failure"}
+                print(f"{request_line}: 503 (key {key})")
+            elif key in sent:
+                status, reply = "200 OK", {"id": sent[key]}
+                print(f"{request_line}: duplicate of {sent[key]} (key {key}); not sent again")
+            else:
+                email = json.loads(body or b"{}")
+                sent[key] = f"stand-in-{len(sent) + 1}"
+                status, reply = "200 OK", {"id": sent[key]}
+                print(f"{request_line}: sent {sent[key]} to {email.get('to')}: {email.get('subject')}")
+            payload = json.dumps(reply).encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"Stand-in email endpoint on http://{host}:{port}/emails (fail rate {fail_rate:.0%})")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Notification outbox tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Run a local stand-in for the email endpoint")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8025)
+    serve.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args.host, args.port, args.fail_rate))
+    except KeyboardInterrupt:
+        pass
@@ -6,35 +6,48 @@ import json
 from datetime import datetime
 from pathlib import Path
 
+from archive import ArchiveWriter, CandidateArchive
+
 
 class OutputHandler:
     """Handles output generation and saving."""
 
-    def __init__(self, output_dir: Path):
+    def __init__(self, output_dir: Path, archive_dir: Path | None = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.archive = CandidateArchive(archive_dir or self.output_dir / "archive")
+
+    def save_candidates(self, candidates: list[dict], run_id: str | None = None, partition: str | None = None) -> Path:
+        """Append a run's candidates to the archive (see archive.py). Returns the run's file."""
+        writer = self.open_writer(run_id, partition)
+        for candidate in candidates:
+            writer.add(candidate)
+        return writer.close()
+
+    def save_run_summary(self, summary: dict) -> Path:
+        """Save a run's machine-readable summary next to the candidates file."""
+        output_path = self.output_dir / f"run_summary_{summary['run_id']}.json"
+        with open(output_path, "w") as f:
+            json.dump(summary, f, indent=2, default=str)
+        return output_path
 
-    def save_candidates(self, candidates: list[dict]) -> Path:
-        """Save candidates to a dated JSON file."""
+    def save_drafts(self, drafts: list[dict]) -> Path:
+        """Save draft submissions to a dated text file for review."""
         date_str = datetime.now().strftime("%Y-%m-%d")
-        output_path = self.output_dir / f"candidates_{date_str}.json"
-
-        # Sort by: new_test first, then new_indication, then by confidence
-        sorted_candidates = sorted(
-            candidates,
-            key=lambda x: (
-                x.get("is_new_test", False),
-                x.get("is_new_indication", False),
-                x.get("confidence", 0)
-            ),
-            reverse=True
-        )
-
+        output_path = self.output_dir / f"drafts_{date_str}.txt"
         with open(output_path, "w") as f:
-            json.dump(sorted_candidates, f, indent=2, default=str)
-
+            for draft in drafts:
+                f.write(f"\n{'='*60}\n")
+                f.write(f"TEST: {draft.get('name') or 'Unknown'} ({draft.get('_category')})\n")
+                f.write(f"{'='*60}\n\n")
+                f.write(json.dumps(draft, indent=2, default=str))
+                f.write("\n\n")
         return output_path
 
+    def open_writer(self, run_id: str | None = None, partition: str | None = None) -> ArchiveWriter:
+        """Streaming alternative to save_candidates: candidates are archived as they are added."""
+        return self.archive.writer(run_id or datetime.now().strftime("%Y-%m-%d_%H%M%S"), partition)
+
     def generate_digest(self, candidates: list[dict]) -> str:
         """Generate a human-readable digest of candidates."""
         if not candidates:
@@ -116,8 +129,8 @@ class OutputHandler:
         lines = []
 
         test_name = extracted.get("test_name") or candidate.get("title", "Unknown")
-        existing_test = extracted.get("existing_test_name", "Unknown")
-        indication = extracted.get("new_indication_details", "")
+        existing_test = extracted.get("existing_test_name") or "Unknown"
+        indication = extracted.get("new_indication_details") or ""
         confidence = candidate.get("confidence", 0)
 
         lines.append(f"\n  📋 {test_name}")
@@ -136,5 +149,5 @@ class OutputHandler:
         """Brief format for not-relevant candidates."""
         extracted = candidate.get("extracted", {}) or {}
         test_name = extracted.get("test_name") or candidate.get("title", "Unknown")[:40]
-        reason = extracted.get("relevance_reason", "")[:50] if extracted else ""
+        reason = (extracted.get("relevance_reason") or "")[:50]
         return f"  • {test_name} - {reason}"
@@ -0,0 +1,253 @@
+"""
+Streaming discovery pipeline: stages connected by bounded asyncio queues.
+
+    collect -> canonicalize -> dedup -> pre-classify -> enrich -> draft -> persist
+
+Each stage starts on a candidate as soon as it arrives and blocks when the next
+stage's queue is full, so memory is bounded by queue sizes rather than by how
+many candidates a run finds. Enrichment takes micro-batches off its queue so
+that batching and triage still apply. With a RunCheckpoint, stage output is
+also written to the run directory and restored when the run is resumed.
+"""
+
+import asyncio
+import time
+
+from blobstore import BLOBS
+from config import CONFIG
+from tracing import TRACER
+
+
+# End-of-stream marker passed down the queues
+DONE = object()
+
+
+class DiscoveryPipeline:
+    """Runs one discovery pass through the streaming stages."""
+
+    def __init__(
+        self,
+        collectors: list,
+        normalizer,
+        linker=None,
+        enricher=None,
+        drafter=None,
+        writer=None,
+        carryover: list[dict] | None = None,
+        checkpoint=None,
+    ):
+        self.config = CONFIG["pipeline"]
+        self.collectors = collectors
+        self.normalizer = normalizer
+        self.linker = linker
+        self.enricher = enricher
+        self.drafter = drafter
+        self.writer = writer
+        self.carryover = carryover or []
+        self.checkpoint = checkpoint
+
+        # Results kept for the digest, notifications and mark_seen (raw payloads dropped)
+        self.finished: list[dict] = []
+        self.deferred: list[dict] = []
+        self.drafts: list[dict] = []
+        self.counts = {"raw": 0, "new": 0, "linked": 0, "enriched": 0, "restored": 0}
+        self.metrics = {"first_enriched_s": None, "first_persisted_s": None, "total_s": None}
+        self._start = 0.0
+
+    def _queue(self) -> asyncio.Queue:
+        return asyncio.Queue(maxsize=self.config["queue_size"])
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    async def _stage(self, name: str, inbox: asyncio.Queue, outbox: asyncio.Queue | None, handle, workers: int = 1):
+        """
+        Run `handle(item)` over inbox with the given number of workers.
+
+        handle returns the item to pass on, or None to drop it. DONE is
+        forwarded once every worker has finished. The stage's trace span runs
+        from pipeline start to its last item; busy_ms is time spent in handle.
+        """
+        busy = 0.0
+        items = 0
+
+        async def worker():
+            nonlocal busy, items
+            while True:
+                item = await inbox.get()
+                if item is DONE:
+                    await inbox.put(DONE)  # let sibling workers see it too
+                    return
+                start = time.perf_counter()
+                result = await handle(item)
+                busy += time.perf_counter() - start
+                items += 1
+                if result is not None and outbox is not None:
+                    await outbox.put(result)
+
+        with TRACER.span(f"stage.{name}", kind="stage") as span:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+            span["items"] = items
+            span["busy_ms"] = round(busy * 1000, 1)
+        if outbox is not None:
+            await outbox.put(DONE)
+
+    # Stages
+
+    async def _collect(self, outbox: asyncio.Queue):
+        """
+        Run every collector concurrently; each one's candidates flow on as soon as it finishes.
+
+        Collectors that finished in a checkpointed run are replayed from the checkpoint.
+        """
+        checkpoint = self.checkpoint
+
+        async def run(collector):
+            if checkpoint is not None and checkpoint.collector_done(collector.name):
+                candidates = checkpoint.collected_by(collector.name)
+                print(f"  → {collector.name}: {len(candidates)} raw candidates (from checkpoint)")
+                TRACER.incr("checkpoint.collector.hit")
+            else:
+                with TRACER.span(f"collect.{collector.name}", kind="collector") as span:
+                    try:
+                        candidates = [BLOBS.stash(c) for c in await collector.collect()]
+                    except Exception as e:
+                        span["error"] = f"{type(e).__name__}: {e}"
+                        print(f"  → {collector.name}: error: {e}")
+                        return
+                    span["candidates"] = len(candidates)
+                print(f"  → {collector.name}: {len(candidates)} raw candidates")
+                if checkpoint is not None:
+                    checkpoint.record_collected(collector.name, candidates, requests=collector.requests)
+            for candidate in candidates:
+                self.counts["raw"] += 1
+                await outbox.put(candidate)
+
+        async def carried():
+            carryover = self.carryover
+            if checkpoint is not None:
+                # The carryover file is rewritten at the end of a run, so a resumed
+                # run must use the copy taken when it started
+                if checkpoint.collector_done("carryover"):
+                    carryover = checkpoint.collected_by("carryover")
+                else:
+                    checkpoint.record_collected("carryover", carryover)
+            for candidate in carryover:
+                candidate.pop("enrichment_deferred", None)
+                candidate.pop("draft_deferred", None)
+                await outbox.put(candidate)
+            if carryover:
+                print(f"  → carryover: {len(carryover)} candidates from the previous run")
+
+        with TRACER.span("stage.collect", kind="stage") as span:
+            await asyncio.gather(*(run(c) for c in self.collectors), carried())
+            span["items"] = self.counts["raw"]
+        await outbox.put(DONE)
+
+    async def _canonicalize(self, candidate: dict) -> dict:
+        return self.normalizer.canonicalize(candidate)
+
+    def _dedup_handler(self):
+        seen_in_batch = set()
+
+        async def dedup(candidate: dict) -> dict | None:
+            # Carried-over candidates were never marked seen, so they pass like new ones
+            if not self.normalizer.is_new(candidate, seen_in_batch):
+                return None
+            self.counts["new"] += 1
+            return candidate
+
+        return dedup
+
+    async def _pre_classify(self, candidate: dict) -> dict:
+        """Local, no-API tagging that routes enrichment (see linker.py)."""
+        if self.checkpoint is not None:
+            restored = self.checkpoint.restore(candidate)
+            if restored is not candidate:
+                # Already enriched (and possibly drafted) before the run was interrupted
+                self.counts["restored"] += 1
+                TRACER.incr("checkpoint.candidate.hit")
+                return restored
+        if self.linker is not None and self.linker.tag([candidate], max_chars=CONFIG["linker"]["text_chars"]):
+            self.counts["linked"] += 1
+        return candidate
+
+    async def _enrich(self, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        """Take micro-batches off the queue and enrich them; several batches may be in flight."""
+        size, wait = self.config["enrich_chunk"], self.config["enrich_wait_seconds"]
+
+        async def worker():
+            while True:
+                first = await inbox.get()
+                if first is DONE:
+                    await inbox.put(DONE)
+                    return
+                chunk = [first]
+                while len(chunk) < size:
+                    try:
+                        item = await asyncio.wait_for(inbox.get(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        break
+                    if item is DONE:
+                        await inbox.put(DONE)
+                        break
+                    chunk.append(item)
+
+                if self.enricher is not None:
+                    with TRACER.span("enrich.chunk", kind="batch", candidates=len(chunk)):
+                        await self.enricher.enrich_batch(chunk)
+                    if self.metrics["first_enriched_s"] is None:
+                        self.metrics["first_enriched_s"] = self._elapsed()
+                    self.counts["enriched"] += len(chunk)
+                    if self.checkpoint is not None:
+                        for candidate in chunk:
+                            self.checkpoint.record_enriched(candidate)
+                for candidate in chunk:
+                    await outbox.put(candidate)
+
+        with TRACER.span("stage.enrich", kind="stage") as span:
+            await asyncio.gather(*(worker() for _ in range(self.config["enrich_workers"])))
+            span["items"] = self.counts["enriched"]
+        await outbox.put(DONE)
+
+    async def _draft(self, candidate: dict) -> dict:
+        """Drafting starts inside enrichment (on_enriched); this waits for it to finish."""
+        if self.drafter is not None:
+            draft = await self.drafter.wait_for(candidate) or candidate.get("draft_submission")
+            if draft:
+                self.drafts.append(draft)
+        return candidate
+
+    async def _persist(self, candidate: dict) -> None:
+        if self.enricher is not None:
+            self.enricher.release(candidate)
+        if candidate.get("enrichment_deferred"):
+            # Not reported or marked seen; carried over whole (its raw_ref too)
+            self.deferred.append(candidate)
+            return None
+        if self.checkpoint is not None:
+            self.checkpoint.record_finished(candidate)
+        if self.writer is not None:
+            self.writer.add(candidate)
+        if self.metrics["first_persisted_s"] is None:
+            self.metrics["first_persisted_s"] = self._elapsed()
+        if candidate.get("draft_deferred"):
+            self.deferred.append(candidate)
+        self.finished.append({k: v for k, v in candidate.items() if k not in ("raw_data", "raw_summary")})
+        return None
+
+    async def run(self) -> list[dict]:
+        """Run all stages to completion. Returns the finished candidates (without raw payloads)."""
+        self._start = time.perf_counter()
+        raw, canonical, unique, classified, enriched, drafted = (self._queue() for _ in range(6))
+        await asyncio.gather(
+            self._collect(raw),
+            self._stage("canonicalize", raw, canonical, self._canonicalize),
+            self._stage("dedup", canonical, unique, self._dedup_handler()),
+            self._stage("pre_classify", unique, classified, self._pre_classify),
+            self._enrich(classified, enriched),
+            self._stage("draft", enriched, drafted, self._draft, workers=self.config["draft_workers"]),
+            self._stage("persist", drafted, None, self._persist),
+        )
+        self.metrics["total_s"] = self._elapsed()
+        return self.finished
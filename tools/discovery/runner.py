@@ -0,0 +1,288 @@
+"""
+Full discovery run: every step through the streaming pipeline (python main.py run).
+"""
+
+from datetime import datetime
+
+from config import CONFIG
+from collectors import default_collectors
+from companies import default_index
+from normalizer import Normalizer
+from known_tests import KnownTestIndex
+from linker import KnownTestLinker
+from enricher import ClaudeEnricher
+from governor import LLMGovernor
+from drafter import HybridDrafter, SubmissionDrafter
+from output import OutputHandler
+from pipeline import DiscoveryPipeline
+from checkpoint import RunCheckpoint
+from blobstore import collect_garbage
+from notifications import notify_candidates
+from tracing import TRACER
+from metrics import export_run
+from history import index_run
+from scheduler import QueryScheduler
+
+
+class Resources:
+    """
+    Components that are expensive to build and can outlive a run: the dedup and
+    known-test indexes, collectors and API clients.
+
+    One-shot runs build them fresh; the daemon builds them once with shared
+    HTTP connection pools and passes them to every run.
+    """
+
+    def __init__(self, http_client=None, anthropic_client=None):
+        # Known-test index and linker for pre-classification (local, no API calls)
+        self.test_index = KnownTestIndex(CONFIG["paths"]["tests_dir"])
+        self.linker = KnownTestLinker(self.test_index) if CONFIG["linker"]["enabled"] else None
+
+        self.normalizer = Normalizer(
+            data_js_path=CONFIG["paths"]["data_js"],
+            seen_path=CONFIG["paths"]["seen_candidates"],
+            companies=default_index(self.test_index.tests),
+        )
+        self.output = OutputHandler(CONFIG["paths"]["output_dir"], CONFIG["paths"]["archive_dir"])
+        self.collectors = default_collectors()
+        self.http_client = http_client
+        for collector in self.collectors:
+            collector.client = http_client
+        self.anthropic_client = anthropic_client
+
+
+async def run_discovery(
+    skip_enrichment: bool = False,
+    skip_email: bool = False,
+    skip_drafts: bool = False,
+    resume: str | None = None,
+    new: bool = False,
+    resources: Resources | None = None,
+    sources: list[str] | None = None,
+    profile: bool = False,
+    prom_file: str | None = None,
+):
+    """
+    Main discovery pipeline. `resume` is the ID of an interrupted run to continue;
+    without it, a recent run over the same sources that did not complete is
+    continued unless `new` is set, so a retry repeats no Claude request or email.
+    `sources` limits the run to those collectors (default: all). With `profile`,
+    each phase is run under cProfile and the stats are saved in the run directory.
+    `prom_file` (default CONFIG["metrics"]["textfile"]) receives Prometheus metrics.
+    """
+    prom_file = prom_file or CONFIG["metrics"]["textfile"]
+    print(f"\n{'='*60}")
+    print(f"OpenOnco Discovery Agent - {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    print(f"{'='*60}\n")
+
+    runs_dir = CONFIG["paths"]["runs_dir"]
+    if resume == "latest":
+        resume = RunCheckpoint.latest(runs_dir)
+    if resume is None and not new:
+        resume = RunCheckpoint.unfinished(runs_dir, sources, CONFIG["pipeline"]["resume_within_hours"])
+        if resume:
+            print(f"Run {resume} did not complete; continuing it (--new starts a fresh run)")
+    if resume and not (runs_dir / resume).exists():
+        print(f"No run {resume} in {runs_dir}")
+        return []
+    if not resume and RunCheckpoint.prune(runs_dir, CONFIG["pipeline"]["keep_runs"] - 1):
+        collect_garbage()
+    checkpoint = RunCheckpoint(runs_dir, resume)
+    if checkpoint.done("completed"):
+        print(f"Run {checkpoint.run_id} already completed; nothing to resume.")
+        return []
+    if not checkpoint.resumed:
+        checkpoint.record_sources(sources)
+    action = "Resuming" if checkpoint.resumed else "Starting"
+    print(f"{action} run {checkpoint.run_id} (resume with --resume {checkpoint.run_id})\n")
+    started_at = datetime.now()
+    TRACER.start_run(checkpoint.dir / "trace.jsonl", checkpoint.dir / "profile" if profile else None)
+    TRACER.event("run_started", run_id=checkpoint.run_id, resumed=checkpoint.resumed, sources=sources)
+
+    # Initialize components
+    with TRACER.span("phase.setup", kind="phase", profile=True):
+        resources = resources or Resources()
+    normalizer, output = resources.normalizer, resources.output
+    test_index, linker = resources.test_index, resources.linker
+    collectors = [c for c in resources.collectors if sources is None or c.name in sources]
+
+    # Which queries each collector runs, and how deep, from their past yield
+    scheduler = QueryScheduler(CONFIG["paths"]["query_yield"], CONFIG["scheduler"])
+    checkpoint.record_plan(scheduler.plan(collectors, previous=checkpoint.state.get("query_plan")))
+
+    # Budget governor for all Claude calls; picks up work deferred by the last run
+    governor = None
+    carryover = []
+    if not skip_enrichment and CONFIG["claude"]["governor"]["enabled"]:
+        governor = LLMGovernor(
+            CONFIG["claude"]["governor"],
+            CONFIG["claude"]["pricing"],
+            CONFIG["watchlist"]["companies"],
+            ledger_path=CONFIG["paths"]["llm_ledger"],
+            carryover_path=CONFIG["paths"]["carryover"],
+        )
+        carryover = governor.load_carryover()
+
+    # Enricher and drafter; drafting starts as soon as each candidate is enriched
+    enricher = None
+    drafter = None
+    if not skip_enrichment:
+        enricher = ClaudeEnricher(test_index, governor=governor, client=resources.anthropic_client)
+        if not skip_drafts:
+            drafter_class = HybridDrafter if CONFIG["claude"]["draft"]["mode"] == "hybrid" else SubmissionDrafter
+            drafter = drafter_class(
+                usage=enricher.usage,
+                governor=governor,
+                context_fn=enricher.candidate_context,
+                min_confidence=0.75,
+                client=resources.anthropic_client,
+            )
+            enricher.on_enriched = drafter.submit
+
+    stages = "collect → canonicalize → dedup → pre-classify"
+    stages += " → enrich" if enricher else ""
+    stages += " → draft" if drafter else ""
+    print(f"Running pipeline: {stages} → persist")
+    # Archived under the day the run started, also when it is resumed later
+    writer = output.open_writer(checkpoint.run_id, partition=checkpoint.state["started_at"][:10])
+    pipeline = DiscoveryPipeline(
+        collectors,
+        normalizer,
+        linker=linker,
+        enricher=enricher,
+        drafter=drafter,
+        writer=writer,
+        carryover=carryover,
+        checkpoint=checkpoint,
+    )
+
+    yields = None
+
+    def save_summary(ok: bool = True):
+        """Machine-readable run summary (and .prom metrics): counts, timings, LLM usage, yield per source."""
+        summary = {
+            "run_id": checkpoint.run_id,
+            "resumed": checkpoint.resumed,
+            "started_at": started_at.isoformat(),
+            "duration_s": round((datetime.now() - started_at).total_seconds(), 1),
+            "sources": [c.name for c in collectors],
+            "counts": {**pipeline.counts, "persisted": len(writer), "drafts": len(pipeline.drafts)},
+            "metrics": pipeline.metrics,
+            "llm": enricher.usage.report() if enricher is not None else None,
+            "budget": governor.summary() if governor is not None else None,
+            "yield": yields,
+            **TRACER.summary(),
+        }
+        path = output.save_run_summary(summary)
+        TRACER.event("run_finished", run_id=checkpoint.run_id, ok=ok, summary=str(path))
+        if prom_file:
+            export_run(prom_file, summary, pipeline.finished, ok=ok)
+        TRACER.stop_run()
+        print(f"  Run summary: {path}")
+
+    try:
+        with TRACER.span("phase.pipeline", kind="phase", profile=True):
+            enriched = await pipeline.run()
+    except Exception:
+        save_summary(ok=False)
+        raise
+    finally:
+        checkpoint.close()
+    output_path = writer.close()
+
+    counts, metrics = pipeline.counts, pipeline.metrics
+    print(f"\nTotal raw candidates: {counts['raw']}")
+    print(f"New candidates after dedup: {counts['new']} ({counts['linked']} linked to existing OpenOnco tests)")
+    if counts["restored"]:
+        print(f"Restored {counts['restored']} enriched candidates from the run checkpoint")
+    if metrics["first_enriched_s"] is not None:
+        print(f"First enriched candidate after {metrics['first_enriched_s']:.1f}s")
+    print(f"Pipeline finished in {metrics['total_s']:.1f}s")
+
+    if enricher is not None:
+        print(f"  Enrichment output: {enricher.parse_stats.summary()}")
+
+    # Filter to relevant NEW candidates only
+    relevant = [
+        c for c in enriched
+        if c.get("is_relevant", True)
+        and not (c.get("extracted") or {}).get("is_existing_test_update", False)
+    ]
+    print(f"\nRelevant NEW candidates: {len(relevant)} of {len(enriched)}")
+
+    drafts = pipeline.drafts
+    if drafter is not None:
+        print(f"  Generated {len(drafts)} drafts")
+        print(f"  Draft output: {drafter.parse_stats.summary()}")
+        latency = drafter.latency_report(enricher.started_at, enricher.combined_ids)
+        for path, stats in latency.items():
+            if stats["candidates"]:
+                print(f"  {path} path: {stats['candidates']} drafts, median {stats['median_s']:.1f}s end-to-end")
+        if isinstance(drafter, HybridDrafter):
+            print(f"  Hybrid drafting: {drafter.summary()}")
+            for line in drafter.fill_lines():
+                print(f"    {line}")
+
+    # Without enrichment nothing is judged relevant, so the run is reported but not learned from
+    yields = scheduler.record_run(
+        checkpoint,
+        pipeline.finished,
+        enricher.usage.report() if enricher is not None else None,
+        learn=enricher is not None,
+    )
+    print("\nYield by source:")
+    for line in scheduler.source_lines(yields):
+        print(f"  {line}")
+
+    if enricher is not None:
+        print("\nLLM usage by tier:")
+        for line in enricher.usage.summary_lines():
+            print(f"  {line}")
+
+    if governor is not None:
+        governor.save_carryover(pipeline.deferred)
+        governor.save()
+        print(f"  Budget: {governor.summary()}")
+        if pipeline.deferred:
+            print(f"  Carrying over {len(pipeline.deferred)} candidates to the next run")
+
+    if not len(writer):
+        print("\nNo new candidates - all have been seen before or exist in OpenOnco.")
+        checkpoint.mark("completed")
+        save_summary()
+        return []
+
+    print(f"\nSaved {len(writer)} candidates to: {output_path}")
+    index_run(output_path, run_id=checkpoint.run_id)
+
+    # Save drafts separately
+    if drafts:
+        print(f"  Saved drafts to: {output.save_drafts(drafts)}")
+
+    with TRACER.span("phase.report", kind="phase", profile=True):
+        # Update seen candidates
+        normalizer.mark_seen(enriched)
+
+        # Generate digest
+        digest = output.generate_digest(enriched)
+    print(f"\n{'='*60}")
+    print("DAILY DIGEST")
+    print(f"{'='*60}")
+    print(digest)
+
+    # Queue the email notification (once per run, even if the run is retried);
+    # it is sent now or when its digest window closes
+    if skip_email:
+        print("\nSkipping email (--skip-email flag)")
+    elif checkpoint.done("notified"):
+        print(f"\nNotifications already queued for run {checkpoint.run_id}")
+    else:
+        print("\nSending notifications...")
+        with TRACER.span("phase.notify", kind="phase", profile=True):
+            await notify_candidates(enriched, run_id=checkpoint.run_id, client=resources.http_client)
+        checkpoint.mark("notified")
+
+    checkpoint.mark("completed")
+    save_summary()
+    return enriched
+
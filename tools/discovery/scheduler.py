@@ -0,0 +1,273 @@
+"""
+Query scheduling by historical yield.
+
+Every query a collector can make is an arm: a PubMed or ClinicalTrials search
+term, a company newsroom, an openFDA endpoint. After each run the yield of
+every arm that was queried is added to data/query_yield.json: requests made,
+raw, new and relevant candidates, and the estimated LLM cost of enriching what
+it found. Older runs count for less (CONFIG["scheduler"]["decay"] per run).
+
+Before each run the scheduler draws a relevant-per-request rate for every arm
+from a Gamma posterior (Thompson sampling) and turns it into
+  - whether the arm is queried: with probability rate / best rate among the
+    source's arms, never below min_share, and always once it has been skipped
+    ceil(1 / min_share) - 1 runs in a row;
+  - how deep: retmax / pageSize scaled by rate / mean rate within depth_range.
+New arms start from an optimistic prior, so they are tried early. Sources not
+in CONFIG["scheduler"]["sources"] (FDA) are tracked but always queried in full.
+The daemon also scales each source's interval by its yield (interval_range).
+"""
+
+import json
+import math
+import random
+from datetime import datetime
+from pathlib import Path
+
+
+def _arm_key(source: str, arm: str) -> str:
+    return f"{source}:{arm}"
+
+
+def candidate_cost(candidate: dict, unit_costs: dict[str, float]) -> float:
+    """Estimated enrichment cost of one candidate: the average per-candidate cost of each tier it went through."""
+    tiers = []
+    if "triage_relevance" in candidate:
+        tiers.append("triage")
+    path = candidate.get("enrichment_path")
+    if path and path != "triage":
+        tiers.append(path)
+    return sum(unit_costs.get(tier, 0.0) for tier in tiers)
+
+
+def unit_costs(usage_report: dict) -> dict[str, float]:
+    """Cost per candidate for each tier of a UsageTracker report."""
+    return {
+        tier: stats["cost_usd"] / stats["candidates"]
+        for tier, stats in usage_report.items()
+        if stats.get("candidates")
+    }
+
+
+def is_relevant(candidate: dict) -> bool:
+    """Counted as a hit: relevant, and not an update to a test OpenOnco already has."""
+    return bool(candidate.get("is_relevant")) and not (candidate.get("extracted") or {}).get(
+        "is_existing_test_update", False
+    )
+
+
+class QueryScheduler:
+    """Per-arm yield statistics and the per-run query plan."""
+
+    def __init__(self, path: Path, config: dict, rng: random.Random | None = None):
+        self.path = Path(path)
+        self.config = config
+        self.rng = rng or random.Random()
+        self.state = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"arms": {}}
+
+    def save(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=2)
+        tmp.replace(self.path)
+
+    def _stats(self, source: str, arm: str) -> dict:
+        return self.state["arms"].setdefault(_arm_key(source, arm), {
+            "source": source,
+            "arm": arm,
+            "requests": 0.0,
+            "raw": 0.0,
+            "new": 0.0,
+            "relevant": 0.0,
+            "cost_usd": 0.0,
+            "runs": 0,
+            "skipped": 0,
+            "last_queried": None,
+        })
+
+    # Planning
+
+    def mean_rate(self, stats: dict) -> float:
+        """Posterior mean of relevant candidates per request."""
+        return (self.config["prior_relevant"] + stats["relevant"]) / (self.config["prior_requests"] + stats["requests"])
+
+    def _sample_rate(self, stats: dict) -> float:
+        shape = self.config["prior_relevant"] + stats["relevant"]
+        rate = self.config["prior_requests"] + stats["requests"]
+        return self.rng.gammavariate(shape, 1 / rate)
+
+    def plan(self, collectors: list, previous: dict | None = None) -> dict[str, dict[str, float]]:
+        """
+        Choose each collector's arms and depths for this run and hand them to
+        the collector (collector.start_run). Returns {source: {arm: depth}}.
+
+        A resumed run passes the plan it started with as `previous`; collectors
+        in it get their earlier arms again instead of a new draw.
+        """
+        cfg = self.config
+        floor = cfg["min_share"]
+        overdue = max(math.ceil(1 / floor) - 1, 0)
+        low, high = cfg["depth_range"]
+        plans = dict(previous or {})
+        for collector in collectors:
+            arms = collector.arms()
+            if collector.name in plans:
+                plan = plans[collector.name]
+            elif not cfg["enabled"] or collector.name not in cfg["sources"]:
+                plan = {arm: 1.0 for arm in arms[:collector.max_arms]}
+            else:
+                samples = {arm: self._sample_rate(self._stats(collector.name, arm)) for arm in arms}
+                best = max(samples.values(), default=0) or 1.0
+                mean = sum(samples.values()) / len(samples) if samples else 1.0
+                forced = [a for a in arms if self._stats(collector.name, a)["skipped"] >= overdue]
+                drawn = [
+                    a for a in arms
+                    if a not in forced and self.rng.random() < max(samples[a] / best, floor)
+                ]
+                drawn.sort(key=lambda a: samples[a], reverse=True)
+                cap = collector.max_arms
+                chosen = forced + drawn
+                if cap:
+                    chosen = forced[:cap] + drawn[:max(cap - len(forced), 0)]
+                plan = {a: round(min(max(samples[a] / mean, low), high), 2) for a in chosen}
+                for arm in arms:
+                    stats = self._stats(collector.name, arm)
+                    stats["skipped"] = 0 if arm in plan else stats["skipped"] + 1
+            collector.start_run(plan)
+            plans[collector.name] = plan
+        self.save()
+        return plans
+
+    def interval(self, source: str, base: float) -> float:
+        """A source's daemon interval, shorter for sources whose arms yield more than the average source."""
+        low, high = self.config["interval_range"]
+        if not self.config["enabled"]:
+            return base
+        rates = {}
+        for stats in self.state["arms"].values():
+            rates.setdefault(stats["source"], []).append(self.mean_rate(stats))
+        if source not in rates or len(rates) < 2:
+            return base
+        source_rate = max(rates[source])
+        average = sum(max(r) for r in rates.values()) / len(rates)
+        if source_rate <= 0 or average <= 0:
+            return base * high
+        return base * min(max(average / source_rate, low), high)
+
+    # Recording
+
+    def run_yield(
+        self,
+        requests: dict[str, dict[str, int]],
+        collected: list[dict],
+        finished: list[dict],
+        usage_report: dict | None = None,
+    ) -> dict[str, dict]:
+        """
+        This run's yield per arm: {"source:arm": {requests, raw, new, relevant, cost_usd}}.
+
+        requests is {source: {arm: count}}; collected are the raw candidates and
+        finished the new ones after enrichment (each with its "query" arm).
+        """
+        costs = unit_costs(usage_report or {})
+        arms: dict[str, dict] = {}
+
+        def arm(source: str, name: str) -> dict:
+            return arms.setdefault(_arm_key(source, name), {
+                "source": source, "arm": name, "requests": 0, "raw": 0, "new": 0, "relevant": 0, "cost_usd": 0.0,
+            })
+
+        for source, counts in requests.items():
+            for name, count in counts.items():
+                arm(source, name)["requests"] += count
+        for candidate in collected:
+            if candidate.get("query") is not None:
+                arm(candidate["source"], candidate["query"])["raw"] += 1
+        for candidate in finished:
+            if candidate.get("query") is None:
+                continue
+            stats = arm(candidate["source"], candidate["query"])
+            stats["new"] += 1
+            stats["relevant"] += is_relevant(candidate)
+            stats["cost_usd"] += candidate_cost(candidate, costs)
+        return arms
+
+    def record(self, run_yield: dict[str, dict]):
+        """Add a run's yield to the decayed per-arm totals (only arms the run queried age)."""
+        decay = self.config["decay"]
+        now = datetime.now().isoformat(timespec="seconds")
+        for run_stats in run_yield.values():
+            if not run_stats["requests"]:
+                continue
+            stats = self._stats(run_stats["source"], run_stats["arm"])
+            for field in ("requests", "raw", "new", "relevant", "cost_usd"):
+                stats[field] = round(stats[field] * decay + run_stats[field], 6)
+            stats["runs"] += 1
+            stats["last_queried"] = now
+        self.save()
+
+    def record_run(self, checkpoint, finished: list[dict], usage_report: dict | None = None, learn: bool = True) -> dict:
+        """
+        Yield per source of a checkpointed run (see by_source). With `learn` it
+        is also added to the per-arm totals, once per run.
+        """
+        collected = [r["candidate"] for r in checkpoint.collected if r["collector"] != "carryover"]
+        run_yield = self.run_yield(checkpoint.state.get("requests", {}), collected, finished, usage_report)
+        if learn and not checkpoint.done("yield_recorded"):
+            self.record(run_yield)
+            checkpoint.mark("yield_recorded")
+        return self.by_source(run_yield)
+
+    # Reporting
+
+    @staticmethod
+    def by_source(run_yield: dict[str, dict]) -> dict[str, dict]:
+        """Arm yields summed per source, with relevant per request and per LLM dollar."""
+        sources: dict[str, dict] = {}
+        for stats in run_yield.values():
+            total = sources.setdefault(stats["source"], {
+                "arms": 0, "requests": 0, "raw": 0, "new": 0, "relevant": 0, "cost_usd": 0.0,
+            })
+            total["arms"] += 1
+            for field in ("requests", "raw", "new", "relevant", "cost_usd"):
+                total[field] += stats[field]
+        for total in sources.values():
+            total["cost_usd"] = round(total["cost_usd"], 4)
+            total["relevant_per_request"] = round(total["relevant"] / total["requests"], 3) if total["requests"] else None
+            total["relevant_per_usd"] = round(total["relevant"] / total["cost_usd"], 1) if total["cost_usd"] else None
+        return dict(sorted(sources.items()))
+
+    @staticmethod
+    def source_lines(by_source: dict[str, dict]) -> list[str]:
+        """One line per source of a run's yield, for the run output."""
+        lines = []
+        for source, total in by_source.items():
+            per_request = total["relevant_per_request"]
+            per_usd = total["relevant_per_usd"]
+            lines.append(
+                f"{source}: {total['relevant']} relevant of {total['new']} new, {total['raw']} raw "
+                f"from {total['requests']} requests over {total['arms']} queries"
+                + (f", {per_request:.3f}/request" if per_request is not None else "")
+                + (f", {per_usd:.1f}/$" if per_usd is not None else "")
+            )
+        return lines
+
+    def report_lines(self) -> list[str]:
+        """One line per known arm, most productive first, for `main.py yields`."""
+        arms = sorted(self.state["arms"].values(), key=self.mean_rate, reverse=True)
+        lines = []
+        for stats in arms:
+            per_usd = f"{stats['relevant'] / stats['cost_usd']:.1f}/$" if stats["cost_usd"] else "-"
+            lines.append(
+                f"{stats['source']:<14} {self.mean_rate(stats):6.3f}/req {per_usd:>8}  "
+                f"{stats['relevant']:6.1f} relevant of {stats['new']:6.1f} new, {stats['requests']:6.1f} requests, "
+                f"{stats['runs']} runs, skipped {stats['skipped']}  {stats['arm']}"
+            )
+        return lines
@@ -0,0 +1,295 @@
+"""
+Single pipeline steps over a stored run (python main.py <step>).
+
+    collect  -> collected.jsonl   collectors, plus work carried over by the budget
+    dedup    -> deduped.jsonl     canonicalize, dedup, known-test linking
+    enrich   -> enriched.jsonl    Claude extraction
+    draft    -> finished.jsonl    drafts, archive, search history, mark seen
+    digest                        print the digest (no API calls)
+    notify                        queue the finished candidates for email, once per run
+
+Each step reads the previous step's file in data/runs/<run-id>/ (see
+checkpoint.py), so any step can be re-run on its own, and `main.py run
+--resume <run-id>` can finish a run started step by step. Modules are
+imported inside each step: dedup and digest never load httpx or the
+Anthropic SDK.
+"""
+
+from config import CONFIG
+from checkpoint import RunCheckpoint
+
+
+# Step that produces each checkpoint mark
+PRODUCED_BY = {"deduped": "dedup", "enriched": "enrich", "drafted": "draft"}
+
+
+def open_run(run_id: str | None, new: bool = False) -> RunCheckpoint | None:
+    """
+    The checkpoint of an existing run ("latest" for the most recent), or of a
+    new run when `new` is set and no run_id is given.
+    """
+    runs_dir = CONFIG["paths"]["runs_dir"]
+    if new and run_id is None:
+        if RunCheckpoint.prune(runs_dir, CONFIG["pipeline"]["keep_runs"] - 1):
+            from blobstore import collect_garbage
+
+            collect_garbage()
+        return RunCheckpoint(runs_dir)
+    if run_id in (None, "latest"):
+        run_id = RunCheckpoint.latest(runs_dir)
+        if run_id is None:
+            print(f"No runs in {runs_dir}; start one with: python main.py collect")
+            return None
+    if not (runs_dir / run_id).exists():
+        print(f"No run {run_id} in {runs_dir}")
+        return None
+    return RunCheckpoint(runs_dir, run_id)
+
+
+def _requires(checkpoint: RunCheckpoint, step: str) -> bool:
+    if checkpoint.done(step):
+        return True
+    print(f"Run {checkpoint.run_id} has no {step} candidates yet; "
+          f"run `python main.py {PRODUCED_BY[step]} --run {checkpoint.run_id}` first")
+    return False
+
+
+def _governor():
+    from governor import LLMGovernor
+
+    if not CONFIG["claude"]["governor"]["enabled"]:
+        return None
+    return LLMGovernor(
+        CONFIG["claude"]["governor"],
+        CONFIG["claude"]["pricing"],
+        CONFIG["watchlist"]["companies"],
+        ledger_path=CONFIG["paths"]["llm_ledger"],
+        carryover_path=CONFIG["paths"]["carryover"],
+    )
+
+
+def _latest_candidates(checkpoint: RunCheckpoint) -> list[dict]:
+    """The run's candidates from the furthest step that has finished."""
+    for step, candidates in (
+        ("drafted", list(checkpoint.finished.values())),
+        ("enriched", list(checkpoint.enriched.values())),
+        ("deduped", checkpoint.deduped),
+    ):
+        if checkpoint.done(step):
+            print(f"Run {checkpoint.run_id}: {len(candidates)} {step} candidates")
+            return candidates
+    print(f"Run {checkpoint.run_id} has no deduplicated candidates yet")
+    return []
+
+
+async def collect(run_id: str | None = None, sources: list[str] | None = None):
+    """Run the collectors (all, or `sources`) into a new run, or into `run_id`."""
+    import asyncio
+    from blobstore import BLOBS
+    from collectors import default_collectors
+    from scheduler import QueryScheduler
+
+    checkpoint = open_run(run_id, new=True)
+    if checkpoint is None:
+        return
+    collectors = [c for c in default_collectors() if sources is None or c.name in sources]
+    scheduler = QueryScheduler(CONFIG["paths"]["query_yield"], CONFIG["scheduler"])
+    checkpoint.record_plan(scheduler.plan(collectors, previous=checkpoint.state.get("query_plan")))
+    print(f"Collecting for run {checkpoint.run_id}")
+
+    async def run(collector):
+        if checkpoint.collector_done(collector.name):
+            print(f"  → {collector.name}: already collected")
+            return
+        try:
+            candidates = [BLOBS.stash(c) for c in await collector.collect()]
+        except Exception as e:
+            print(f"  → {collector.name}: error: {e}")
+            return
+        checkpoint.record_collected(collector.name, candidates, requests=collector.requests)
+        print(f"  → {collector.name}: {len(candidates)} raw candidates")
+
+    try:
+        await asyncio.gather(*(run(c) for c in collectors))
+        governor = _governor()
+        if governor is not None and not checkpoint.collector_done("carryover"):
+            carryover = governor.load_carryover()
+            checkpoint.record_collected("carryover", carryover)
+            if carryover:
+                print(f"  → carryover: {len(carryover)} candidates from the previous run")
+    finally:
+        checkpoint.close()
+    print(f"\nNext: python main.py dedup --run {checkpoint.run_id}")
+
+
+def dedup(run_id: str | None = "latest"):
+    """Canonicalize and deduplicate collected candidates, and tag known-test mentions."""
+    from companies import default_index
+    from normalizer import Normalizer
+    from linker import KnownTestLinker
+    from known_tests import KnownTestIndex
+
+    checkpoint = open_run(run_id)
+    if checkpoint is None:
+        return
+    test_index = KnownTestIndex(CONFIG["paths"]["tests_dir"])
+    normalizer = Normalizer(
+        data_js_path=CONFIG["paths"]["data_js"],
+        seen_path=CONFIG["paths"]["seen_candidates"],
+        companies=default_index(test_index.tests),
+    )
+    seen_in_batch = set()
+    new = []
+    for record in checkpoint.collected:
+        candidate = normalizer.canonicalize(record["candidate"])
+        candidate.pop("enrichment_deferred", None)
+        candidate.pop("draft_deferred", None)
+        # Carried-over candidates were never marked seen, so they pass like new ones
+        if normalizer.is_new(candidate, seen_in_batch):
+            new.append(candidate)
+
+    linked = 0
+    if CONFIG["linker"]["enabled"]:
+        linker = KnownTestLinker(test_index)
+        linked = linker.tag(new, max_chars=CONFIG["linker"]["text_chars"])
+
+    checkpoint.record_deduped(new)
+    checkpoint.mark("deduped")
+    print(f"Total raw candidates: {len(checkpoint.collected)}")
+    print(f"New candidates after dedup: {len(new)} ({linked} linked to existing OpenOnco tests)")
+
+
+async def enrich(run_id: str | None = "latest"):
+    """Extract test details with Claude; candidates enriched by an earlier attempt are skipped."""
+    from enricher import ClaudeEnricher
+    from known_tests import KnownTestIndex
+
+    checkpoint = open_run(run_id)
+    if checkpoint is None or not _requires(checkpoint, "deduped"):
+        return
+    governor = _governor()
+    enricher = ClaudeEnricher(KnownTestIndex(CONFIG["paths"]["tests_dir"]), governor=governor)
+    pending = [c for c in checkpoint.deduped if c["id"] not in checkpoint.enriched and c["id"] not in checkpoint.finished]
+    print(f"Enriching {len(pending)} candidates ({len(checkpoint.deduped) - len(pending)} already done)")
+
+    # Checkpointed a micro-batch at a time, so an interrupted step loses at most one
+    size = CONFIG["pipeline"]["enrich_chunk"]
+    deferred = []
+    try:
+        for start in range(0, len(pending), size):
+            chunk = pending[start:start + size]
+            await enricher.enrich_batch(chunk)
+            for candidate in chunk:
+                checkpoint.record_enriched(candidate)
+                if candidate.get("enrichment_deferred"):
+                    deferred.append(candidate)
+                elif not candidate.get("extracted"):
+                    # Enrichment failed: finished as it is, so the draft step archives it and
+                    # marks it seen, as a streaming run does
+                    checkpoint.record_finished(candidate)
+                enricher.release(candidate)
+    finally:
+        checkpoint.close()
+    # Kept for the draft step, which works out the cost of each query's candidates
+    checkpoint.state["llm_usage"] = enricher.usage.report()
+    checkpoint.mark("enriched")
+
+    print(f"  Enrichment output: {enricher.parse_stats.summary()}")
+    print("\nLLM usage by tier:")
+    for line in enricher.usage.summary_lines():
+        print(f"  {line}")
+    if governor is not None:
+        governor.save_carryover(deferred)
+        governor.save()
+        print(f"  Budget: {governor.summary()}")
+        if deferred:
+            print(f"  Carrying over {len(deferred)} candidates to the next run")
+
+
+async def draft(run_id: str | None = "latest"):
+    """Draft submissions for eligible candidates, then save the run's candidates and mark them seen."""
+    from drafter import HybridDrafter, SubmissionDrafter
+    from history import index_run
+    from normalizer import Normalizer
+    from output import OutputHandler
+    from scheduler import QueryScheduler
+
+    checkpoint = open_run(run_id)
+    if checkpoint is None or not _requires(checkpoint, "enriched"):
+        return
+    # Everything but what enrichment deferred to the next run, failures included
+    candidates = [
+        checkpoint.restore(c) for c in checkpoint.deduped
+        if c["id"] in checkpoint.enriched or c["id"] in checkpoint.finished
+    ]
+    governor = _governor()
+    drafter_class = HybridDrafter if CONFIG["claude"]["draft"]["mode"] == "hybrid" else SubmissionDrafter
+    drafter = drafter_class(governor=governor, min_confidence=0.75)
+    for candidate in governor.order(candidates) if governor is not None else candidates:
+        drafter.submit(candidate)
+    await drafter.gather()
+    drafts = [c["draft_submission"] for c in candidates if c.get("draft_submission")]
+    print(f"  {len(drafts)} drafts ({len(drafts) - len(drafter.finished_at)} from an earlier attempt)")
+    print(f"  Draft output: {drafter.parse_stats.summary()}")
+
+    try:
+        for candidate in candidates:
+            checkpoint.record_finished(candidate)
+    finally:
+        checkpoint.close()
+    checkpoint.mark("drafted")
+
+    output = OutputHandler(CONFIG["paths"]["output_dir"], CONFIG["paths"]["archive_dir"])
+    path = output.save_candidates(candidates, run_id=checkpoint.run_id, partition=checkpoint.state["started_at"][:10])
+    print(f"\nSaved {len(candidates)} candidates to: {path}")
+    index_run(path, run_id=checkpoint.run_id)
+    if drafts:
+        print(f"  Saved drafts to: {output.save_drafts(drafts)}")
+    normalizer = Normalizer(
+        data_js_path=CONFIG["paths"]["data_js"],
+        seen_path=CONFIG["paths"]["seen_candidates"]
+    )
+    normalizer.mark_seen(candidates)
+
+    deferred = [c for c in candidates if c.get("draft_deferred")]
+    if governor is not None:
+        if deferred:
+            # Added to what the enrich step carried over
+            carried = {c["id"]: c for c in governor.load_carryover()}
+            carried.update((c["id"], c) for c in deferred)
+            governor.save_carryover(list(carried.values()))
+            print(f"  Carrying over {len(deferred)} drafts to the next run")
+        governor.save()
+        print(f"  Budget: {governor.summary()}")
+
+    scheduler = QueryScheduler(CONFIG["paths"]["query_yield"], CONFIG["scheduler"])
+    yields = scheduler.record_run(checkpoint, candidates, checkpoint.state.get("llm_usage"))
+    print("\nYield by source:")
+    for line in scheduler.source_lines(yields):
+        print(f"  {line}")
+
+
+def digest(run_id: str | None = "latest"):
+    """Print the digest for a run's candidates. Reads files only."""
+    from output import OutputHandler
+
+    checkpoint = open_run(run_id)
+    if checkpoint is None:
+        return
+    candidates = _latest_candidates(checkpoint)
+    print(OutputHandler(CONFIG["paths"]["output_dir"]).generate_digest(candidates))
+
+
+async def notify(run_id: str | None = "latest"):
+    """Queue a run's finished candidates in the notification outbox and send what is due."""
+    from notifications import notify_candidates
+
+    checkpoint = open_run(run_id)
+    if checkpoint is None or not _requires(checkpoint, "drafted"):
+        return
+    if checkpoint.done("notified"):
+        print(f"Notifications already queued for run {checkpoint.run_id}")
+        return
+    print("Sending notifications...")
+    await notify_candidates(list(checkpoint.finished.values()), run_id=checkpoint.run_id)
+    checkpoint.mark("notified")
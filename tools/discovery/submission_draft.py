@@ -188,7 +188,7 @@ def generate_draft_submission(candidate: dict) -> dict | None:
     if not extracted.get("is_new_test", False):
         return None
     
-    category = extracted.get("category", "").upper()
+    category = (extracted.get("category") or "").upper()
     if category not in TEMPLATES:
         return None
     
@@ -200,7 +200,7 @@ def generate_draft_submission(candidate: dict) -> dict | None:
     draft["vendor"] = extracted.get("company")
     draft["method"] = extracted.get("methodology")
     draft["methodCitations"] = candidate.get("source_url")
-    draft["cancerTypes"] = extracted.get("cancer_types", [])
+    draft["cancerTypes"] = extracted.get("cancer_types") or []
     
     # Map FDA status
     fda_raw = (extracted.get("fda_status") or "").lower()
@@ -214,7 +214,7 @@ def generate_draft_submission(candidate: dict) -> dict | None:
     
     # MRD-specific fields
     if category == "MRD":
-        approach = extracted.get("approach", "")
+        approach = extracted.get("approach") or ""
         if "informed" in approach.lower():
             draft["approach"] = "Tumor-informed"
             draft["requiresTumorTissue"] = "Yes"
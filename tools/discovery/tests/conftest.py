@@ -0,0 +1,64 @@
+"""
+Unit tests: each module's behaviour on small, hand-made inputs.
+
+    pytest tests
+
+Everything runs offline and writes only to temporary directories.
+"""
+
+import re
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def blobs(tmp_path):
+    """A blob store in a temporary directory."""
+    from blobstore import BlobStore
+
+    return BlobStore(tmp_path / "blobs")
+
+
+@pytest.fixture(autouse=True)
+def blob_dir(tmp_path, monkeypatch):
+    """Payloads stashed through BLOBS go to a temporary store, not data/blobs."""
+    from blobstore import BLOBS
+
+    monkeypatch.setattr(BLOBS, "root", tmp_path / "shared_blobs")
+    return BLOBS.root
+
+
+class ScriptedClaude:
+    """
+    Stands in for the Anthropic client. Each request is answered with
+    answers[tool name](candidate IDs in a batch prompt, prompt); requests are kept.
+    """
+
+    def __init__(self):
+        self.answers = {}
+        self.requests = []
+        self.messages = self
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        tool = kwargs["tool_choice"]["name"]
+        prompt = kwargs["messages"][0]["content"]
+        data = self.answers[tool](re.findall(r"^### CANDIDATE (\S+)$", prompt, re.M), prompt)
+        block = SimpleNamespace(type="tool_use", id="toolu_1", name=tool, input=data)
+        return SimpleNamespace(content=[block], stop_reason="tool_use",
+                               usage=SimpleNamespace(input_tokens=100, output_tokens=20))
+
+    @property
+    def tools(self) -> list[str]:
+        """Tool called by each request, in order."""
+        return [r["tool_choice"]["name"] for r in self.requests]
+
+
+@pytest.fixture
+def claude():
+    return ScriptedClaude()
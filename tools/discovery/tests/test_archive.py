@@ -0,0 +1,58 @@
+import json
+
+from archive import CandidateArchive, load_candidates, read_run
+
+
+def candidate(i: int, raw_bytes: int = 10) -> dict:
+    return {"id": f"c{i}", "source": "fda", "title": f"Test {i}", "raw_data": {"text": "x" * raw_bytes}}
+
+
+def test_records_are_appended_and_listed_in_the_manifest(tmp_path):
+    archive = CandidateArchive(tmp_path)
+    writer = archive.writer("run-1", "2026-01-15")
+    for i in range(3):
+        writer.add(candidate(i))
+    writer.add(candidate(0))
+    writer.close()
+
+    assert archive.partitions() == ["2026-01-15"]
+    manifest = archive.manifest("2026-01-15")["runs"]["run-1"]
+    assert manifest["records"] == 3
+    assert manifest["sources"] == {"fda": 3}
+    assert [c["id"] for c in archive.iter_candidates()] == ["c0", "c1", "c2"]
+
+
+def test_large_payloads_are_stored_as_blobs(tmp_path):
+    writer = CandidateArchive(tmp_path).writer("run-1", "2026-01-15")
+    writer.add(candidate(0, raw_bytes=5000))
+    path = writer.close()
+
+    record = json.loads(path.read_text())
+    assert "raw_data" not in record and "sha256" in record["raw_ref"]
+    assert load_candidates(path)[0]["raw_data"] == {"text": "x" * 5000}
+
+
+def test_partial_last_line_is_truncated_on_reopen(tmp_path):
+    archive = CandidateArchive(tmp_path)
+    writer = archive.writer("run-1", "2026-01-15")
+    writer.add(candidate(0))
+    writer.add(candidate(1))
+    path = writer.close()
+    # A crash cut the next record short
+    with open(path, "ab") as f:
+        f.write(b'{"id": "c2", "title": "Te')
+
+    writer = archive.writer("run-1", "2026-01-15")
+    assert len(writer) == 2
+    writer.add(candidate(2))
+    writer.close()
+
+    lines = path.read_bytes().splitlines()
+    assert len(lines) == 3
+    assert [json.loads(line)["id"] for line in lines] == ["c0", "c1", "c2"]
+
+
+def test_unparseable_tail_is_ignored_when_reading(tmp_path):
+    path = tmp_path / "run.jsonl"
+    path.write_text('{"id": "c0"}\nnot json\n{"id": "c2"}\n')
+    assert [c["id"] for c in read_run(path)] == ["c0"]
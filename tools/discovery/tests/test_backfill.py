@@ -0,0 +1,27 @@
+from datetime import date
+
+from backfill import window_key, windows
+
+
+def test_windows_cover_the_range_without_overlap():
+    spans = windows(date(2026, 1, 1), date(2026, 1, 31), 7)
+    assert spans[0] == (date(2026, 1, 1), date(2026, 1, 7))
+    assert spans[-1] == (date(2026, 1, 29), date(2026, 1, 31))
+    assert len(spans) == 5
+    for (_, end), (start, _) in zip(spans, spans[1:]):
+        assert (start - end).days == 1
+
+
+def test_windows_edge_cases():
+    day = date(2026, 3, 1)
+    assert windows(day, day, 7) == [(day, day)]
+    assert windows(day, date(2026, 2, 1), 7) == []
+    assert windows(date(2026, 2, 1), date(2026, 2, 28), 1)[-1] == (date(2026, 2, 28), date(2026, 2, 28))
+    assert windows(date(2026, 1, 1), date(2026, 1, 14), 7) == [
+        (date(2026, 1, 1), date(2026, 1, 7)),
+        (date(2026, 1, 8), date(2026, 1, 14)),
+    ]
+
+
+def test_window_key():
+    assert window_key("pubmed", (date(2026, 1, 8), date(2026, 1, 14))) == "pubmed@2026-01-08"
@@ -0,0 +1,84 @@
+import json
+import os
+
+from blobstore import BlobStore, collect_garbage, referenced_digests, summarize
+from config import CONFIG
+
+
+LARGE = {"text": "x" * 5000}
+
+
+def test_stash_moves_large_payloads_into_the_store(blobs):
+    candidate = {"id": "c1", "source": "news", "title": "T", "raw_data": dict(LARGE, title="T")}
+    blobs.stash(candidate)
+    assert "raw_data" not in candidate
+    assert candidate["raw_summary"]["title"] == "T"
+    assert blobs.path(candidate["raw_ref"]["sha256"]).exists()
+    assert blobs.raw_data(candidate) == dict(LARGE, title="T")
+
+
+def test_small_payloads_stay_inline(blobs):
+    candidate = {"id": "c1", "raw_data": {"a": 1}}
+    assert blobs.stash(candidate)["raw_data"] == {"a": 1}
+    assert "raw_ref" not in candidate
+
+
+def test_same_payload_is_stored_once(blobs):
+    first = blobs.put(LARGE)
+    assert blobs.put(dict(LARGE)) == first
+    assert len(list(blobs.root.glob("*/*.json.gz"))) == 1
+
+
+def test_missing_blob_falls_back_to_summary(tmp_path):
+    candidate = BlobStore(tmp_path / "old").stash({"id": "c1", "source": "news", "raw_data": dict(LARGE, title="T")})
+    assert BlobStore(tmp_path / "empty").raw_data(candidate) == {"title": "T"}
+
+
+def test_summarize_dotted_paths():
+    raw = {"protocolSection": {"identificationModule": {"nctId": "NCT01", "briefTitle": "A" * 500}}}
+    summary = summarize("clinicaltrials", raw, max_chars=10)
+    assert summary == {"nctId": "NCT01", "briefTitle": "A" * 10}
+
+
+def test_referenced_digests_reads_json_and_jsonl(tmp_path, blobs):
+    refs = [blobs.put({"n": i, **LARGE}) for i in range(2)]
+    (tmp_path / "run.jsonl").write_text(json.dumps({"raw_ref": refs[0]}) + "\n")
+    (tmp_path / "carryover.json").write_text(json.dumps([{"raw_ref": refs[1]}], indent=2))
+    found = referenced_digests([tmp_path / "run.jsonl", tmp_path / "carryover.json", tmp_path / "missing.json"])
+    assert found == {refs[0]["sha256"], refs[1]["sha256"]}
+
+
+def test_sweep_keeps_referenced_and_recent_blobs(blobs):
+    kept, old, recent = (blobs.put({"n": i, **LARGE}) for i in range(3))
+    for ref in (kept, old):
+        os.utime(blobs.path(ref["sha256"]), (0, 0))
+    size = blobs.path(old["sha256"]).stat().st_size
+    assert blobs.sweep({kept["sha256"]}, min_age_seconds=3600) == (1, size)
+    assert blobs.path(kept["sha256"]).exists()
+    assert not blobs.path(old["sha256"]).exists()
+    assert blobs.path(recent["sha256"]).exists()
+
+
+def test_reusing_a_blob_protects_it_from_the_sweep(blobs):
+    ref = blobs.put(LARGE)
+    os.utime(blobs.path(ref["sha256"]), (0, 0))
+    blobs.put(LARGE)
+    assert blobs.sweep(set(), min_age_seconds=3600) == (0, 0)
+
+
+def test_collect_garbage_after_pruning(tmp_path, blobs, monkeypatch):
+    paths = dict(CONFIG["paths"], archive_dir=tmp_path / "archive", runs_dir=tmp_path / "runs",
+                 carryover=tmp_path / "carryover.json")
+    monkeypatch.setitem(CONFIG, "paths", paths)
+    archived, in_run, pruned = (blobs.put({"n": i, **LARGE}) for i in range(3))
+    (tmp_path / "archive" / "2026-01-15").mkdir(parents=True)
+    (tmp_path / "archive" / "2026-01-15" / "run-1.jsonl").write_text(json.dumps({"raw_ref": archived}) + "\n")
+    (tmp_path / "runs" / "run-2").mkdir(parents=True)
+    (tmp_path / "runs" / "run-2" / "collected.jsonl").write_text(json.dumps({"candidate": {"raw_ref": in_run}}) + "\n")
+    for path in blobs.root.glob("*/*.json.gz"):
+        os.utime(path, (0, 0))
+
+    deleted, _ = collect_garbage(blobs)
+    assert deleted == 1
+    assert not blobs.path(pruned["sha256"]).exists()
+    assert blobs.path(archived["sha256"]).exists() and blobs.path(in_run["sha256"]).exists()
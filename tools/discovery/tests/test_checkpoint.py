@@ -0,0 +1,79 @@
+from checkpoint import RunCheckpoint
+
+
+def candidate(i: int, **fields) -> dict:
+    return {"id": f"c{i}", "source": "fda", "title": f"Test {i}", **fields}
+
+
+def test_resumed_run_restores_every_stage(tmp_path):
+    run = RunCheckpoint(tmp_path, "2026-01-15_060000")
+    assert not run.resumed
+    run.record_plan({"pubmed": {"ctDNA": 1.0}})
+    run.record_collected("fda", [candidate(1), candidate(2)], requests={"pma": 1})
+    run.record_deduped([candidate(1), candidate(2)])
+    run.record_enriched(candidate(1, extracted={"test_name": "One"}))
+    run.record_enriched(candidate(2))  # nothing extracted: enriched again on resume
+    run.record_finished(candidate(1, extracted={"test_name": "One"}, draft_submission={}))
+    run.mark("notified")
+    run.close()
+
+    resumed = RunCheckpoint(tmp_path, "2026-01-15_060000")
+    assert resumed.resumed
+    assert resumed.collector_done("fda") and not resumed.collector_done("pubmed")
+    assert [c["id"] for c in resumed.collected_by("fda")] == ["c1", "c2"]
+    assert resumed.state["query_plan"] == {"pubmed": {"ctDNA": 1.0}}
+    assert resumed.state["requests"] == {"fda": {"pma": 1}}
+    assert [c["id"] for c in resumed.deduped] == ["c1", "c2"]
+    assert list(resumed.enriched) == ["c1"]
+    assert resumed.done("notified") and not resumed.done("completed")
+    # The furthest-along copy wins
+    assert "draft_submission" in resumed.restore(candidate(1))
+    assert resumed.restore(candidate(2)) == candidate(2)
+
+
+def test_deferred_draft_is_retried(tmp_path):
+    run = RunCheckpoint(tmp_path, "run")
+    run.record_finished(candidate(1, draft_deferred=True))
+    run.close()
+
+    resumed = RunCheckpoint(tmp_path, "run")
+    restored = resumed.restore(candidate(1))
+    assert "draft_deferred" not in restored
+    assert "c1" not in resumed.finished
+    resumed.record_finished(dict(restored, draft_submission={}))
+    resumed.close()
+    assert "draft_submission" in RunCheckpoint(tmp_path, "run").finished["c1"]
+
+
+def test_line_cut_off_by_a_crash_is_ignored(tmp_path):
+    run = RunCheckpoint(tmp_path, "run")
+    run.record_collected("fda", [candidate(1)])
+    run.close()
+    with open(run.dir / "collected.jsonl", "a") as f:
+        f.write('{"collector": "fda", "cand')
+    assert len(RunCheckpoint(tmp_path, "run").collected) == 1
+
+
+def test_latest_and_prune(tmp_path):
+    for run_id in ["2026-01-01_060000", "2026-01-02_060000", "2026-01-03_060000"]:
+        RunCheckpoint(tmp_path, run_id).mark("completed")
+    assert RunCheckpoint.latest(tmp_path) == "2026-01-03_060000"
+    assert RunCheckpoint.prune(tmp_path, 2) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["2026-01-02_060000", "2026-01-03_060000"]
+    assert RunCheckpoint.prune(tmp_path, 0) == 2
+    assert RunCheckpoint.latest(tmp_path) is None
+
+
+def test_unfinished_run_over_the_same_sources(tmp_path):
+    all_sources = RunCheckpoint(tmp_path, "2026-01-01_060000")
+    all_sources.record_sources(None)
+    fda = RunCheckpoint(tmp_path, "2026-01-01_070000")
+    fda.record_sources(["fda"])
+    RunCheckpoint(tmp_path, "2026-01-01_080000").mark("deduped")  # started step by step
+
+    assert RunCheckpoint.unfinished(tmp_path, None, 24) == "2026-01-01_060000"
+    assert RunCheckpoint.unfinished(tmp_path, ["fda"], 24) == "2026-01-01_070000"
+    assert RunCheckpoint.unfinished(tmp_path, ["pubmed"], 24) is None
+    assert RunCheckpoint.unfinished(tmp_path, ["fda"], 0) is None
+    fda.mark("completed")
+    assert RunCheckpoint.unfinished(tmp_path, ["fda"], 24) is None
@@ -0,0 +1,131 @@
+import asyncio
+import re
+import time
+from datetime import date, datetime
+from types import SimpleNamespace
+from xml.etree import ElementTree
+
+from collectors import FDACollector, RateLimiter, find_feed, parse_feed, pubmed_details, rate_limiter
+
+
+ARTICLE = """
+<PubmedArticle>
+  <MedlineCitation>
+    <PMID>12345</PMID>
+    <Article>
+      <Abstract>
+        <AbstractText Label="BACKGROUND">ctDNA <i>methylation</i>   markers.</AbstractText>
+        <AbstractText Label="RESULTS">Sensitivity was 90%.</AbstractText>
+      </Abstract>
+      <AuthorList>
+        <Author><AffiliationInfo><Affiliation>Guardant Health, Redwood City</Affiliation></AffiliationInfo></Author>
+        <Author><AffiliationInfo><Affiliation>Guardant Health, Redwood City</Affiliation></AffiliationInfo></Author>
+      </AuthorList>
+    </Article>
+    <MeshHeadingList>
+      <MeshHeading><DescriptorName>Circulating Tumor DNA</DescriptorName></MeshHeading>
+    </MeshHeadingList>
+  </MedlineCitation>
+</PubmedArticle>
+"""
+
+
+def test_find_feed():
+    page = '<head><link type="application/rss+xml" rel="alternate" href="/news/feed?a=1&amp;b=2"></head>'
+    assert find_feed(page, "https://example.com/news/") == "https://example.com/news/feed?a=1&b=2"
+    assert find_feed('<link rel="stylesheet" href="/x.css">', "https://example.com") is None
+
+
+def test_parse_feed_rss_and_atom():
+    rss = b"""<rss><channel><item>
+        <title>Launch of &lt;b&gt;Shield&lt;/b&gt;</title><link>https://example.com/1</link>
+        <pubDate>Tue, 13 Jan 2026 09:00:00 GMT</pubDate><description>New test</description>
+    </item></channel></rss>"""
+    atom = b"""<feed xmlns="http://www.w3.org/2005/Atom"><entry>
+        <title>Atom item</title><link rel="self" href="https://example.com/self"/>
+        <link href="https://example.com/2"/><updated>2026-01-13T09:00:00+00:00</updated>
+    </entry></feed>"""
+    [item] = parse_feed(rss)
+    assert item["title"] == "Launch of Shield"
+    assert item["link"] == "https://example.com/1"
+    assert item["published"].year == 2026
+    [entry] = parse_feed(atom)
+    assert entry["link"] == "https://example.com/2"
+    assert entry["summary"] == ""
+
+
+def test_rate_limiter_spaces_out_requests():
+    limiter = RateLimiter(50)
+
+    async def run():
+        starts = []
+        for _ in range(5):
+            await limiter.wait()
+            starts.append(time.monotonic())
+        return starts
+
+    starts = asyncio.run(run())
+    assert starts[-1] - starts[0] >= 4 / 50 * 0.9
+
+
+def test_rate_limiters_are_shared_per_host():
+    assert rate_limiter("https://api.fda.gov/device/510k.json") is rate_limiter("https://api.fda.gov/device/pma.json")
+    assert rate_limiter("https://example.com/feed") is None
+
+
+def test_fda_applicant_filters_are_chunked():
+    assert FDACollector()._applicant_filters() == [""]
+    collector = FDACollector([f"company {i}" for i in range(120)])
+    filters = collector._applicant_filters()
+    assert len(filters) == 3
+    assert filters[0].startswith(' AND (applicant:"company 0" OR ')
+    assert filters[2].count("applicant:") == 20
+
+
+class OpenFDA:
+    """Answers searches from `per_day` results a day, refusing pages past skip + limit = 25,000."""
+
+    def __init__(self, per_day: int):
+        self.per_day = per_day
+        self.pages = []
+
+    async def __call__(self, client, url, params):
+        start, end = (datetime.strptime(d, "%Y%m%d") for d in re.findall(r"\d{8}", params["search"]))
+        skip, limit = params.get("skip", 0), params["limit"]
+        self.pages.append((start.date(), end.date(), skip))
+        if skip + limit > 25000:
+            return SimpleNamespace(status_code=400)
+        total = ((end - start).days + 1) * self.per_day
+        results = [{"n": i} for i in range(skip, min(skip + limit, total))]
+        return SimpleNamespace(status_code=200, json=lambda: {"meta": {"results": {"total": total}}, "results": results})
+
+
+def test_fda_backfill_splits_windows_past_the_paging_limit():
+    collector = FDACollector()
+    collector.window = (date(2026, 1, 1), date(2026, 1, 4))
+    collector.api_get = OpenFDA(per_day=9000)
+    results = asyncio.run(collector._search(None, "510k", "criteria", 1.0))
+    assert len(results) == 4 * 9000
+    # 36,000 over four days: split into two-day windows of 18,000
+    assert {(start, end) for start, end, _ in collector.api_get.pages} == {
+        (date(2026, 1, 1), date(2026, 1, 4)), (date(2026, 1, 1), date(2026, 1, 2)), (date(2026, 1, 3), date(2026, 1, 4)),
+    }
+
+
+def test_fda_single_day_past_the_paging_limit_stops_at_the_limit():
+    collector = FDACollector()
+    collector.window = (date(2026, 1, 1), date(2026, 1, 1))
+    collector.api_get = OpenFDA(per_day=30000)
+    assert len(asyncio.run(collector._search(None, "510k", "criteria", 1.0))) == 25000
+    assert max(skip for _, _, skip in collector.api_get.pages) == 24000
+
+
+def test_pubmed_details():
+    pmid, details = pubmed_details(ElementTree.fromstring(ARTICLE))
+    assert pmid == "12345"
+    assert details == {
+        "abstract": "BACKGROUND: ctDNA methylation markers.\nRESULTS: Sensitivity was 90%.",
+        "mesh_terms": ["Circulating Tumor DNA"],
+        "affiliations": ["Guardant Health, Redwood City"],
+    }
+    assert pubmed_details(ElementTree.fromstring("<PubmedBookArticle/>")) == ("", {})
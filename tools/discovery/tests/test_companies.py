@@ -0,0 +1,58 @@
+import pytest
+
+from companies import CompanyIndex, company_key, vendor_companies
+
+
+WATCHLIST = [
+    {"name": "Guardant Health", "ticker": "GH", "aliases": "Guardant Health, Inc."},
+    {"name": "Tempus", "ticker": "TEM", "aliases": "Tempus AI"},
+    {"name": "GRAIL", "ticker": None, "aliases": None},
+]
+VENDORS = ["Labcorp (Invitae)", "Exact Sciences Corporation", "Agilent / Resolution Bioscience", "Grail"]
+
+
+@pytest.mark.parametrize("name, key", [
+    ("GUARDANT HEALTH, INC.", "guardant health"),
+    ("The Exact Sciences Corporation", "exact sciences"),
+    ("Johnson & Johnson", "johnson and johnson"),
+    ("Co", "co"),
+    ("", ""),
+])
+def test_company_key(name, key):
+    assert company_key(name) == key
+
+
+def test_vendor_companies():
+    assert vendor_companies("Labcorp (Invitae)") == ["Labcorp", "Invitae"]
+    assert vendor_companies("Agilent / Resolution Bioscience") == ["Agilent", "Resolution Bioscience"]
+    assert vendor_companies("Foundation Medicine (commercialized by Roche)") == ["Foundation Medicine"]
+
+
+@pytest.fixture
+def index():
+    return CompanyIndex(WATCHLIST, VENDORS)
+
+
+def test_canonical_names(index):
+    assert index.canonical("GUARDANT HEALTH, INC.") == "Guardant Health"
+    assert index.canonical("gh") == "Guardant Health"
+    assert index.canonical("Tempus AI, Inc.") == "Tempus"
+    assert index.canonical("Grail, LLC") == "GRAIL"
+    assert index.canonical("Invitae Corp") == "Invitae"
+    assert index.canonical("Unknown Labs") is None
+    assert index.canonicalize("Unknown Labs") == "Unknown Labs"
+
+
+def test_applicant_terms_watchlist(index):
+    terms = index.applicant_terms("watchlist")
+    assert sorted(terms) == ["grail", "guardant health", "tempus"]
+
+
+def test_applicant_terms_known(index):
+    terms = index.applicant_terms("known")
+    # Multi-company vendor strings are covered by their parts
+    assert "labcorp invitae" not in terms
+    assert {"labcorp", "invitae", "agilent", "resolution bioscience", "exact sciences"} <= set(terms)
+    # No term is a longer form of another
+    assert not any(t.startswith(other + " ") for t in terms for other in terms)
+    assert len(terms) == len(set(terms))
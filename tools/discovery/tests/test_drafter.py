@@ -0,0 +1,74 @@
+import asyncio
+
+from drafter import HybridDrafter, SubmissionDrafter
+
+
+def candidate(cid: str, confidence: float = 0.9, **extracted) -> dict:
+    extracted = {"is_new_test": True, "is_relevant": True, "test_name": f"Test {cid}", "company": "Acme Dx",
+                 "category": "MRD", **extracted}
+    return {
+        "id": cid, "source": "fda", "source_url": f"https://example.com/{cid}", "title": f"Title {cid}",
+        "raw_data": {"text": f"About {cid}"}, "extracted": extracted, "confidence": confidence,
+        "is_relevant": True,
+    }
+
+
+def draft_all(drafter, candidates: list[dict]) -> list[dict]:
+    async def run():
+        for c in candidates:
+            drafter.submit(c)
+        return await drafter.gather()
+    return asyncio.run(run())
+
+
+def test_submit_drafts_eligible_candidates_and_gather_waits(claude):
+    claude.answers["record_draft"] = lambda ids, prompt: {"name": "Test a", "vendor": "Acme Dx", "lod": "0.01%"}
+    drafter = SubmissionDrafter(client=claude)
+    combined = dict(candidate("combined"), combined_draft={"name": "Test c", "vendor": "Acme Dx"})
+    restored = dict(candidate("restored"), draft_submission={"name": "Earlier"})
+    candidates = [candidate("a"), candidate("unsure", confidence=0.5), combined, restored]
+    drafts = draft_all(drafter, candidates)
+
+    # One request: the combined draft arrived with the extraction, the restored one is kept
+    assert claude.tools == ["record_draft"]
+    assert [d["name"] for d in drafts] == ["Test a", "Test c"]
+    assert candidates[0]["draft_submission"]["_missing_fields"] == ["sensitivity", "specificity", "fdaStatus"]
+    assert "draft_submission" not in candidates[1] and "combined_draft" not in combined
+    assert restored["draft_submission"] == {"name": "Earlier"}
+    assert drafter.combined_drafts == 1 and set(drafter.finished_at) == {"a", "combined"}
+    assert drafter._tasks == {}
+
+
+def test_hybrid_asks_only_for_missing_required_fields(claude):
+    claude.answers["record_gaps"] = lambda ids, prompt: {"sensitivity": 95.0, "specificity": 99.5, "lod": None}
+    drafter = HybridDrafter(client=claude)
+    c = candidate("a", fda_status="FDA 510(k) cleared", approach="tumor-informed")
+    [draft] = draft_all(drafter, [c])
+
+    assert claude.tools == ["record_gaps"]
+    gap_fields = claude.requests[0]["tools"][0]["input_schema"]["properties"]
+    assert sorted(gap_fields) == ["lod", "sensitivity", "specificity"]
+    assert draft["name"] == "Test a" and draft["fdaStatus"] == "FDA 510(k)"
+    assert draft["sensitivity"] == 95.0
+    assert draft["_missing_fields"] == ["lod"]
+    assert drafter.rule_filled == {"name": 1, "vendor": 1, "fdaStatus": 1}
+    assert drafter.llm_filled == {"sensitivity": 1, "specificity": 1}
+
+
+def test_hybrid_falls_back_to_a_full_draft(claude):
+    claude.answers["record_draft"] = lambda ids, prompt: {"name": "Test b", "vendor": "Acme Dx"}
+    drafter = HybridDrafter(client=claude)
+    [draft] = draft_all(drafter, [candidate("b", category="Other")])
+
+    assert claude.tools == ["record_draft"]
+    assert draft["name"] == "Test b"
+    assert drafter.full_drafts == 1 and drafter.gap_requests == 0
+
+
+def test_hybrid_summary_reports_measured_tokens_and_an_estimate(claude):
+    claude.answers["record_gaps"] = lambda ids, prompt: {}
+    drafter = HybridDrafter(client=claude)
+    draft_all(drafter, [candidate("a")])
+
+    assert drafter.tokens_used() == 120
+    assert "120 gap-fill tokens, est. " in drafter.summary()
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from config import CONFIG
+from enricher import ClaudeEnricher
+from governor import LLMGovernor
+from known_tests import KnownTestIndex
+
+
+@pytest.fixture
+def tests_dir(tmp_path):
+    path = tmp_path / "tests"
+    path.mkdir()
+    (path / "mrd.json").write_text(json.dumps([
+        {"id": "mrd-1", "name": "Signatera", "vendor": "Natera", "method": "Tumor-informed ctDNA"},
+    ]))
+    return path
+
+
+def enricher(claude, tests_dir, **kwargs) -> ClaudeEnricher:
+    kwargs = {"use_triage": False, "route_linked": False, "use_combined": False, **kwargs}
+    return ClaudeEnricher(test_index=KnownTestIndex(tests_dir), client=claude, **kwargs)
+
+
+def governor(tmp_path) -> LLMGovernor:
+    config = {"daily_token_budget": 10_000_000, "daily_cost_budget_usd": 100.0, "max_concurrency": 2}
+    return LLMGovernor(config, CONFIG["claude"]["pricing"], [], tmp_path / "ledger.json", tmp_path / "carryover.json")
+
+
+def candidate(cid: str, source: str = "pubmed", **fields) -> dict:
+    return {
+        "id": cid, "source": source, "source_url": f"https://example.com/{cid}", "title": f"Title {cid}",
+        "company": "Nobody Labs", "raw_data": {"text": f"About {cid}"}, **fields,
+    }
+
+
+def extraction(**fields) -> dict:
+    return {"is_new_test": True, "is_new_indication": False, "is_relevant": True, "confidence": 0.9, **fields}
+
+
+def extract_all(ids, prompt):
+    return {"results": [{"candidate_id": i, **extraction()} for i in ids]}
+
+
+def test_combined_and_promoted_candidates_get_one_request(claude, tmp_path, tests_dir):
+    claude.answers = {
+        "record_triage": lambda ids, prompt: {"results": [
+            {"candidate_id": i, "relevance": 0.9 if i == "promoted" else 0.5} for i in ids
+        ]},
+        "record_extraction_and_draft": lambda ids, prompt: {"extraction": extraction(), "draft": {"name": "X"}},
+        "record_extraction": lambda ids, prompt: extraction(),
+    }
+    enriched = []
+    e = enricher(claude, tests_dir, use_triage=True, use_combined=True, on_enriched=enriched.append,
+                 governor=governor(tmp_path))
+    candidates = [candidate("fda", "fda"), candidate("promoted"), candidate("full")]
+    asyncio.run(e.enrich_batch(candidates))
+
+    assert {c["id"]: c["enrichment_path"] for c in candidates} == {
+        "fda": "combined", "promoted": "combined", "full": "full",
+    }
+    assert e.combined_ids == {"fda", "promoted"}
+    assert candidates[0]["combined_draft"] == {"name": "X"}
+    assert sorted(c["id"] for c in enriched) == ["fda", "full", "promoted"]
+    assert sorted(claude.tools) == [
+        "record_extraction", "record_extraction_and_draft", "record_extraction_and_draft", "record_triage",
+    ]
+
+
+def test_combined_requests_stop_when_a_tier_fails(claude, tests_dir, monkeypatch):
+    started = []
+
+    async def hang(candidate):
+        started.append(candidate["id"])
+        await asyncio.sleep(3600)
+
+    async def fail(*args):
+        await asyncio.sleep(0)
+        raise RuntimeError("tier failed")
+
+    e = enricher(claude, tests_dir, use_triage=True, use_combined=True, on_enriched=lambda c: None)
+    monkeypatch.setattr(e, "enrich_combined", hang)
+    monkeypatch.setattr(e, "_run_tier", fail)
+
+    async def run():
+        with pytest.raises(RuntimeError, match="tier failed"):
+            await e.enrich_batch([candidate("fda", "fda"), candidate("other")])
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    assert asyncio.run(run()) == []
+    assert started == ["fda"]
+
+
+def test_batch_that_fails_to_parse_is_split(claude, tests_dir):
+    # Batches of more than two get a reply without results (and the repair too)
+    claude.answers["record_extractions"] = lambda ids, prompt: extract_all(ids, prompt) if len(ids) <= 2 else {}
+    candidates = [candidate(f"c{i}") for i in range(4)]
+    asyncio.run(enricher(claude, tests_dir).enrich_batch(candidates))
+
+    assert all(c["extracted"]["is_new_test"] for c in candidates)
+    # The batch, its repair, then one request per half
+    assert len(claude.requests) == 4
+
+
+def test_candidate_missing_from_a_batch_is_retried_alone(claude, tests_dir):
+    claude.answers = {
+        "record_extractions": lambda ids, prompt: extract_all([i for i in ids if i != "c1"], prompt),
+        "record_extraction": lambda ids, prompt: extraction(is_relevant=False),
+    }
+    candidates = [candidate(f"c{i}") for i in range(3)]
+    asyncio.run(enricher(claude, tests_dir).enrich_batch(candidates))
+
+    assert [c["is_relevant"] for c in candidates] == [True, False, True]
+    assert claude.tools == ["record_extractions", "record_extraction"]
+
+
+def test_linked_and_triaged_candidates_cascade_to_full_extraction(claude, tests_dir):
+    claude.answers = {
+        "record_indications": lambda ids, prompt: {"results": [
+            {"candidate_id": i, "is_relevant": True, "is_new_indication": i == "indication",
+             "is_new_test": i == "escalated", "confidence": 0.8} for i in ids
+        ]},
+        "record_triage": lambda ids, prompt: {"results": [
+            {"candidate_id": i, "relevance": 0.1 if i == "noise" else 0.9, "reason": "r"} for i in ids
+        ]},
+        "record_extractions": extract_all,
+    }
+    candidates = [
+        candidate("indication", linked_tests=["mrd-1"]),
+        candidate("escalated", linked_tests=["mrd-1"]),
+        candidate("noise"),
+        candidate("relevant"),
+    ]
+    asyncio.run(enricher(claude, tests_dir, use_triage=True, route_linked=True).enrich_batch(candidates))
+
+    assert {c["id"]: c["enrichment_path"] for c in candidates} == {
+        "indication": "indication", "escalated": "full", "noise": "triage", "relevant": "full",
+    }
+    assert candidates[0]["extracted"]["existing_test_name"] == "Signatera"
+    assert candidates[2]["is_relevant"] is False
+    # Escalated linked candidates are not triaged
+    assert re.findall(r"^### CANDIDATE (\S+)$", claude.requests[1]["messages"][0]["content"], re.M) == [
+        "noise", "relevant",
+    ]
+    assert claude.tools == ["record_indications", "record_triage", "record_extractions"]
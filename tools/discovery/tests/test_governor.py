@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from governor import BudgetExhausted, BudgetLedger, JobQueue, LLMGovernor
+from llm import UsageTracker
+
+
+PRICING = {"model": {"input": 1.0, "output": 5.0}}
+
+
+def governor(tmp_path, **config) -> LLMGovernor:
+    config = {"daily_token_budget": 10_000, "daily_cost_budget_usd": 1.0, "max_concurrency": 2, **config}
+    watchlist = [{"name": "Guardant Health"}]
+    return LLMGovernor(config, PRICING, watchlist, tmp_path / "ledger.json", tmp_path / "carryover.json")
+
+
+def test_priority_order(tmp_path):
+    candidates = [
+        {"id": "news", "source": "news"},
+        {"id": "pubmed", "source": "pubmed"},
+        {"id": "fda-linked", "source": "fda", "linked_tests": ["x"]},
+        {"id": "fda-watchlist", "source": "fda", "company": "Guardant Health"},
+        {"id": "fda", "source": "fda"},
+    ]
+    order = [c["id"] for c in governor(tmp_path).order(candidates)]
+    assert order[:3] == ["fda-watchlist", "fda-linked", "fda"]
+
+
+def test_reservation_is_held_while_the_request_runs(tmp_path):
+    g = governor(tmp_path)
+    with g.reserve("model", 4_000, 1_000):
+        assert g.remaining_tokens == 5_000
+        # A second request of the same size still fits, a third does not
+        with g.reserve("model", 4_000, 1_000):
+            with pytest.raises(BudgetExhausted):
+                with g.reserve("model", 4_000, 1_000):
+                    pass
+    assert g.remaining_tokens == 10_000
+    assert g.deferred_requests == 1
+
+
+def test_cost_budget_is_enforced(tmp_path):
+    g = governor(tmp_path, daily_cost_budget_usd=0.001)
+    assert not g.fits("model", 100, 1_000)
+    assert g.fits("model", 100, 100)
+
+
+def test_time_limit_stops_new_requests(tmp_path):
+    g = governor(tmp_path, max_run_seconds=1)
+    g.deadline = time.monotonic() - 1
+    with pytest.raises(BudgetExhausted):
+        with g.reserve("model", 1, 1):
+            pass
+
+
+def test_usage_is_charged_to_the_ledger(tmp_path):
+    g = governor(tmp_path)
+    usage = UsageTracker(PRICING, governor=g)
+    usage.record("default", "model", 0.1, 1_000, 200)
+    assert g.ledger.tokens_today == 1_200
+    g.save()
+    assert BudgetLedger(tmp_path / "ledger.json").tokens_today == 1_200
+    assert g.remaining_tokens == 8_800
+
+
+def test_call_limits_concurrency(tmp_path):
+    g = governor(tmp_path, max_concurrency=2)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def request():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return "ok"
+
+    async def run():
+        return await asyncio.gather(*(g.call("model", 10, 10, request) for _ in range(6)))
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    assert peak[0] == 2
+
+
+def test_nested_reservation_from_a_worker_thread(tmp_path):
+    """A repair request inside a governed call reserves budget of its own."""
+    g = governor(tmp_path)
+    usage = UsageTracker(PRICING, governor=g)
+
+    def request():
+        with usage.reserve("model", 4_000, 1_000):
+            return g.remaining_tokens
+
+    assert asyncio.run(g.call("model", 2_000, 1_000, request)) == 2_000
+    with pytest.raises(BudgetExhausted):
+        asyncio.run(g.call("model", 6_000, 1_000, request))
+    assert g.remaining_tokens == 10_000
+
+
+def test_job_queue_runs_later_jobs_by_priority():
+    order = []
+
+    def job(name: str, then=None):
+        async def run():
+            order.append(name)
+            await asyncio.sleep(0.01)
+            if then:
+                then()
+        return run
+
+    async def run():
+        async with JobQueue(1) as queue:
+            # Submitted while "first" runs; "urgent" still goes ahead of "low"
+            queue.submit((1,), job("first", then=lambda: queue.submit((0,), job("urgent"))))
+            queue.submit((2,), job("low"))
+        return order
+
+    assert asyncio.run(run()) == ["first", "urgent", "low"]
+
+
+def test_carryover_round_trip(tmp_path):
+    g = governor(tmp_path)
+    assert g.load_carryover() == []
+    g.save_carryover([{"id": "c1"}])
+    assert governor(tmp_path).load_carryover() == [{"id": "c1"}]
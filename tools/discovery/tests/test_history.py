@@ -0,0 +1,72 @@
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from history import CandidateHistory, fts_query, parse_when
+
+
+@pytest.mark.parametrize("text, query", [
+    ("guardant shield", '"guardant" "shield"'),
+    ('"liquid biopsy" OR ctDNA', '"liquid biopsy" OR "ctDNA"'),
+    ("510(k) clearance", '"510 k" "clearance"'),
+    ("methyl*", '"methyl"*'),
+    ("a OR OR b", '"a" OR "b"'),
+    ("a AND OR b", '"a" OR "b"'),
+    ("a AND NOT b", '"a" NOT "b"'),
+    ("a NOT NOT b", '"a" NOT "b"'),
+    ("OR a AND", '"a"'),
+    ("a NOT", '"a"'),
+    ("NOT", ""),
+    ("()", ""),
+])
+def test_fts_query(text, query):
+    assert fts_query(text) == query
+
+
+@pytest.mark.parametrize("text", ["NOT guardant", "AND NOT guardant", "grail OR NOT guardant"])
+def test_fts_query_rejects_unanchored_not(text):
+    with pytest.raises(ValueError, match="NOT"):
+        fts_query(text)
+
+
+def test_fts_queries_are_valid_fts5():
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE VIRTUAL TABLE t USING fts5(body)")
+    for text in ["a OR OR b", "OR a AND", "x AND NOT y", 'say "hi" NOT* there*', "NEAR(a b)", "a:b c^d"]:
+        db.execute("SELECT * FROM t WHERE t MATCH ?", (fts_query(text),)).fetchall()
+
+
+def test_parse_when():
+    assert parse_when("2026-01-15") == "2026-01-15"
+    assert parse_when("2w") == (date.today() - timedelta(days=14)).isoformat()
+    with pytest.raises(ValueError):
+        parse_when("soon")
+
+
+@pytest.fixture
+def history(tmp_path):
+    with CandidateHistory(tmp_path / "history.sqlite3") as history:
+        history.add([
+            {"id": "g", "source": "fda", "title": "Guardant Shield blood test", "company": "Guardant Health",
+             "discovered_at": "2026-01-10", "confidence": 0.9, "is_relevant": True,
+             "extracted": {"category": "ECD", "test_name": "Shield"}},
+            {"id": "n", "source": "pubmed", "title": "Methylation markers in colorectal cancer",
+             "discovered_at": "2026-02-01", "confidence": 0.4, "is_relevant": False},
+        ], run_id="run-1")
+        yield history
+
+
+def test_search_text_and_filters(history):
+    assert [r["id"] for r in history.search("guardant")] == ["g"]
+    assert [r["id"] for r in history.search("colorectal OR shield", source="pubmed")] == ["n"]
+    assert [r["id"] for r in history.search("shield NOT guardant")] == []
+    assert [r["id"] for r in history.search(None)] == ["n", "g"]
+    assert [r["id"] for r in history.search(None, since="2026-01-15")] == ["n"]
+    assert [r["id"] for r in history.search(None, category="ecd", min_confidence=0.5)] == ["g"]
+
+
+def test_reindexing_a_candidate_replaces_it(history):
+    history.add([{"id": "g", "source": "fda", "title": "Renamed", "discovered_at": "2026-01-10"}])
+    assert history.search("guardant") == []
+    assert [r["id"] for r in history.search("renamed")] == ["g"]
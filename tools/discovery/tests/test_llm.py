@@ -0,0 +1,149 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from llm import (
+    ParseStats, StructuredOutputError, UsageTracker, call_structured, coerce_to_schema, repair_json,
+    schema_problems,
+)
+
+
+PRICING = {"model": {"input": 1.0, "output": 5.0}}
+
+SCHEMA = {
+    "type": "object",
+    "required": ["results"],
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["id", "is_relevant"],
+                "properties": {
+                    "id": {"type": "string"},
+                    "is_relevant": {"type": "boolean"},
+                    "confidence": {"type": "number"},
+                    "cancer_types": {"type": "array", "items": {"type": "string"}},
+                },
+            },
+        },
+    },
+}
+
+
+def tool_reply(data, stop_reason="tool_use"):
+    block = SimpleNamespace(type="tool_use", id="toolu_1", name="record", input=data)
+    return SimpleNamespace(content=[block], stop_reason=stop_reason,
+                           usage=SimpleNamespace(input_tokens=100, output_tokens=20))
+
+
+def text_reply(text):
+    return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)], stop_reason="end_turn",
+                           usage=SimpleNamespace(input_tokens=100, output_tokens=20))
+
+
+class Client:
+    """Answers messages.create with the given replies in turn and keeps the requests."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.requests = []
+        self.messages = self
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return self.replies.pop(0)
+
+
+def call(client, stats=None, usage=None):
+    return call_structured(client, "model", 1000, "PROMPT", "record", "Record results", SCHEMA,
+                           stats or ParseStats(), usage=usage)
+
+
+def test_schema_problems_in_depth():
+    data = {"results": [{"id": "a", "is_relevant": True}, {"id": "b"}]}
+    assert schema_problems(data, SCHEMA) == ["missing required field 'results[1].is_relevant'"]
+    assert schema_problems(data, SCHEMA, items=False) == []
+    assert schema_problems({}, SCHEMA) == ["missing required field 'results'"]
+    assert schema_problems([], SCHEMA) == ["expected a JSON object, got list"]
+
+
+def test_coercion_fixes_near_misses_and_drops_broken_items():
+    data = {"results": [
+        {"id": "a", "is_relevant": "yes", "confidence": "0.8", "cancer_types": "Lung"},
+        {"id": "b", "confidence": 0.1},
+    ]}
+    assert coerce_to_schema(data, SCHEMA) == {"results": [
+        {"id": "a", "is_relevant": True, "confidence": 0.8, "cancer_types": ["Lung"]},
+    ]}
+
+
+@pytest.mark.parametrize("text", [
+    '```json\n{"a": 1,}\n```',
+    'Here you go: {"a": 1} hope that helps',
+    "{“a”: 1}",
+])
+def test_repair_json(text):
+    assert repair_json(text) == {"a": 1}
+
+
+def test_repair_json_python_literals():
+    assert repair_json('{"a": True, "b": None,}') == {"a": True, "b": None}
+
+
+def test_valid_reply_needs_one_request():
+    client = Client(tool_reply({"results": [{"id": "a", "is_relevant": False, "confidence": 0.2, "cancer_types": []}]}))
+    stats = ParseStats()
+    assert call(client, stats)["results"][0]["is_relevant"] is False
+    assert len(client.requests) == 1
+    assert stats.counts["tool_use"] == 1
+
+
+def test_item_missing_a_required_field_is_dropped_without_repair():
+    client = Client(tool_reply({"results": [{"id": "a", "is_relevant": True}, {"id": "b"}]}))
+    assert [r["id"] for r in call(client)["results"]] == ["a"]
+    assert len(client.requests) == 1
+
+
+def test_repair_resends_the_prompt_and_the_bad_reply():
+    client = Client(tool_reply({"items": []}), tool_reply({"results": []}))
+    stats = ParseStats()
+    assert call(client, stats) == {"results": []}
+    repair = client.requests[1]["messages"]
+    assert repair[0] == {"role": "user", "content": "PROMPT"}
+    assert repair[1]["content"][0]["type"] == "tool_use"
+    result = repair[2]["content"][0]
+    assert result["type"] == "tool_result" and result["is_error"]
+    assert "results" in result["content"]
+    assert stats.counts["repair_call"] == 1
+
+
+def test_text_reply_is_parsed_or_repaired():
+    assert call(Client(text_reply(json.dumps({"results": []})))) == {"results": []}
+    client = Client(text_reply("no idea"), tool_reply({"results": []}))
+    assert call(client) == {"results": []}
+    # No tool call to answer: the repair is a plain user message
+    assert "Call the `record` tool again" in client.requests[1]["messages"][2]["content"]
+
+
+def test_failed_repair_raises():
+    client = Client(tool_reply({"items": []}), tool_reply({"items": []}))
+    with pytest.raises(StructuredOutputError, match="results"):
+        call(client)
+
+
+def test_truncated_reply_is_not_repaired():
+    client = Client(tool_reply({"results": []}, stop_reason="max_tokens"))
+    with pytest.raises(StructuredOutputError, match="max_tokens"):
+        call(client)
+    assert len(client.requests) == 1
+
+
+def test_usage_is_recorded_per_request():
+    usage = UsageTracker(PRICING)
+    call(Client(tool_reply({"items": []}), tool_reply({"results": []})), usage=usage)
+    report = usage.report()["default"]
+    assert report["requests"] == 2
+    assert report["input_tokens"] == 200
+    assert usage.total_cost == pytest.approx((200 * 1.0 + 40 * 5.0) / 1e6)
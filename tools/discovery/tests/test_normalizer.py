@@ -0,0 +1,42 @@
+import json
+
+from companies import CompanyIndex
+from normalizer import Normalizer
+
+
+def normalizer(tmp_path, seen: dict | None = None) -> Normalizer:
+    data_js = tmp_path / "data.js"
+    data_js.write_text('const tests = [{ name: "Guardant360 CDx", vendor: "Guardant Health" }];\n')
+    seen_path = tmp_path / "seen_candidates.json"
+    seen_path.write_text(json.dumps(seen or {}))
+    companies = CompanyIndex([{"name": "Guardant Health", "ticker": "GH", "aliases": None}])
+    return Normalizer(data_js, seen_path, companies=companies)
+
+
+def candidate(cid: str, title: str, company: str = "") -> dict:
+    return {"id": cid, "source": "fda", "title": title, "company": company, "discovered_at": "2026-01-15"}
+
+
+def test_canonicalize(tmp_path):
+    c = normalizer(tmp_path).canonicalize(candidate("a", "  New \n test ", "GUARDANT HEALTH, INC."))
+    assert c["title"] == "New test"
+    assert c["company"] == "Guardant Health"
+    assert c["company_raw"] == "GUARDANT HEALTH, INC."
+
+
+def test_process_drops_duplicates_seen_and_known_tests(tmp_path):
+    n = normalizer(tmp_path, seen={"old": {}})
+    new = n.process([
+        candidate("a", "Shield blood test"),
+        candidate("a", "Shield blood test"),
+        candidate("old", "Seen before"),
+        candidate("b", "Guardant360 CDx"),
+        candidate("c", "guardant360-cdx liquid"),
+    ])
+    assert [c["id"] for c in new] == ["a"]
+
+
+def test_mark_seen_persists(tmp_path):
+    normalizer(tmp_path).mark_seen([candidate("a", "Shield blood test")])
+    seen = json.loads((tmp_path / "seen_candidates.json").read_text())
+    assert seen["a"]["title"] == "Shield blood test"
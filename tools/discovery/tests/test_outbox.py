@@ -0,0 +1,149 @@
+import asyncio
+import json
+import multiprocessing
+
+from outbox import NotificationOutbox, SendError
+
+
+CONFIG = {
+    "window_minutes": 0,
+    "send_attempts": 1,
+    "max_attempts": 3,
+    "retry_seconds": 60,
+    "keep_days": 7,
+}
+
+
+def render(candidates):
+    if not candidates:
+        return None, None
+    return f"{len(candidates)} candidates", "<p>" + ", ".join(sorted(c["id"] for c in candidates)) + "</p>"
+
+
+class Endpoint:
+    """Records sends; the first `failures` raise SendError."""
+
+    def __init__(self, failures: int = 0, permanent: bool = False):
+        self.failures = failures
+        self.permanent = permanent
+        self.sends = []
+
+    async def __call__(self, client, subject, html, idempotency_key):
+        self.sends.append((subject, html, idempotency_key))
+        if len(self.sends) <= self.failures:
+            raise SendError("endpoint down", permanent=self.permanent)
+        return f"msg-{len(self.sends)}"
+
+
+def make_outbox(path, send, **config):
+    return NotificationOutbox(path, {**CONFIG, **config}, render, send)
+
+
+def test_run_is_enqueued_once(tmp_path):
+    outbox = make_outbox(tmp_path / "outbox.json", Endpoint())
+    assert outbox.enqueue("run-1", [{"id": "a"}, {"id": "b"}]) == 2
+    assert outbox.enqueue("run-1", [{"id": "a"}, {"id": "c"}]) == 0
+    reopened = make_outbox(tmp_path / "outbox.json", Endpoint())
+    assert reopened.has_run("run-1")
+    assert set(reopened.messages[0]["candidates"]) == {"a", "b"}
+
+
+def test_candidates_sent_before_are_not_queued_again_by_a_new_run(tmp_path):
+    endpoint = Endpoint()
+    outbox = make_outbox(tmp_path / "outbox.json", endpoint)
+    outbox.enqueue("run-1", [{"id": "a"}])
+    assert asyncio.run(outbox.flush(client=object())) == 1
+    # A retry under a new run ID: only the candidate not notified before goes out
+    assert outbox.enqueue("run-2", [{"id": "a"}, {"id": "b"}]) == 1
+    assert outbox.enqueue("run-3", [{"id": "a"}]) == 0
+    asyncio.run(outbox.flush(client=object()))
+    assert [html for _, html, _ in endpoint.sends] == ["<p>a</p>", "<p>b</p>"]
+    assert len(outbox.messages) == 2
+
+
+def test_runs_in_one_window_share_a_message(tmp_path):
+    outbox = make_outbox(tmp_path / "outbox.json", Endpoint(), window_minutes=60)
+    outbox.enqueue("run-1", [{"id": "a"}])
+    outbox.enqueue("run-2", [{"id": "a"}, {"id": "b"}])
+    assert len(outbox.messages) == 1
+    assert outbox.messages[0]["runs"] == ["run-1", "run-2"]
+    # The window is still open
+    assert asyncio.run(outbox.flush(client=object())) == 0
+
+
+def test_dropped_fields_are_not_queued(tmp_path):
+    outbox = make_outbox(tmp_path / "outbox.json", Endpoint())
+    outbox.enqueue("run-1", [{"id": "a", "title": "T", "raw_data": {"big": 1}, "raw_ref": {"sha256": "x"}}])
+    assert outbox.messages[0]["candidates"]["a"] == {"id": "a", "title": "T"}
+
+
+def test_retries_resend_the_same_message_and_key(tmp_path):
+    endpoint = Endpoint(failures=1)
+    outbox = make_outbox(tmp_path / "outbox.json", endpoint, retry_seconds=0)
+    outbox.enqueue("run-1", [{"id": "a"}])
+
+    assert asyncio.run(outbox.flush(client=object())) == 0
+    message = outbox.messages[0]
+    assert message["status"] == "pending"
+    assert message["last_error"] == "endpoint down"
+
+    # Candidates from a later run do not change a closed message
+    outbox.enqueue("run-2", [{"id": "b"}])
+    message["next_attempt_at"] = 0
+    outbox._save()
+    assert asyncio.run(outbox.flush(client=object())) == 2
+    first, retry = endpoint.sends[:2]
+    assert first == retry
+    assert first[2] == f"openonco-discovery-{message['id']}"
+    assert [m["status"] for m in outbox.messages] == ["sent", "sent"]
+
+
+def test_failed_flushes_back_off(tmp_path):
+    outbox = make_outbox(tmp_path / "outbox.json", Endpoint(failures=10), max_attempts=10)
+    outbox.enqueue("run-1", [{"id": "a"}])
+    asyncio.run(outbox.flush(client=object()))
+    first = outbox.messages[0]["next_attempt_at"]
+    outbox.messages[0]["next_attempt_at"] = 0
+    outbox._save()
+    asyncio.run(outbox.flush(client=object()))
+    # 60s after the first failed flush, 120s after the second
+    assert outbox.messages[0]["failed_flushes"] == 2
+    assert outbox.messages[0]["next_attempt_at"] - first > 50
+
+
+def test_gives_up_on_permanent_failure(tmp_path):
+    endpoint = Endpoint(failures=1, permanent=True)
+    outbox = make_outbox(tmp_path / "outbox.json", endpoint)
+    outbox.enqueue("run-1", [{"id": "a"}])
+    assert asyncio.run(outbox.flush(client=object())) == 0
+    assert outbox.messages[0]["status"] == "failed"
+    assert outbox.next_due() is None
+
+
+def test_nothing_to_render_is_skipped(tmp_path):
+    endpoint = Endpoint()
+    outbox = make_outbox(tmp_path / "outbox.json", endpoint)
+    outbox.enqueue("run-1", [{"id": "a"}])
+    outbox.render = lambda candidates: (None, None)
+    asyncio.run(outbox.flush(client=object()))
+    assert outbox.messages[0]["status"] == "skipped"
+    assert endpoint.sends == []
+
+
+def _enqueue_many(path, tag):
+    outbox = make_outbox(path, Endpoint())
+    for i in range(50):
+        outbox.enqueue(f"{tag}-{i}", [{"id": f"{tag}-{i}"}])
+
+
+def test_concurrent_writers_keep_every_run(tmp_path):
+    path = tmp_path / "outbox.json"
+    processes = [multiprocessing.Process(target=_enqueue_many, args=(path, tag)) for tag in "ab"]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    with open(path) as f:
+        state = json.load(f)
+    assert len(state["runs"]) == 100
+    assert sum(len(m["candidates"]) for m in state["messages"]) == 100
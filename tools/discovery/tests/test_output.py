@@ -0,0 +1,38 @@
+from enricher import EXTRACTION_SCHEMA
+from llm import coerce_to_schema
+from notifications import format_candidates_email
+from output import OutputHandler
+
+
+def candidate(cid: str, extracted: dict) -> dict:
+    extracted = coerce_to_schema(extracted, EXTRACTION_SCHEMA)
+    return {
+        "id": cid, "source": "fda", "title": f"Title {cid}", "source_url": f"https://example.com/{cid}",
+        "extracted": extracted, "confidence": extracted["confidence"], "is_relevant": extracted["is_relevant"],
+        "is_new_test": extracted["is_new_test"], "is_new_indication": extracted["is_new_indication"],
+    }
+
+
+def sparse_candidates() -> list[dict]:
+    """Extractions with only the required fields; coercion fills the optional strings with None."""
+    return [
+        candidate("test", {"is_new_test": True, "is_new_indication": False, "is_relevant": True, "confidence": 0.9}),
+        candidate("indication", {"is_new_test": False, "is_new_indication": True, "is_relevant": True,
+                                 "confidence": 0.9}),
+        candidate("other", {"is_new_test": False, "is_new_indication": False, "is_relevant": False,
+                            "confidence": 0.9}),
+    ]
+
+
+def test_digest_with_empty_optional_fields(tmp_path):
+    candidates = sparse_candidates()
+    assert candidates[1]["extracted"]["new_indication_details"] is None
+    digest = OutputHandler(tmp_path).generate_digest(candidates)
+    assert "Existing test: Unknown" in digest
+    assert "What's new: \n" in digest
+
+
+def test_email_with_empty_optional_fields():
+    subject, html = format_candidates_email(sparse_candidates())
+    assert "Title test" in html and "Title indication" in html
+    assert "None" not in html
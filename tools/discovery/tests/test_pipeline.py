@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from config import CONFIG
+from pipeline import DiscoveryPipeline
+
+
+class Collector:
+    def __init__(self, name: str, count: int = 0, error: Exception | None = None):
+        self.name = name
+        self.count = count
+        self.error = error
+        self.requests = 0
+
+    async def collect(self) -> list[dict]:
+        if self.error:
+            raise self.error
+        return [{"id": f"{self.name}-{i}", "source": self.name, "title": f"Item {i}"} for i in range(self.count)]
+
+
+class Normalizer:
+    def canonicalize(self, candidate: dict) -> dict:
+        return candidate
+
+    def is_new(self, candidate: dict, seen_in_batch: set) -> bool:
+        if candidate["id"] in seen_in_batch:
+            return False
+        seen_in_batch.add(candidate["id"])
+        return True
+
+
+class Enricher:
+    """Enriches chunks once `gate` is open."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.chunks = []
+
+    async def enrich_batch(self, chunk: list[dict]):
+        await self.gate.wait()
+        self.chunks.append(len(chunk))
+        for candidate in chunk:
+            candidate["extracted"] = {"is_relevant": True}
+            if candidate["id"].endswith("-0"):
+                candidate["enrichment_deferred"] = True
+
+    def release(self, candidate: dict):
+        pass
+
+
+class Drafter:
+    async def wait_for(self, candidate: dict) -> dict | None:
+        await asyncio.sleep(0)
+        return {"name": candidate["id"]} if candidate["id"].endswith("-1") else None
+
+
+@pytest.fixture(autouse=True)
+def pipeline_config(monkeypatch):
+    monkeypatch.setitem(CONFIG, "pipeline", dict(
+        CONFIG["pipeline"], queue_size=2, enrich_chunk=2, enrich_wait_seconds=0.01, enrich_workers=1, draft_workers=3,
+    ))
+
+
+def test_stages_block_on_full_queues_and_drain_on_shutdown():
+    enricher = Enricher()
+    collectors = [Collector("fda", 40), Collector("news", 10), Collector("broken", error=RuntimeError("down"))]
+
+    async def run():
+        pipeline = DiscoveryPipeline(collectors, Normalizer(), enricher=enricher, drafter=Drafter())
+        task = asyncio.create_task(pipeline.run())
+        await asyncio.sleep(0.2)
+        # Enrichment is held: only what fits in the queues and the stages' hands was collected
+        in_flight = pipeline.counts["raw"]
+        enricher.gate.set()
+        await asyncio.wait_for(task, timeout=5)
+        return pipeline, in_flight
+
+    pipeline, in_flight = asyncio.run(run())
+    assert in_flight < 20
+    assert pipeline.counts["raw"] == pipeline.counts["new"] == pipeline.counts["enriched"] == 50
+    assert max(enricher.chunks) == 2
+    assert sorted(c["id"] for c in pipeline.deferred) == ["fda-0", "news-0"]
+    assert len(pipeline.finished) == 48
+    assert sorted(d["name"] for d in pipeline.drafts) == ["fda-1", "news-1"]
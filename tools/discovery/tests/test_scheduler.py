@@ -0,0 +1,123 @@
+import math
+import random
+
+import pytest
+
+from scheduler import QueryScheduler
+
+
+CONFIG = {
+    "enabled": True,
+    "sources": ["pubmed"],
+    "min_share": 0.25,
+    "decay": 0.9,
+    "prior_relevant": 1.0,
+    "prior_requests": 2.0,
+    "depth_range": [0.5, 2.0],
+    "interval_range": [0.5, 2.0],
+}
+
+
+class Collector:
+    def __init__(self, name: str, arms: list[str], max_arms: int | None = None):
+        self.name = name
+        self._arms = arms
+        self.max_arms = max_arms
+        self.plan = None
+
+    def arms(self) -> list[str]:
+        return self._arms
+
+    def start_run(self, plan):
+        self.plan = plan
+
+
+def scheduler(tmp_path, seed: int = 0, **config) -> QueryScheduler:
+    return QueryScheduler(tmp_path / "query_yield.json", {**CONFIG, **config}, rng=random.Random(seed))
+
+
+def arm_yield(arm: str, requests: int, relevant: int, source: str = "pubmed") -> dict:
+    return {"source": source, "arm": arm, "requests": requests, "raw": relevant, "new": relevant,
+            "relevant": relevant, "cost_usd": 0.0}
+
+
+def test_record_decays_older_yield(tmp_path):
+    s = scheduler(tmp_path)
+    s.record({"pubmed:a": arm_yield("a", 10, 4)})
+    s.record({"pubmed:a": arm_yield("a", 10, 0)})
+    stats = s.state["arms"]["pubmed:a"]
+    assert stats["requests"] == pytest.approx(10 * 0.9 + 10)
+    assert stats["relevant"] == pytest.approx(4 * 0.9)
+    assert stats["runs"] == 2
+    # Arms the run did not query keep their totals
+    s.record({"pubmed:b": arm_yield("b", 0, 0)})
+    assert "pubmed:b" not in s.state["arms"]
+
+
+def test_state_is_saved(tmp_path):
+    scheduler(tmp_path).record({"pubmed:a": arm_yield("a", 4, 2)})
+    assert scheduler(tmp_path).state["arms"]["pubmed:a"]["relevant"] == 2
+
+
+def test_unproductive_arms_still_run_at_the_floor(tmp_path):
+    s = scheduler(tmp_path)
+    for _ in range(20):
+        s.record({"pubmed:good": arm_yield("good", 10, 10), "pubmed:dud": arm_yield("dud", 10, 0)})
+    runs = 400
+    queried = 0
+    for _ in range(runs):
+        collector = Collector("pubmed", ["good", "dud"])
+        s.plan([collector])
+        queried += "dud" in collector.plan
+        assert "good" in collector.plan
+    # At least min_share of the runs, and never skipped more than ceil(1 / min_share) - 1 in a row
+    assert queried / runs >= CONFIG["min_share"]
+    assert s.state["arms"]["pubmed:dud"]["skipped"] < math.ceil(1 / CONFIG["min_share"])
+
+
+def test_overdue_arm_is_forced_into_a_capped_plan(tmp_path):
+    s = scheduler(tmp_path)
+    s._stats("pubmed", "dud")["skipped"] = 3
+    collector = Collector("pubmed", ["a", "b", "dud"], max_arms=1)
+    s.plan([collector])
+    assert list(collector.plan) == ["dud"]
+
+
+def test_depths_stay_in_range(tmp_path):
+    s = scheduler(tmp_path)
+    s.record({"pubmed:good": arm_yield("good", 100, 100), "pubmed:dud": arm_yield("dud", 100, 0)})
+    for seed in range(20):
+        s.rng = random.Random(seed)
+        collector = Collector("pubmed", ["good", "dud"])
+        s.plan([collector])
+        assert all(0.5 <= depth <= 2.0 for depth in collector.plan.values())
+
+
+def test_unscheduled_sources_run_in_full(tmp_path):
+    s = scheduler(tmp_path)
+    fda = Collector("fda", ["pma", "510k"])
+    pubmed = Collector("pubmed", ["a", "b", "c"])
+    s.plan([fda, pubmed], previous={"pubmed": {"b": 1.5}})
+    assert fda.plan == {"pma": 1.0, "510k": 1.0}
+    # A resumed run gets the plan it started with
+    assert pubmed.plan == {"b": 1.5}
+
+
+def test_disabled_scheduler_queries_every_arm(tmp_path):
+    s = scheduler(tmp_path, enabled=False)
+    collector = Collector("pubmed", ["a", "b", "c"], max_arms=2)
+    s.plan([collector])
+    assert collector.plan == {"a": 1.0, "b": 1.0}
+
+
+def test_run_yield_counts_per_arm(tmp_path):
+    collected = [{"source": "pubmed", "query": "a"}] * 3 + [{"source": "pubmed", "query": None}]
+    finished = [
+        {"source": "pubmed", "query": "a", "is_relevant": True},
+        {"source": "pubmed", "query": "a", "is_relevant": True,
+         "extracted": {"is_existing_test_update": True}},
+    ]
+    arms = scheduler(tmp_path).run_yield({"pubmed": {"a": 2}}, collected, finished)
+    assert arms["pubmed:a"] == {
+        "source": "pubmed", "arm": "a", "requests": 2, "raw": 3, "new": 2, "relevant": 1, "cost_usd": 0.0,
+    }
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+import main
+from collectors import BaseCollector
+from config import CONFIG
+
+
+ITEMS = [
+    {"id": "fda-1", "title": "Acme Dx MRD assay cleared", "company": "Acme Dx", "text": "A new MRD assay"},
+    # Titles naming a known test are dropped by dedup; the linker finds it in the text
+    {"id": "fda-2", "title": "MRD test now covers bladder cancer", "company": "Natera",
+     "text": "Signatera is now available for bladder cancer"},
+]
+
+
+class Collector(BaseCollector):
+    name = "fda"
+
+    async def collect(self) -> list[dict]:
+        return [
+            dict(item, source=self.name, source_url=f"https://example.com/{item['id']}", date="2026-01-15",
+                 discovered_at="2026-01-15T09:00:00", raw_data={"text": item["text"]})
+            for item in ITEMS
+        ]
+
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch, claude):
+    tests_dir = tmp_path / "tests"
+    tests_dir.mkdir()
+    (tests_dir / "mrd.json").write_text(json.dumps([{"id": "mrd-1", "name": "Signatera", "vendor": "Natera"}]))
+    (tmp_path / "data.js").write_text('const tests = [{ name: "Signatera", vendor: "Natera" }];\n')
+    paths = dict(CONFIG["paths"], tests_dir=tests_dir, data_js=tmp_path / "data.js", **{
+        key: tmp_path / name for key, name in [
+            ("runs_dir", "runs"), ("output_dir", "candidates"), ("archive_dir", "archive"),
+            ("seen_candidates", "seen.json"), ("query_yield", "query_yield.json"), ("history", "history.sqlite3"),
+            ("outbox", "outbox.json"), ("llm_ledger", "ledger.json"), ("carryover", "carryover.json"),
+        ]
+    })
+    monkeypatch.setitem(CONFIG, "paths", paths)
+    monkeypatch.setattr("collectors.default_collectors", lambda: [Collector()])
+    monkeypatch.setattr("enricher.Anthropic", lambda: claude)
+    monkeypatch.setattr("drafter.Anthropic", lambda: claude)
+    monkeypatch.delenv("RESEND_API_KEY", raising=False)
+    return paths
+
+
+def test_legacy_flags_and_bare_options_map_to_commands():
+    parser = main.build_parser()
+    assert parser.parse_args(main._normalize_argv(["--skip-email"])).handler is main.cmd_run
+    assert parser.parse_args(main._normalize_argv(["--daemon"])).handler is main.cmd_daemon
+    args = parser.parse_args(main._normalize_argv(["dedup"]))
+    assert args.handler is main.cmd_dedup and args.run == "latest"
+    assert parser.parse_args(["collect"]).run is None
+
+
+def test_step_commands_run_a_stored_run_to_the_end(paths, claude, capsys):
+    claude.answers = {
+        "record_indications": lambda ids, prompt: {"results": [
+            {"candidate_id": i, "is_relevant": True, "is_new_indication": True, "is_new_test": False,
+             "new_indication_details": "Bladder cancer", "confidence": 0.9} for i in ids
+        ]},
+        "record_triage": lambda ids, prompt: {"results": [{"candidate_id": i, "relevance": 0.9} for i in ids]},
+        "record_extraction": lambda ids, prompt: {
+            "is_new_test": True, "is_new_indication": False, "is_relevant": True, "confidence": 0.9,
+            "test_name": "Acme MRD", "company": "Acme Dx", "category": "MRD", "fda_status": "510(k) cleared",
+        },
+        "record_gaps": lambda ids, prompt: {"sensitivity": 95.0, "specificity": 99.0, "lod": 0.01},
+    }
+    # A later step before the one it needs says what to run first
+    main.main(["collect"])
+    main.main(["enrich"])
+    assert "run `python main.py dedup --run" in capsys.readouterr().out
+
+    for step in ("dedup", "enrich", "draft", "digest", "notify"):
+        main.main([step])
+    out = capsys.readouterr().out
+    assert "New candidates after dedup: 2 (1 linked" in out
+    assert "  • New tests: 1" in out and "  • New indications: 1" in out
+    assert claude.tools == ["record_indications", "record_triage", "record_extraction", "record_gaps"]
+
+    seen = json.loads(paths["seen_candidates"].read_text())
+    assert sorted(seen) == ["fda-1", "fda-2"]
+    [run_dir] = paths["runs_dir"].iterdir()
+    finished = [json.loads(line) for line in (run_dir / "finished.jsonl").read_text().splitlines()]
+    drafted = [r for r in finished if r.get("draft_submission")]
+    assert [r["draft_submission"]["name"] for r in drafted] == ["Acme MRD"]
+
+    main.main(["notify"])
+    assert "Notifications already queued" in capsys.readouterr().out
@@ -0,0 +1,190 @@
+"""
+Run tracing: timed spans, counters and structured JSON logs.
+
+Spans cover each pipeline stage, collector, HTTP request and Claude call.
+Finished spans are written as JSON lines to the run's trace log and
+aggregated into the run summary. Nesting follows the current task/thread
+through contextvars, so spans started inside asyncio.to_thread keep their
+parent.
+
+    with TRACER.span("collect.fda", kind="collector") as span:
+        ...
+        span["candidates"] = len(candidates)
+"""
+
+import contextvars
+import cProfile
+import io
+import itertools
+import json
+import logging
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+
+logger = logging.getLogger("discovery")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; fields passed as extra={"fields": {...}} are merged in."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["error"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class Tracer:
+    """Collects spans and counters for one run at a time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._handler = None
+        self.profile_dir = None
+        self.reset()
+
+    def reset(self):
+        self.spans: list[dict] = []
+        self.counters: dict[str, int] = {}
+        self.started_at = time.perf_counter()
+
+    def start_run(self, log_path: Path, profile_dir: Path | None = None):
+        """Begin a run: clear state and send structured logs to log_path (JSON lines)."""
+        self.reset()
+        self.stop_run()
+        self._handler = logging.FileHandler(log_path)
+        self._handler.setFormatter(JsonFormatter())
+        logger.addHandler(self._handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        self.profile_dir = profile_dir
+        if profile_dir is not None:
+            Path(profile_dir).mkdir(parents=True, exist_ok=True)
+
+    def stop_run(self):
+        if self._handler is not None:
+            logger.removeHandler(self._handler)
+            self._handler.close()
+            self._handler = None
+
+    def event(self, name: str, **fields):
+        """Log a point-in-time event."""
+        logger.info(name, extra={"fields": fields})
+
+    def record(self, span: dict):
+        """Store a finished span and write it to the log."""
+        with self._lock:
+            self.spans.append(span)
+        logger.info("span", extra={"fields": span})
+
+    def new_span(self, name: str, kind: str, **attrs) -> dict:
+        parent = _current_span.get()
+        return {
+            "span_id": next(self._ids),
+            "parent_id": parent["span_id"] if parent else None,
+            "name": name,
+            "kind": kind,
+            **attrs,
+        }
+
+    def incr(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", profile: bool = False, **attrs):
+        """
+        Time a block. Yields a dict; keys set on it are recorded as span attributes.
+
+        profile=True also runs cProfile over the block when profiling is on (only
+        use it for phases that do not overlap; one profiler runs at a time).
+        """
+        record = self.new_span(name, kind, **attrs)
+        token = _current_span.set(record)
+        profiler = cProfile.Profile() if profile and self.profile_dir is not None else None
+        start = time.perf_counter()
+        record["start_ms"] = round((start - self.started_at) * 1000, 1)
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        except BaseException as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._write_profile(name, profiler)
+            record["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            _current_span.reset(token)
+            self.record(record)
+
+    def _write_profile(self, name: str, profiler: cProfile.Profile):
+        """Save <name>.pstats and a top-30 cumulative-time report."""
+        path = Path(self.profile_dir) / f"{name}.pstats"
+        profiler.dump_stats(path)
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(30)
+        path.with_suffix(".txt").write_text(text.getvalue())
+
+    def summary(self) -> dict:
+        """Aggregate spans by kind and name: count, total/max duration and summed numeric attributes."""
+        groups: dict[str, dict[str, dict]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            group = groups.setdefault(span["kind"], {}).setdefault(span["name"], {
+                "count": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0,
+            })
+            group["count"] += 1
+            group["total_ms"] = round(group["total_ms"] + span["duration_ms"], 1)
+            group["max_ms"] = max(group["max_ms"], span["duration_ms"])
+            if "error" in span:
+                group["errors"] += 1
+            for key, value in span.items():
+                if key in ("span_id", "parent_id", "start_ms", "duration_ms", "status") or isinstance(value, bool):
+                    continue
+                if isinstance(value, (int, float)):
+                    group[key] = group.get(key, 0) + value
+        return {"spans": groups, "counters": dict(self.counters)}
+
+
+TRACER = Tracer()
+
+
+def trace_event_hooks() -> dict:
+    """httpx event hooks that record one span per HTTP request (duration, status, bytes)."""
+    async def on_request(request):
+        request.extensions["trace_start"] = time.perf_counter()
+
+    async def on_response(response):
+        await response.aread()
+        request = response.request
+        start = request.extensions.get("trace_start", time.perf_counter())
+        span = TRACER.new_span(
+            f"http.{request.url.host}",
+            "http",
+            method=request.method,
+            status=response.status_code,
+            bytes=len(response.content),
+            start_ms=round((start - TRACER.started_at) * 1000, 1),
+            duration_ms=round((time.perf_counter() - start) * 1000, 1),
+        )
+        if response.status_code >= 400:
+            span["error"] = f"HTTP {response.status_code}"
+        TRACER.record(span)
+
+    return {"request": [on_request], "response": [on_response]}